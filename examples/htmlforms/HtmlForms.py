@@ -1,5 +1,6 @@
 import logging
 import os
+import uuid
 from yangvoodoo.SchemaData import Expander
 from yangvoodoo import Types
 
@@ -73,6 +74,11 @@ class HtmlFormExpander(Expander):
         super().__init__(yang_module, log)
         self.default_collapse_state = "collapse show"
 
+    def get_worker_state(self):
+        state = super().get_worker_state()
+        state["default_collapse_state"] = self.default_collapse_state
+        return state
+
     def callback_write_header(self, module):
         self.result.write(
             f"""<html lang="en">
@@ -93,6 +99,9 @@ class HtmlFormExpander(Expander):
     AJAX_BASE_SERVER_URL="{self.AJAX_BASE_SERVER_URL}/{self.yang_module}";
     LIBYANG_USER_PAYLOAD = {{}};  // this will be populated in the footer
     LIBYANG_CHANGES = []; // a list of changes we need to make (supports the ability to do a simple UNDO mechnism)
+    LIBYANG_CHANGES_SENT = 0; // the number of changes the server has applied to the data tree it holds for us
+    YANGUI_SESSION_ID = "{uuid.uuid4()}";
+    YANGUI_SESSION_STORE = false; // set when the server holds our data tree (only new changes need to be sent)
     ELEMENTS_EXPANDED_BY_USER = {{}}; // this contains the UUID's of elements which have been expanded by the user
     LIBYANG_MODEL = "{self.yang_module}";
     YANGUI_TITLE = "{self.TITLE}";
@@ -325,7 +334,7 @@ class HtmlFormExpander(Expander):
 
         if not self._should_container_be_visible(node, presence):
             this_container_collapse_or_show = "collapse"
-            if not self._exists("".join(self.data_path_trail), child_contents=True):
+            if not self._exists(self.data_path_trail.path, child_contents=True):
                 this_container_disable = "yangui-disable"
             else:
                 if presence is True:
@@ -346,6 +355,29 @@ class HtmlFormExpander(Expander):
         self._write_close_second_div()
         self._write_close_first_div()
 
+    def callback_write_placeholder(self, node, node_id):
+        """
+        Write a button to load the contents of a node which was not expanded because of max_depth, the server
+        renders the node again (see subprocess_data_path) and yangui_load_placeholder replaces the node on the
+        page with it.
+
+        A choice is not part of the data path, so for a choice the data node holding the choice is rendered
+        (one level deeper) and only the choice is taken from it.
+        """
+        max_depth = max(self.max_depth, 1) + 1
+        if node.nodetype() == Types.LIBYANG_NODETYPE["CHOICE"]:
+            max_depth += 1
+        self.result.write(f"{self.open_indent()}<div class='yangui-placeholder'>")
+        if len(self.data_path_trail) > 1:
+            self.result.write(
+                f"<a class='btn' href='#' onClick=\"yangui_load_placeholder('{self.get_id()}', '{self.get_hybrid_id()}', {max_depth}); return false;\">"
+            )
+            self.result.write("<i class='fa fa-ellipsis-h' aria-hidden='true'></i></a>")
+        else:
+            self.result.write("...")
+        self.result.write("</div>\n")
+        self.close_indent()
+
     def callback_write_leaf(self, node, value, quote, explicit, default, key, template, node_id):
         """
         Write an input box to capture input from a leaf.
@@ -70,11 +70,17 @@ function yangui_undo(){
   Since the server always process the LIBYANG_USER_PAYLOAD + LIBYANG_CAHNGES every time (i.e.
   there is no server state) then simply cleaning up the UI and popping the change from the list
   is sufficient to implement the undo.
+
+  When the server holds the data tree (see yangui_post) the undone change has already been applied
+  so the next request must send the LIBYANG_USER_PAYLOAD + LIBYANG_CHANGES in full.
   */
   undo = LIBYANG_CHANGES.pop();
   if(!undo){
     return;
   }
+  if(LIBYANG_CHANGES.length < LIBYANG_CHANGES_SENT){
+    LIBYANG_CHANGES_SENT = 0;
+  }
 
   if(undo.undelete_css){
     $(document.getElementById(undo.undelete_css)).removeClass('yangui-deleted');
@@ -288,9 +294,9 @@ function yangui_create_new_list_element_or_leaflist_item(){
   */
   console.log("YANGUI: Create New List Element/Leaf List Item Required: " + $(document.getElementById("yangui-create-list-button")).data('yangui-for-datapath'));
   yangui_default_mousetrap();
-  list_type=$(document.getElementById("yangui-create-list-button")).data('yangui-for-type');
-  div_to_append = $(document.getElementById("yangui-create-list-button")).data('yangui-containing-div');
-  payload = {
+  var list_type = $(document.getElementById("yangui-create-list-button")).data('yangui-for-type');
+  var div_to_append = $(document.getElementById("yangui-create-list-button")).data('yangui-containing-div');
+  var payload = {
     "uuid":div_to_append,
     "base64_data_path": $(document.getElementById("yangui-create-list-button")).data('yangui-for-datapath'),
     "base64_schema_path": $(document.getElementById("yangui-create-list-button")).data('yangui-for-schemapath'),
@@ -315,29 +321,25 @@ function yangui_create_new_list_element_or_leaflist_item(){
   });
 
   console.log("YANGUI: Create New List Element/Leaf List Item Required: " + JSON.stringify(payload.key_values));
-  $.ajax({
-      type: "POST",
-      url: AJAX_BASE_SERVER_URL+"/create-"+list_type,
-      crossDomain: true,
-      data: JSON.stringify(payload),
-      cache: false,
-      success: function(response) {
-          // stop_yangui_spinner();
-          // The response from the AJAX page is simple a bit of javascript instructing the list to be expanded.
-          $(document.getElementById("collapse-"+div_to_append)).append(response);
-          LIBYANG_CHANGES.push({"action": "create_list_xpath", "base64_path": payload.base64_data_path, "value":payload.key_values ,"undo_to_do":"todo - need more info like list elemetn html id"});
-          $("#yanguiNewItemModal").modal('hide');
-          $(document.getElementById("collapse-"+div_to_append)).find("select").each(function(index){
-            $(this).selectpicker('show');
-          });
-          $(document.getElementById("collapse-"+div_to_append)).data('yangui-ever-expanded','true');
+  // The change is sent as the last change, the server applies it itself (see get_session discard_last_change)
+  // so when the server holds our session it is not applied a second time by the next request.
+  var create_change = {"action": "create_list_xpath", "base64_path": payload.base64_data_path, "value":payload.key_values ,"undo_to_do":"todo - need more info like list elemetn html id"};
+  LIBYANG_CHANGES.push(create_change);
+  yangui_post(AJAX_BASE_SERVER_URL+"/create-"+list_type, payload, function(response) {
+    // stop_yangui_spinner();
+    // The response from the AJAX page is simple a bit of javascript instructing the list to be expanded.
+    $(document.getElementById("collapse-"+div_to_append)).append(response);
+    $("#yanguiNewItemModal").modal('hide');
+    $(document.getElementById("collapse-"+div_to_append)).find("select").each(function(index){
+      $(this).selectpicker('show');
+    });
+    $(document.getElementById("collapse-"+div_to_append)).data('yangui-ever-expanded','true');
 
-          enable_validate_save_buttons();
-      },
-      error: function(xhr, options, err) {
-        showMessage("Error", handle_ajax_error(xhr), 'danger');
-        stop_yangui_spinner();
-      }
+    enable_validate_save_buttons();
+  }, function(xhr, options, err) {
+    LIBYANG_CHANGES.splice(LIBYANG_CHANGES.indexOf(create_change), 1);
+    showMessage("Error", handle_ajax_error(xhr), 'danger');
+    stop_yangui_spinner();
   });
 
 }
@@ -431,6 +433,50 @@ function yangui_soft_delete_leaflist_item(b_path){
   enable_validate_save_buttons();
 }
 
+function yangui_post(url, payload, success, error, resend){
+  /*
+  POST the payload along with the data tree (LIBYANG_USER_PAYLOAD + LIBYANG_CHANGES).
+
+  If the server holds a session for us (i.e. responses include the X-Yangui-Session-Store header) then only
+  the changes made since the previous request are sent. If the server no longer holds our session it
+  responds with a 409 and the request is sent again with the full payload and every change.
+  */
+  if(resend){
+    LIBYANG_CHANGES_SENT = 0;
+  }
+  payload.session_id = YANGUI_SESSION_ID;
+  payload.changes_from = YANGUI_SESSION_STORE ? LIBYANG_CHANGES_SENT : 0;
+  payload.changes = LIBYANG_CHANGES.slice(payload.changes_from);
+  if(payload.changes_from){
+    delete payload.payload;
+  }else{
+    payload.payload = LIBYANG_USER_PAYLOAD;
+  }
+  var changes_sent = LIBYANG_CHANGES.length;
+
+  $.ajax({
+      type: "POST",
+      url: url,
+      crossDomain: true,
+      data: JSON.stringify(payload),
+      cache: false,
+      success: function(response, status, xhr) {
+        YANGUI_SESSION_STORE = xhr.getResponseHeader("X-Yangui-Session-Store") == "enabled";
+        LIBYANG_CHANGES_SENT = changes_sent;
+        success(response);
+      },
+      error: function(xhr, options, err) {
+        if(xhr.status == 409 && !resend){
+          console.log("YANGUI: server does not hold our session, sending the full payload");
+          yangui_post(url, payload, success, error, true);
+          return;
+        }
+        LIBYANG_CHANGES_SENT = 0;
+        error(xhr, options, err);
+      }
+  });
+}
+
 function handle_ajax_error(xhr){
   if(xhr.status==0){
     return "Connection to server failed - (0)"
@@ -464,24 +510,16 @@ function yangui_expand_list(b_path, uuid){
       "changes": LIBYANG_CHANGES,
       "ui": ELEMENTS_EXPANDED_BY_USER,
     }
-    $.ajax({
-        type: "POST",
-        url: AJAX_BASE_SERVER_URL+"/expand-list",
-        crossDomain: true,
-        data: JSON.stringify(payload),
-        cache: false,
-        success: function(response) {
-            stop_yangui_spinner();
-            $(document.getElementById("collapse-"+uuid)).append(response);
-            $(document.getElementById("collapse-"+uuid)).find("select").each(function(index){
-              $(this).selectpicker('show');
-            });
-            $(document.getElementById("collapse-"+uuid)).collapse('show');
-        },
-        error: function(xhr, options, err) {
-          showMessage("Error", handle_ajax_error(xhr), 'danger');
-          stop_yangui_spinner();
-        }
+    yangui_post(AJAX_BASE_SERVER_URL+"/expand-list", payload, function(response) {
+      stop_yangui_spinner();
+      $(document.getElementById("collapse-"+uuid)).append(response);
+      $(document.getElementById("collapse-"+uuid)).find("select").each(function(index){
+        $(this).selectpicker('show');
+      });
+      $(document.getElementById("collapse-"+uuid)).collapse('show');
+    }, function(xhr, options, err) {
+      showMessage("Error", handle_ajax_error(xhr), 'danger');
+      stop_yangui_spinner();
     });
   }
 }
@@ -502,28 +540,43 @@ function yangui_list_element_expand(b_path,uuid){
       "payload": LIBYANG_USER_PAYLOAD,
       "changes": LIBYANG_CHANGES
     }
-    $.ajax({
-        type: "POST",
-        url: AJAX_BASE_SERVER_URL+"/expand-list-element",
-        crossDomain: true,
-        data: JSON.stringify(payload),
-        cache: false,
-        success: function(response) {
-            stop_yangui_spinner();
-            $(document.getElementById("collapse-"+uuid)).append(response);
-            $(document.getElementById("collapse-"+uuid)).find("select").each(function(index){
-              $(this).selectpicker('show');
-            });
-
-        },
-        error: function(xhr, options, err) {
-          showMessage("Error", handle_ajax_error(xhr), 'danger');
-          stop_yangui_spinner();
-        }
+    yangui_post(AJAX_BASE_SERVER_URL+"/expand-list-element", payload, function(response) {
+      stop_yangui_spinner();
+      $(document.getElementById("collapse-"+uuid)).append(response);
+      $(document.getElementById("collapse-"+uuid)).find("select").each(function(index){
+        $(this).selectpicker('show');
+      });
+    }, function(xhr, options, err) {
+      showMessage("Error", handle_ajax_error(xhr), 'danger');
+      stop_yangui_spinner();
     });
   }
 }
 
+function yangui_load_placeholder(b_path, element_id, max_depth){
+  /*
+  A node which was not expanded because the page was rendered with a max depth has a placeholder, the server
+  renders the data path again (to max_depth levels) and the node with the same id replaces the one on the page.
+  */
+  start_yangui_spinner('');
+  var payload = {
+    "base64_data_path": b_path,
+    "max_depth": max_depth,
+    "yang_model":LIBYANG_MODEL,
+  }
+  yangui_post(AJAX_BASE_SERVER_URL+"/expand-data-path", payload, function(response) {
+    stop_yangui_spinner();
+    var rendered = $("<div>").append(response).find("[id='"+element_id+"']").first();
+    $(document.getElementById(element_id)).replaceWith(rendered);
+    rendered.find("select").each(function(index){
+      $(this).selectpicker('show');
+    });
+  }, function(xhr, options, err) {
+    showMessage("Error", handle_ajax_error(xhr), 'danger');
+    stop_yangui_spinner();
+  });
+}
+
 function presence_container_expand(b_path, uuid){
   if($(document.getElementById("collapse-"+uuid)).data('yangui-collapse')=='collapse'){
     ELEMENTS_EXPANDED_BY_USER[uuid] = true;
@@ -546,23 +599,15 @@ function presence_container_expand(b_path, uuid){
       "changes": LIBYANG_CHANGES
     }
 
-    $.ajax({
-        type: "POST",
-        url: AJAX_BASE_SERVER_URL+"/create-container",
-        crossDomain: true,
-        data: JSON.stringify(payload),
-        cache: false,
-        success: function(response) {
-            stop_yangui_spinner();
-            $(document.getElementById("collapse-"+uuid)).append(response);
-            $(document.getElementById("collapse-"+uuid)).find("select").each(function(index){
-              $(this).selectpicker('show');
-            });
-        },
-        error: function(xhr, options, err) {
-          showMessage("Error", handle_ajax_error(xhr), 'danger');
-          stop_yangui_spinner();
-        }
+    yangui_post(AJAX_BASE_SERVER_URL+"/create-container", payload, function(response) {
+      stop_yangui_spinner();
+      $(document.getElementById("collapse-"+uuid)).append(response);
+      $(document.getElementById("collapse-"+uuid)).find("select").each(function(index){
+        $(this).selectpicker('show');
+      });
+    }, function(xhr, options, err) {
+      showMessage("Error", handle_ajax_error(xhr), 'danger');
+      stop_yangui_spinner();
     });
 
 
@@ -593,21 +638,13 @@ function yangui_validate_payload(){
   start_yangui_spinner("Validating.....");
 
   payload = {"payload": LIBYANG_USER_PAYLOAD, "changes": LIBYANG_CHANGES}
-  $.ajax({
-      type: "POST",
-      url: AJAX_BASE_SERVER_URL+"/validate",
-      crossDomain: true,
-      data: JSON.stringify(payload),
-      cache: false,
-      success: function(response) {
-        // $(document.getElementById("capture-new-item-list-contents")).innerHTML=response;
-        stop_yangui_spinner();
-        showMessage('<i class="fa fa-2x fa-smile-o" aria-hidden="true"></i>',"payload successfully validated","success", 2500);
-      },
-      error: function(xhr, options, err) {
-        showMessage("Validation Error", handle_ajax_error(xhr), 'danger');
-        stop_yangui_spinner();
-      }
+  yangui_post(AJAX_BASE_SERVER_URL+"/validate", payload, function(response) {
+    // $(document.getElementById("capture-new-item-list-contents")).innerHTML=response;
+    stop_yangui_spinner();
+    showMessage('<i class="fa fa-2x fa-smile-o" aria-hidden="true"></i>',"payload successfully validated","success", 2500);
+  }, function(xhr, options, err) {
+    showMessage("Validation Error", handle_ajax_error(xhr), 'danger');
+    stop_yangui_spinner();
   });
 }
 
@@ -621,22 +658,14 @@ function yangui_debug_payload(){
   start_yangui_spinner("Merging....");
   $(document.getElementById("yangui-content-debug")).val("");
   payload = {"payload": LIBYANG_USER_PAYLOAD, "changes": LIBYANG_CHANGES, 'elements_expanded_by_user': ELEMENTS_EXPANDED_BY_USER }
-  $.ajax({
-      type: "POST",
-      url: AJAX_BASE_SERVER_URL+"/download",
-      crossDomain: true,
-      data: JSON.stringify(payload),
-      cache: false,
-      success: function(response) {
-        $(document.getElementById("yangui-content-debug")).val(JSON.stringify( JSON.parse(response).libyang_json,null,4));
-        $("#yanguiDebugModal").modal('show');
-        stop_yangui_spinner();
-      },
-      error: function(xhr, options, err) {
-        showMessage("Debug Error", handle_ajax_error(xhr), 'danger',  5000);
-        stop_yangui_spinner();
-        $("#yanguiDebugModal").modal('hide');
-      }
+  yangui_post(AJAX_BASE_SERVER_URL+"/download", payload, function(response) {
+    $(document.getElementById("yangui-content-debug")).val(JSON.stringify( JSON.parse(response).libyang_json,null,4));
+    $("#yanguiDebugModal").modal('show');
+    stop_yangui_spinner();
+  }, function(xhr, options, err) {
+    showMessage("Debug Error", handle_ajax_error(xhr), 'danger',  5000);
+    stop_yangui_spinner();
+    $("#yanguiDebugModal").modal('hide');
   });
 
 }
@@ -650,24 +679,16 @@ function yangui_save(export_json_only){
   start_yangui_spinner("Downloading.....");
 
   payload = {"payload": LIBYANG_USER_PAYLOAD, "changes": LIBYANG_CHANGES, 'elements_expanded_by_user': ELEMENTS_EXPANDED_BY_USER }
-  $.ajax({
-      type: "POST",
-      url: AJAX_BASE_SERVER_URL+"/download",
-      crossDomain: true,
-      data: JSON.stringify(payload),
-      cache: false,
-      success: function(response) {
-        stop_yangui_spinner();
-        if(export_json_only){
-          yangui_save_to_filesystem(JSON.parse(response).libyang_json, 'keep-me-safe.json', 'application/json');
-        }else{
-          yangui_save_to_filesystem(JSON.parse(response), 'keep-me-safe.json', 'application/json');
-        }
-      },
-      error: function(xhr, options, err) {
-        showMessage("Validation Error", handle_ajax_error(xhr), 'danger',  5000);
-        stop_yangui_spinner();
-      }
+  yangui_post(AJAX_BASE_SERVER_URL+"/download", payload, function(response) {
+    stop_yangui_spinner();
+    if(export_json_only){
+      yangui_save_to_filesystem(JSON.parse(response).libyang_json, 'keep-me-safe.json', 'application/json');
+    }else{
+      yangui_save_to_filesystem(JSON.parse(response), 'keep-me-safe.json', 'application/json');
+    }
+  }, function(xhr, options, err) {
+    showMessage("Validation Error", handle_ajax_error(xhr), 'danger',  5000);
+    stop_yangui_spinner();
   });
 }
 
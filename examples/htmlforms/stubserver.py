@@ -1,3 +1,4 @@
+import functools
 import glob
 import json
 import os
@@ -9,17 +10,38 @@ import tornado.ioloop
 import tornado.web
 import logging
 
+from yangvoodoo.Common import Utils
 from yangvoodoo.Describer import Yang2HTML
 from examples.htmlforms.HtmlForms import HtmlFormExpander
 from examples.singlepage.SinglePage import HtmlExpander
 from examples.plantuml.Diagram import PlantUMLExpander
+from yangvoodoo.Errors import SessionExpiredError
 from yangvoodoo.Merger import DataTree, DataTreeChanges, base64_tostring
+from yangvoodoo.RenderCache import RenderCache
+from yangvoodoo.SessionStore import SessionStore
+from yangvoodoo.Writers import TornadoWriter
 
 PORT = int(os.getenv("YANGUI_BIND_PORT", "8099"))
 DEFAULT_YANG_DIR = "yang/"
 
 PLANTUML_PATH = os.getenv("PLANTUML_PATH", "/tmp/plantuml.jar")
 
+# Hold live data trees on the server so the UI only sends new changes (0 disables the session store)
+SESSION_STORE_SIZE = int(os.getenv("YANGUI_SESSION_STORE_SIZE", "0"))
+SESSION_STORE_TTL = int(os.getenv("YANGUI_SESSION_STORE_TTL", "1800"))
+SESSION_STORE = SessionStore(SESSION_STORE_SIZE, SESSION_STORE_TTL) if SESSION_STORE_SIZE else None
+
+# Render the top-level nodes of full pages with N worker processes (0 renders in the server process)
+RENDER_WORKERS = int(os.getenv("YANGUI_RENDER_WORKERS", "0"))
+
+# Only expand N levels of the forms page, deeper nodes are loaded when the user asks for them (0 expands everything)
+FORMS_MAX_DEPTH = int(os.getenv("YANGUI_MAX_DEPTH", "0")) or None
+
+# Cache the text/html pages on disk, unchanged yang modules/payloads are then served from the cache
+RENDER_CACHE_DIR = os.getenv("YANGUI_RENDER_CACHE_DIR")
+RENDER_CACHE_SIZE = int(os.getenv("YANGUI_RENDER_CACHE_SIZE", str(256 * 1024 * 1024)))
+RENDER_CACHE = RenderCache(RENDER_CACHE_DIR, RENDER_CACHE_SIZE) if RENDER_CACHE_DIR else None
+
 FORMAT = "%(asctime)-15s - %(name)-20s %(levelname)-12s  %(message)s"
 logging.basicConfig(level=logging.INFO, format=FORMAT)
 log = logging.getLogger("app")
@@ -58,6 +80,100 @@ def get_input_and_set_generator_options(request, generator):
     return input
 
 
+async def stream_to_handler(handler, get_render, *args, **kwargs):
+    """
+    Run render (Expander.process) on a worker thread, the output is written to the client as it is rendered
+    rather than being built in memory and written once rendering has finished.
+
+    get_render is called on the worker thread to create the Expander and return it's render method, libyang
+    contexts are not thread-safe so the Expander must use the worker thread's pooled context (see ContextPool).
+
+    If rendering fails before any output has been sent the client receives a 500 with the error.
+    """
+    loop = tornado.ioloop.IOLoop.current()
+    writer = TornadoWriter(handler, io_loop=loop)
+
+    def render():
+        get_render()(*args, writer=writer, **kwargs)
+
+    try:
+        await loop.run_in_executor(None, render)
+        writer.close()
+    except Exception as err:
+        if writer.chunks_sent:
+            raise
+        log.exception("Unable to render %s", handler.request.uri)
+        handler.set_status(500)
+        handler.write(str(err))
+
+
+def get_renderer(generator):
+    """
+    Return the method to render a text/html page with, using the render cache if it is enabled.
+    """
+    if RENDER_CACHE:
+        return functools.partial(generator.process_cached, RENDER_CACHE)
+    return generator.process
+
+
+def get_text_generator(formatter, yang_model):
+    if formatter.startswith("html"):
+        return HtmlExpander(yang_model, log)
+    generator = Yang2HTML(yang_model, log)
+    generator.options = Yang2HTML.Options()
+    generator.display = Yang2HTML.Display
+    return generator
+
+
+def has_data(session, yang_model):
+    return session.exists(f"/{yang_model}:*")
+
+
+def get_session(yang_model, input, discard_last_change=False):
+    """
+    Return a session with the user's changes applied to their payload.
+
+    When the UI provides a session_id (and the session store is enabled) the live data tree is held on the
+    server and the UI only sends the changes from changes_from onwards.
+
+    discard_last_change leaves out the UI's last change (i.e. the list element being created), the caller
+    applies it to the session itself and then calls change_applied.
+    """
+    if discard_last_change and input["changes"]:
+        input["changes"].pop()
+    changes_to = input.get("changes_from", 0) + len(input["changes"])
+    changes = list(DataTreeChanges.convert(input["changes"], log))
+
+    if "session_id" in input and SESSION_STORE:
+        return SESSION_STORE.get_session(
+            input["session_id"],
+            input.get("payload"),
+            changes,
+            input.get("changes_from", 0),
+            yang_model=yang_model,
+            log=log,
+            changes_to=changes_to,
+        )
+    if input.get("changes_from", 0):
+        raise SessionExpiredError(input.get("session_id"))
+
+    session, _, _ = DataTree.process_data_tree_against_libyang(
+        input["payload"], changes, yang_model=yang_model, log=log, return_payload=False
+    )
+    return session
+
+
+def change_applied(input):
+    """
+    Count the change left out by get_session(discard_last_change=True) once it has been applied to the
+    session, so the UI does not have to send it again.
+    """
+    if "session_id" in input and SESSION_STORE:
+        stored = SESSION_STORE.get(input["session_id"])
+        if stored:
+            stored.applied += 1
+
+
 class AjaxHandler(tornado.web.RequestHandler):
 
     """
@@ -100,12 +216,14 @@ class AjaxHandler(tornado.web.RequestHandler):
         "create-container": "_create_container",
         "expand-list-element": "_expand_list_element",
         "expand-list": "_expand_list",
+        "expand-data-path": "_expand_data_path",
     }
 
     def set_default_headers(self):
         self.set_header("Access-Control-Allow-Origin", "*")
         self.set_header("Access-Control-Allow-Headers", "x-requested-with")
         self.set_header("Access-Control-Allow-Methods", "POST, GET")
+        self.set_header("Access-Control-Expose-Headers", "X-Yangui-Session-Store")
 
     def _create_list_element(self, yang_model, input):
         """
@@ -113,19 +231,17 @@ class AjaxHandler(tornado.web.RequestHandler):
 
         The javascript is yangui_create_new_list_element_or_leaflist_item
         """
-        session, new_payload, _ = DataTree.process_data_tree_against_libyang(
-            input["payload"], list(DataTreeChanges.convert(input["changes"], log)), yang_model=yang_model, log=log
-        )
+        session = get_session(yang_model, input, discard_last_change=True)
         instance = HtmlFormExpander(input["yang_model"], log)
-        if new_payload:
-            instance.load(json.dumps(new_payload), 2, trusted=True)
+        instance.attach_session(session)
+        if has_data(session, yang_model):
             if instance._exists(base64_tostring(input["base64_data_path"]), predicates=input["key_values"]):
                 raise ValueError(
                     f"Cannot create list element because it already exists: {base64_tostring(input['base64_data_path'])} {input['key_values']}"
                 )
-        list_element_predicates = instance.data_tree_add_list_element(
-            base64_tostring(input["base64_data_path"]), input["key_values"]
-        )
+        list_element_predicates = "".join(Utils.encode_xpath_predicate(k, v) for k, v in input["key_values"])
+        session.create(base64_tostring(input["base64_data_path"]) + list_element_predicates)
+        change_applied(input)
         instance.subprocess_list(
             list_data_xpath=base64_tostring(input["base64_data_path"]), predicates=list_element_predicates
         )
@@ -138,14 +254,11 @@ class AjaxHandler(tornado.web.RequestHandler):
 
         The javascript is yangui_create_new_list_element_or_leaflist_item
         """
-        input["changes"].pop()
-        session, new_payload, _ = DataTree.process_data_tree_against_libyang(
-            input["payload"], list(DataTreeChanges.convert(input["changes"], log)), yang_model=yang_model, log=log
-        )
+        session = get_session(yang_model, input, discard_last_change=True)
 
         instance = HtmlFormExpander(input["yang_model"], log)
-        if new_payload:
-            instance.load(json.dumps(new_payload), 2, trusted=True)
+        instance.attach_session(session)
+        if has_data(session, yang_model):
             log.warning(
                 "Should we prevent duplicate leaf-list items - yangvoodoo probably doesn't allow duplicated even if they are permitted by libyang?"
             )
@@ -154,7 +267,8 @@ class AjaxHandler(tornado.web.RequestHandler):
                 raise ValueError(
                     f"Cannot create leaflist item because it already exists: {base64_tostring(input['base64_data_path'])} {input['key_values'][0][1]}"
                 )
-        instance.data_tree_add_list_element(base64_tostring(input["base64_data_path"]), input["key_values"])
+        session.add(base64_tostring(input["base64_data_path"]), input["key_values"][0][1])
+        change_applied(input)
         instance.subprocess_leaflist(
             leaflist_xpath=base64_tostring(input["base64_schema_path"]), value=input["key_values"][0][1]
         )
@@ -162,13 +276,12 @@ class AjaxHandler(tornado.web.RequestHandler):
         self.finish()
 
     def _create_container(self, yang_model, input):
-        session, new_payload, _ = DataTree.process_data_tree_against_libyang(
-            input["payload"], list(DataTreeChanges.convert(input["changes"], log)), yang_model=yang_model, log=log
-        )
+        session = get_session(yang_model, input, discard_last_change=True)
 
         instance = HtmlFormExpander(input["yang_model"], log)
-        instance.load(json.dumps(new_payload), 2, trusted=True)
-        instance.data_tree_create_container(base64_tostring(input["base64_data_path"]))
+        instance.attach_session(session)
+        session.create_container(base64_tostring(input["base64_data_path"]))
+        change_applied(input)
         instance.subprocess_container(container_xpath=base64_tostring(input["base64_data_path"]))
         self.write(instance.dumps())
         self.finish()
@@ -178,29 +291,37 @@ class AjaxHandler(tornado.web.RequestHandler):
         Handle the user expanding a list (not an individual list element).
         This should update the UI with the list-elements (possibly none)
         """
-        session, new_payload, _ = DataTree.process_data_tree_against_libyang(
-            input["payload"], list(DataTreeChanges.convert(input["changes"], log)), yang_model=yang_model, log=log
-        )
+        session = get_session(yang_model, input)
         instance = HtmlFormExpander(input["yang_model"], log)
-        if new_payload:
-            instance.load(json.dumps(new_payload), 2, trusted=True)
+        instance.attach_session(session)
+        if has_data(session, yang_model):
             # by definition a list element must exist to be shown on the web page.
             instance.subprocess_existing_list(list_xpath=base64_tostring(input["base64_data_path"]))
             self.write(instance.dumps())
         self.finish()
 
     def _expand_list_element(self, yang_model, input):
-        session, new_payload, _ = DataTree.process_data_tree_against_libyang(
-            input["payload"], list(DataTreeChanges.convert(input["changes"], log)), yang_model=yang_model, log=log
-        )
+        session = get_session(yang_model, input)
         instance = HtmlFormExpander(input["yang_model"], log)
-        if new_payload:
-            instance.load(json.dumps(new_payload), 2, trusted=True)
+        instance.attach_session(session)
+        if has_data(session, yang_model):
             # by definition a list element must exist to be shown on the web page.
             instance.subprocess_listelement(list_xpath=base64_tostring(input["base64_data_path"]))
             self.write(instance.dumps())
         self.finish()
 
+    def _expand_data_path(self, yang_model, input):
+        """
+        Handle the user loading the contents of a node which was not expanded because of max_depth (see
+        HtmlFormExpander.callback_write_placeholder).
+        """
+        session = get_session(yang_model, input)
+        instance = HtmlFormExpander(input["yang_model"], log)
+        instance.attach_session(session)
+        instance.subprocess_data_path(base64_tostring(input["base64_data_path"]), max_depth=input.get("max_depth"))
+        self.write(instance.dumps())
+        self.finish()
+
     def _get_list_create_page(self, yang_model, input):
         """ """
         instance = HtmlFormExpander(input["yang_model"], log)
@@ -236,7 +357,9 @@ class AjaxHandler(tornado.web.RequestHandler):
         """
         result = {"status": True}
 
-        if "payload" in input:
+        if "session_id" in input:
+            session = get_session(yang_model, input)
+        elif "payload" in input:
             changes = []
             format = "json"
             if "format" in input:
@@ -262,12 +385,10 @@ class AjaxHandler(tornado.web.RequestHandler):
         """
         result = {"status": True}
 
-        session, new_payload, _ = DataTree.process_data_tree_against_libyang(
-            input["payload"], list(DataTreeChanges.convert(input["changes"], log)), yang_model=yang_model, log=log
-        )
+        session = get_session(yang_model, input)
         session.validate()
         result["yangui"] = {"expanded": input["elements_expanded_by_user"]}
-        result["libyang_json"] = new_payload
+        result["libyang_json"] = json.loads(session.dumps(2) or "{}")
 
         self.write(json.dumps(result, indent=4))
         self.finish()
@@ -288,20 +409,28 @@ class AjaxHandler(tornado.web.RequestHandler):
             instance = HtmlFormExpander(yang_model, log)
             if "yangui" in input and "expanded" in input["yangui"]:
                 instance.expanded_elements = input["yangui"]["expanded"]
+            writer = TornadoWriter(self)
             if "libyang_json" in input:
-                instance.process(json.dumps(input["libyang_json"]), 2)
+                instance.process(json.dumps(input["libyang_json"]), 2, writer=writer)
             else:
-                instance.process(json.dumps(input), 2)
-            self.write(instance.dumps())
+                instance.process(json.dumps(input), 2, writer=writer)
+            writer.close()
             self.finish()
         else:
             input = json.loads(self.request.body.decode("utf-8"))
             print(f"AjaxHandler POST: {self.request.uri} {input}")
 
+            if SESSION_STORE:
+                self.set_header("X-Yangui-Session-Store", "enabled")
             if action in self.AJAX_METHODS:
                 try:
                     getattr(self, self.AJAX_METHODS[action])(yang_model, input)
                     return
+                except SessionExpiredError as err:
+                    log.info("Session not held by the session store %s", self.request.uri)
+                    self.set_status(409)
+                    self.finish(str(err))
+                    return
                 except Exception as err:
                     log.exception("Error processing %s", self.request.uri)
                     self.set_status(500)
@@ -386,10 +515,10 @@ class WebHandler(tornado.web.RequestHandler):
         self.set_header("Access-Control-Allow-Headers", "x-requested-with")
         self.set_header("Access-Control-Allow-Methods", "POST, GET, OPTIONS")
 
-    def get(self, yang_model):
-        instance = HtmlFormExpander(yang_model, log)
-        instance.process()
-        self.write(instance.dumps())
+    async def get(self, yang_model):
+        await stream_to_handler(
+            self, lambda: HtmlFormExpander(yang_model, log).process, max_depth=FORMS_MAX_DEPTH, workers=RENDER_WORKERS
+        )
 
 
 class PyangHandler(tornado.web.RequestHandler):
@@ -400,7 +529,7 @@ class PyangHandler(tornado.web.RequestHandler):
 
 
 class TextHandler(tornado.web.RequestHandler):
-    def get(self, formatter, yang_model):
+    async def get(self, formatter, yang_model):
         if formatter.endswith("upload"):
             self.set_header("Content-Type", "text/html")
             self.write(
@@ -420,21 +549,12 @@ class TextHandler(tornado.web.RequestHandler):
                 self.set_header("Content-Type", "text/html")
             else:
                 self.set_header("Content-Type", "text/plain")
-            try:
-                if formatter.startswith("html"):
-                    generator = HtmlExpander(yang_model, log)
-                else:
-                    generator = Yang2HTML(yang_model, log)
-                    generator.options = Yang2HTML.Options()
-                    generator.display = Yang2HTML.Display
-                result = generator.process()
-                self.write(generator.dumps())
-            except Exception as err:
-                self.set_status(500)
-                self.write(str(err))
+            await stream_to_handler(
+                self, lambda: get_renderer(get_text_generator(formatter, yang_model)), workers=RENDER_WORKERS
+            )
         self.finish()
 
-    def post(self, formatter, yang_model):
+    async def post(self, formatter, yang_model):
         if formatter.endswith("upload"):
             self.set_header("Content-Type", "text/html")
             self.write(get_upload(yang_modle, self.request.uri))
@@ -445,19 +565,12 @@ class TextHandler(tornado.web.RequestHandler):
             else:
                 self.set_header("Content-Type", "text/plain")
 
-            try:
-                if formatter.startswith("html"):
-                    generator = HtmlExpander(yang_model, log)
-                else:
-                    generator = Yang2HTML(yang_model, log)
-                    generator.options = Yang2HTML.Options()
-                    generator.display = Yang2HTML.Display
+            def get_render():
+                generator = get_text_generator(formatter, yang_model)
                 payload = get_input_and_set_generator_options(self.request, generator)
-                result = generator.process(payload, 2)
-                self.write(generator.dumps())
-            except Exception as err:
-                self.set_status(500)
-                self.write(str(err))
+                return functools.partial(get_renderer(generator), payload, 2)
+
+            await stream_to_handler(self, get_render, workers=RENDER_WORKERS)
             self.finish()
 
 
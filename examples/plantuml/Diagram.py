@@ -15,6 +15,8 @@ class PlantUMLExpander(Expander):
     ALWAYS_FETCH_LISTELEMENT_CONTENTS = True
     ALWAYS_FETCH_LIST_CONTENTS = True
     AUTO_EXPAND_NON_PRESENCE_CONTAINERS = True
+    # the diagram is built up as a single object and only written in the footer
+    PARALLEL_SAFE = False
 
     """
     Render a schema with data expanded into a PlantUML diagram
@@ -53,7 +55,7 @@ class PlantUMLExpander(Expander):
         self.result.write("@startjson\n")
 
     def callback_write_footer(self, module):
-        self.result.write(json.dumps(self.obj, indent=4))
+        json.dump(self.obj, self.result, indent=4)
         self.result.write("\n@endjson\n")
 
     def callback_open_containing_node(self, node, presence, node_id):
@@ -20,6 +20,11 @@ class HtmlExpander(HtmlFormExpander):
         self.default_collapse_state = "collapse show"
         self.include_as_subpage = False
 
+    def get_worker_state(self):
+        state = super().get_worker_state()
+        state["include_as_subpage"] = self.include_as_subpage
+        return state
+
     def _should_container_be_visible(self, node: libyang.schema.Node, presence: bool) -> bool:
         return True
 
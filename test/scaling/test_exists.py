@@ -0,0 +1,71 @@
+import time
+import unittest
+import yangvoodoo
+import yangvoodoo.stublydal
+
+
+class test_exists(unittest.TestCase):
+
+    LIST_SIZE = 10000
+    LOOKUPS = 2000
+
+    def setUp(self):
+        self.maxDiff = None
+        self.stub = yangvoodoo.stublydal.StubLyDataAbstractionLayer()
+        self.session = yangvoodoo.DataAccess(data_abstraction_layer=self.stub)
+        self.session.connect("integrationtest", yang_location="yang")
+        self.root = self.session.get_node()
+        self.data = self.session.libyang_data
+
+        for i in range(self.LIST_SIZE):
+            self.data.set_xpath(f"/integrationtest:simplelist[simplekey='key{i}']", "")
+            self.data.set_xpath(
+                "/integrationtest:web/bands[name='Idlewild']/gigs"
+                f"[year='2019'][month='{i % 12 + 1}'][day='{i % 28 + 1}'][venue='venue{i}'][location='here']",
+                "",
+            )
+
+    def _time(self, method, xpaths):
+        start_time = time.time()
+        for xpath in xpaths:
+            method(xpath)
+        return time.time() - start_time
+
+    def _materialise(self, xpath):
+        return len(list(self.data.get_xpath(xpath))) != 0
+
+    def _compare(self, description, xpaths):
+        materialise_time = self._time(self._materialise, xpaths)
+        exists_time = self._time(self.session.exists, xpaths)
+        print(
+            f"\n{description} ({len(xpaths)} lookups against {self.LIST_SIZE} elements): "
+            f"list(get_xpath()) {materialise_time:.4f}s, exists() {exists_time:.4f}s"
+        )
+
+    def test_exists_simple_predicates(self):
+        xpaths = [f"/integrationtest:simplelist[simplekey='key{i}']" for i in range(0, self.LIST_SIZE, 5)]
+
+        self.assertTrue(all(self.session.exists(xpath) for xpath in xpaths))
+        self._compare("Single key list element", xpaths)
+
+    def test_exists_deep_predicates(self):
+        xpaths = [
+            "/integrationtest:web/bands[name='Idlewild']/gigs"
+            f"[year='2019'][month='{i % 12 + 1}'][day='{i % 28 + 1}'][venue='venue{i}'][location='here']"
+            for i in range(0, self.LIST_SIZE, 5)
+        ]
+
+        self.assertTrue(all(self.session.exists(xpath) for xpath in xpaths))
+        self._compare("Composite key nested list element", xpaths)
+
+    def test_exists_whole_list(self):
+        xpaths = ["/integrationtest:simplelist"] * 50
+
+        self.assertTrue(self.session.exists(xpaths[0]))
+        self._compare("Whole list", xpaths)
+
+    def test_exists_missing(self):
+        xpaths = [f"/integrationtest:simplelist[simplekey='missing{i}']" for i in range(self.LOOKUPS)]
+
+        self.assertFalse(any(self.session.exists(xpath) for xpath in xpaths))
+        self._compare("Missing list element", xpaths)
@@ -0,0 +1,64 @@
+import gc
+import tracemalloc
+import unittest
+import yangvoodoo
+import yangvoodoo.stublydal
+from yangvoodoo.Common import YangNode
+
+
+class test_memory(unittest.TestCase):
+
+    LIST_SIZE = 100000
+
+    def setUp(self):
+        self.maxDiff = None
+        self.stub = yangvoodoo.stublydal.StubLyDataAbstractionLayer()
+        self.session = yangvoodoo.DataAccess(data_abstraction_layer=self.stub)
+        self.session.connect("integrationtest", yang_location="yang")
+        self.root = self.session.get_node()
+        for i in range(self.LIST_SIZE):
+            self.session.create(
+                f"/integrationtest:simplelist[simplekey='key{i}']",
+                keys=["simplekey"],
+                values=[(f"key{i}", 10)],
+            )
+
+    def test_node_objects_are_slotted(self):
+        list_element = self.root.simplelist.get("key0")
+
+        self.assertFalse(hasattr(list_element, "__dict__"))
+        self.assertFalse(hasattr(list_element._node, "__dict__"))
+
+    def test_bytes_per_element_for_a_list_walk(self):
+        """
+        Walk a large list holding on to every ListElement (and it's YangNode) to measure the
+        memory cost of each element.
+        """
+        gc.collect()
+        tracemalloc.start()
+        (baseline, _) = tracemalloc.get_traced_memory()
+
+        elements = [element for element in self.root.simplelist]
+
+        (current, peak) = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.assertEqual(len(elements), self.LIST_SIZE)
+        bytes_per_element = (current - baseline) / self.LIST_SIZE
+        print(
+            f"\nList walk of {self.LIST_SIZE} elements: {bytes_per_element:.1f} bytes per element "
+            f"(peak {(peak - baseline) / self.LIST_SIZE:.1f} bytes per element)"
+        )
+
+    def test_bytes_per_yangnode(self):
+        gc.collect()
+        tracemalloc.start()
+        (baseline, _) = tracemalloc.get_traced_memory()
+
+        nodes = [YangNode(None, "/schema", f"/data[key='{i}']", "integrationtest") for i in range(self.LIST_SIZE)]
+
+        (current, _) = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.assertEqual(len(nodes), self.LIST_SIZE)
+        print(f"\nYangNode: {(current - baseline) / self.LIST_SIZE:.1f} bytes per object (including data path)")
@@ -1,218 +1,254 @@
+import gc
+import json
+import os
+import time
+import tracemalloc
 import unittest
 import yangvoodoo
-from yangvoodoo.TemplateNinja import TemplateNinja
-import yangvoodoo.stubdal
-import time
+import yangvoodoo.stublydal
+from yangvoodoo import Types
+from yangvoodoo.DiffEngine import DiffIterator
 
 
-class test_nested_list_stuff(unittest.TestCase):
-    def setUp(self):
-        self.maxDiff = None
-        self.stub = yangvoodoo.stubdal.StubDataAbstractionLayer()
-        self.session = yangvoodoo.DataAccess(
-            data_abstraction_layer=self.stub, disable_proxy=True
-        )
-        self.session.connect("integrationtest")
-        self.root = self.session.get_node()
-        self.template_ninja = TemplateNinja()
-
-    def assertExecutionTime(self, start_time, end_time, limit, threshold=0.75):
-        if end_time - start_time > limit:
-            self.fail(
-                "Execution time: %s wanted less than %s"
-                % (end_time - start_time, limit)
-            )
-        if (end_time - start_time) < limit * threshold:
-            self.fail(
-                "TOO GOOD TO BE TRUE.. execution was %s%% of expeciton (actual: %s, execpted: %s)"
-                % (threshold, end_time - start_time, limit)
+"""
+Benchmarks comparing node based and xpath based access against integrationtest.yang (which
+includes the thirty nested lists of scaling.yang).
+
+Each scenario is run at several data sizes (YANGVOODOO_BENCHMARK_SIZES, comma separated) and
+reports operations per second and the peak memory allocated during the scenario. The results
+are written as JSON (YANGVOODOO_BENCHMARK_RESULTS) so they can be compared between releases.
+
+The timing and memory measurements are taken on separate runs (each with a fresh datastore)
+because tracemalloc significantly slows down execution.
+
+There are deliberately no assertions on timings.
+"""
+
+
+class test_scaling(unittest.TestCase):
+
+    SIZES = [int(size) for size in os.environ.get("YANGVOODOO_BENCHMARK_SIZES", "100,1000,10000").split(",")]
+    RESULTS_FILE = os.environ.get(
+        "YANGVOODOO_BENCHMARK_RESULTS", f"benchmark-{yangvoodoo.DataAccess.__version__}.json"
+    )
+    SIMPLELIST = "/integrationtest:simplelist"
+
+    results = []
+
+    @classmethod
+    def tearDownClass(cls):
+        with open(cls.RESULTS_FILE, "w") as fh:
+            json.dump(
+                {"version": yangvoodoo.DataAccess.__version__, "results": cls.results},
+                fh,
+                indent=2,
             )
+        print(f"\nBenchmark results written to {cls.RESULTS_FILE}")
+
+    def _get_session(self):
+        stub = yangvoodoo.stublydal.StubLyDataAbstractionLayer()
+        session = yangvoodoo.DataAccess(data_abstraction_layer=stub)
+        session.connect("integrationtest", yang_location="yang")
+        return (session, session.get_node())
+
+    def _populate_simplelist(self, session, size):
+        for i in range(size):
+            session.create(f"{self.SIMPLELIST}[simplekey='key{i}']")
 
-    def test_add_one_entry_to_thirty_nested_lists(self):
+    def benchmark(self, name, scenario):
         """
-        This test is against sysrepo datastore, when we proxy read/requests from the proxy data store.
+        Run a scenario at each data size.
+
+        The scenario is a function which takes a fresh session, root node and a size, carries out
+        any preparation and then returns a tuple of (number of operations, function to benchmark).
         """
-        start_time = time.time()
-        this_node = self.root.scaling
-        for c in range(30):
-            if c == 2:
-                key = ("created%s" % (c), "extrakey")
-            else:
-                key = "created%s" % (c)
-            this_node = this_node["scale%s" % (c)].create(key)
+        for size in self.SIZES:
+            (session, root) = self._get_session()
+            (operations, func) = scenario(session, root, size)
+            gc.collect()
+            start_time = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start_time
+
+            (session, root) = self._get_session()
+            (operations, func) = scenario(session, root, size)
+            gc.collect()
+            tracemalloc.start()
+            func()
+            (_, peak) = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            result = {
+                "name": name,
+                "size": size,
+                "operations": operations,
+                "seconds": elapsed,
+                "ops_per_sec": operations / elapsed if elapsed else None,
+                "peak_memory_bytes": peak,
+            }
+            self.results.append(result)
+            print(
+                f"\n{name:<32} size {size:>7}: {result['ops_per_sec'] or 0:>12.1f} ops/sec "
+                f"{peak / 1024:>10.1f} KiB peak"
+            )
 
-            if c > 1:
-                this_node = this_node._parent.get(key)
+    def test_set_leaf_node_based(self):
+        def scenario(session, root, size):
+            def func():
+                for i in range(size):
+                    root.simpleleaf = f"value{i}"
 
-        end_time = time.time()
+            return (size, func)
 
-        self.assertExecutionTime(start_time, end_time, 0.005, 0.6)
-        print(".One entry to thirty nested lists", end_time - start_time)
+        self.benchmark("set_leaf_node_based", scenario)
 
-    def test_add_one_hundred_entries_to_thirty_nested_lists(self):
-        """
-        This test is against sysrepo datastore, when we proxy read/requests from the proxy data store.
-        """
-        start_time = time.time()
-        for d in range(100):
-            this_node = self.root.scaling
-            for c in range(30):
-                if c == 2:
-                    key = ("created%sx%s" % (c, d), "extrakey")
-                else:
-                    key = "created%sx%s" % (c, d)
-                this_node = this_node["scale%s" % (c)].create(key)
-                if c > 1:
-                    this_node = this_node._parent.get(key)
-
-        end_time = time.time()
-
-        self.assertExecutionTime(start_time, end_time, 0.45, 0.6)
-        print("One hundred entries to thirty nested lists", end_time - start_time)
-
-    #
-    #     def test_write_xml(self):
-    #         """
-    #         This test is against sysrepo datastore, when we proxy read/requests from the proxy data store.
-    #         """
-    # #        self.root.morecomplex.leaf2 = True
-    #         self.root.morecomplex.leaf4 = "A"
-    #         self.root.morecomplex.inner.leaf5 = "this was mandatory"
-    #         self.root.morecomplex.inner.siblings.a = "a"
-    #         self.root.morecomplex.inner.siblings.b = "b"
-    #         x = self.root.container_and_lists.multi_key_list.create("a", "b")
-    #         x.inner.C = "c"
-    #         x = self.root.container_and_lists.multi_key_list.create("A", "B")
-    #         x.inner.C = "C"
-    #
-    #         start_time = time.time()
-    #         for d in range(1):
-    #             this_node = self.root.scaling
-    #             for c in range(4):
-    #                 if c == 2:
-    #                     key = ('created%sx%s' % (c, d), 'extrakey')
-    #                 else:
-    #                     key = ('created%sx%s' % (c, d))
-    #                 this_node = this_node['scale%s' % (c)].create(key)
-    #                 if c > 1:
-    #                     this_node = this_node._parent.get(key)
-    #                 if c == 3:
-    #                     for e in range(2):
-    #                         for f in ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K', 'L', 'M', 'N', 'O', 'P', 'Q', 'R', 'S', 'T', 'U', 'V', 'W', 'X', 'Y', 'Z']:
-    #                             this_node['alpha%s' % (e)].__setattr__(f, 'sdf')
-    #
-    #         # Dump to XPATH
-    #         xpaths = self.session.dump_xpaths()
-    #
-    #         start_time = time.time()
-    #         xmlstr = self.template_ninja.to_xmlstr(xpaths)
-    #         end_time = time.time()
-    #         o = open('/tmp/monster.xml', 'w')
-    #         o.write(xmlstr)
-    #         o.close()
-
-    def test_add_one_hundred_entries_to_thirty_nested_lists_with_alpha(self):
-        """
-        This test is against sysrepo datastore, when we proxy read/requests from the proxy data store.
-        """
+    def test_set_leaf_xpath_based(self):
+        def scenario(session, root, size):
+            def func():
+                for i in range(size):
+                    session.set("/integrationtest:simpleleaf", f"value{i}", Types.DATA_ABSTRACTION_MAPPING["STRING"])
 
-        start_time = time.time()
-        for d in range(100):
-            this_node = self.root.scaling
-            for c in range(30):
-                if c == 2:
-                    key = ("created%sx%s" % (c, d), "extrakey")
-                else:
-                    key = "created%sx%s" % (c, d)
-                this_node = this_node["scale%s" % (c)].create(key)
-                if c > 1:
-                    this_node = this_node._parent.get(key)
-                if c == 29:
-                    for e in range(5):
-                        for f in [
-                            "A",
-                            "B",
-                            "C",
-                            "D",
-                            "E",
-                            "F",
-                            "G",
-                            "H",
-                            "I",
-                            "J",
-                            "K",
-                            "L",
-                            "M",
-                            "N",
-                            "O",
-                            "P",
-                            "Q",
-                            "R",
-                            "S",
-                            "T",
-                            "U",
-                            "V",
-                            "W",
-                            "X",
-                            "Y",
-                            "Z",
-                        ]:
-                            this_node["alpha%s" % (e)].__setattr__(f, "sdf")
-
-        end_time = time.time()
-        self.assertExecutionTime(start_time, end_time, 1.3, 0.6)
-        print(
-            "Add nested leaves with deep data set (16100 items)", end_time - start_time
-        )
-
-        # Template Stuff
-        start_time = time.time()
-        xpaths = self.session.dump_xpaths()
-        end_time = time.time()
-        self.assertExecutionTime(start_time, end_time, 0.009, 0.6)
-        print(".Dump xpaths with 16100 items)", end_time - start_time)
-
-        # Dump to XPATH
-        start_time = time.time()
-        xmlstr = self.template_ninja.to_xmlstr(xpaths)
-        end_time = time.time()
-        self.assertExecutionTime(start_time, end_time, 1.8, 0.6)
-        print(".Dump XPATHS to template (16100)", end_time - start_time)
-
-        self.stub.items = {}
-        # Dump to XPATH
-        start_time = time.time()
-        self.template_ninja.from_xmlstr(self.root, xmlstr)
-        end_time = time.time()
-        self.assertExecutionTime(start_time, end_time, 0.8, 0.6)
-        print(".Load XPATHS from xml (16100)", end_time - start_time)
-
-    def test_add_three_thousand_entries_to_one_list(self):
-        """
-        This test is against sysrepo datastore, when we proxy read/requests from the proxy data store.
-        """
-        start_time = time.time()
-        for d in range(3000):
-            this_node = self.root.scaling
-            for c in range(1):
-                key = "created%sx%s" % (c, d)
-                this_node = this_node["scale%s" % (c)].create(key)
-                if c > 1:
-                    this_node = this_node._parent.get(key)
-
-        end_time = time.time()
-        self.assertExecutionTime(start_time, end_time, 0.25, 0.6)
-        print("Add three thousand entries to one list", end_time - start_time)
-
-    def test_change_leaf_3000_times(self):
-        """
-        This test is against sysrepo datastore, when we proxy read/requests from the proxy data store.
-        """
-        start_time = time.time()
-        for d in range(3000):
-            self.root.simpleleaf = "X" + str(d)
-            _ = self.root.simpleleaf
-
-        end_time = time.time()
-        self.assertExecutionTime(start_time, end_time, 0.08, 0.6)
-        print("Simple leaf changed 3000 times", end_time - start_time)
+            return (size, func)
+
+        self.benchmark("set_leaf_xpath_based", scenario)
+
+    def test_get_leaf_node_based(self):
+        def scenario(session, root, size):
+            root.simpleleaf = "value"
+
+            def func():
+                for _ in range(size):
+                    root.simpleleaf
+
+            return (size, func)
+
+        self.benchmark("get_leaf_node_based", scenario)
+
+    def test_get_leaf_xpath_based(self):
+        def scenario(session, root, size):
+            root.simpleleaf = "value"
+
+            def func():
+                for _ in range(size):
+                    session.get("/integrationtest:simpleleaf")
+
+            return (size, func)
+
+        self.benchmark("get_leaf_xpath_based", scenario)
+
+    def test_list_create_node_based(self):
+        def scenario(session, root, size):
+            def func():
+                for i in range(size):
+                    root.simplelist.create(f"key{i}")
+
+            return (size, func)
+
+        self.benchmark("list_create_node_based", scenario)
+
+    def test_list_create_xpath_based(self):
+        def scenario(session, root, size):
+            return (size, lambda: self._populate_simplelist(session, size))
+
+        self.benchmark("list_create_xpath_based", scenario)
+
+    def test_nested_list_create_node_based(self):
+        def scenario(session, root, size):
+            def func():
+                for i in range(size):
+                    scale1 = root.scaling.scale0.create(f"key{i}").scale1.create("a")
+                    scale1.non_key1 = "b"
+
+            return (size, func)
+
+        self.benchmark("nested_list_create_node_based", scenario)
+
+    def test_list_iteration_unsorted(self):
+        def scenario(session, root, size):
+            self._populate_simplelist(session, size)
+
+            def func():
+                for list_element in root.simplelist:
+                    pass
+
+            return (size, func)
+
+        self.benchmark("list_iteration_unsorted", scenario)
+
+    def test_list_iteration_sorted(self):
+        def scenario(session, root, size):
+            self._populate_simplelist(session, size)
+
+            def func():
+                for list_element in root.simplelist._xpath_sorted:
+                    pass
+
+            return (size, func)
+
+        self.benchmark("list_iteration_sorted", scenario)
+
+    def test_list_len(self):
+        def scenario(session, root, size):
+            self._populate_simplelist(session, size)
+
+            def func():
+                for _ in range(100):
+                    len(root.simplelist)
+
+            return (100, func)
+
+        self.benchmark("list_len", scenario)
+
+    def test_list_contains(self):
+        def scenario(session, root, size):
+            self._populate_simplelist(session, size)
+
+            def func():
+                for i in range(size):
+                    f"key{i}" in root.simplelist
+
+            return (size, func)
+
+        self.benchmark("list_contains", scenario)
+
+    def test_dumps_and_loads(self):
+        for (format_name, format) in Types.FORMAT.items():
+
+            def dumps_scenario(session, root, size):
+                self._populate_simplelist(session, size)
+                return (1, lambda: session.dumps(format))
+
+            def loads_scenario(session, root, size):
+                self._populate_simplelist(session, size)
+                payload = session.dumps(format)
+                (session, root) = self._get_session()
+                return (1, lambda: session.loads(payload, format, trusted=True))
+
+            self.benchmark(f"dumps_{format_name.lower()}", dumps_scenario)
+            self.benchmark(f"loads_{format_name.lower()}", loads_scenario)
+
+    def test_merges(self):
+        def scenario(session, root, size):
+            (other_session, _) = self._get_session()
+            self._populate_simplelist(other_session, size)
+            payload = other_session.dumps(Types.FORMAT["JSON"])
+            for i in range(0, size, 2):
+                session.create(f"{self.SIMPLELIST}[simplekey='key{i}']")
+
+            return (1, lambda: session.merges(payload, Types.FORMAT["JSON"]))
+
+        self.benchmark("merges_json", scenario)
+
+    def test_diff_iterator(self):
+        def scenario(session, root, size):
+            self._populate_simplelist(session, size)
+            before = session.dump_xpaths()
+            for i in range(0, size, 3):
+                session.uncreate(f"{self.SIMPLELIST}[simplekey='key{i}']")
+            for i in range(size, size + size // 3):
+                session.create(f"{self.SIMPLELIST}[simplekey='key{i}']")
+            after = session.dump_xpaths()
+
+            return (1, lambda: list(DiffIterator(before, after).all()))
+
+        self.benchmark("diff_iterator", scenario)
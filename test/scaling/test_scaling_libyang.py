@@ -12,17 +12,14 @@ class test_nested_list_stuff(unittest.TestCase):
         self.session.connect("integrationtest")
         self.root = self.session.get_node()
 
-    def assertExecutionTime(self, start_time, end_time, limit, threshold=0.75):
+    def assertExecutionTime(self, start_time, end_time, limit, threshold=None):
+        # threshold is no longer used, faster than expected is not a failure (see test_scaling.py
+        # for the benchmarks which should be compared between releases).
         if end_time - start_time > limit:
             self.fail(
                 "Execution time: %s wanted less than %s"
                 % (end_time - start_time, limit)
             )
-        if (end_time - start_time) < limit * threshold:
-            self.fail(
-                "TOO GOOD TO BE TRUE.. execution was %s%% of expeciton (actual: %s, execpted: %s)"
-                % (threshold, end_time - start_time, limit)
-            )
 
     def test_add_one_entry_to_thirty_nested_lists(self):
         """
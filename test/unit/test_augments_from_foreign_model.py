@@ -275,3 +275,20 @@ class test_libyang_stub(unittest.TestCase):
                 "foreign:innercontainer/foreign:mutuallyexclusive/foreign:first/foreign:one"
             ),
         )
+
+    def test_apply_batch_with_augmented_leaves(self):
+        foreign_augments = "/integrationtest:augments/foreign-augments"
+        rows = [
+            ("set", f"{foreign_augments}/foreign:simpleleaf", "A"),
+            ("set", f"{foreign_augments}/foreign:simplelist[key1='a'][key2='b']/nonkey", "c"),
+            ("set", f"{foreign_augments}/foreign:hyphenated-leaf", "B"),
+        ]
+
+        # Act
+        errors = self.subject.apply_batch(rows)
+
+        # Assert
+        self.assertEqual(errors, [])
+        self.assertEqual(self.root.augments.foreign_augments.simpleleaf, "A")
+        self.assertEqual(self.root.augments.foreign_augments.hyphenated_leaf, "B")
+        self.assertEqual(self.root.augments.foreign_augments.simplelist["a", "b"].nonkey, "c")
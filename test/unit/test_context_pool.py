@@ -0,0 +1,96 @@
+import threading
+import unittest
+from mock import patch
+import yangvoodoo
+from yangvoodoo.ContextPool import ContextPool
+from yangvoodoo.SchemaData import Expander
+
+
+class test_context_pool(unittest.TestCase):
+    def setUp(self):
+        self.subject = ContextPool()
+
+    def test_contexts_are_shared(self):
+        # Act
+        ctx = self.subject.get("yang", ["integrationtest"])
+
+        # Assert
+        self.assertTrue(self.subject.get("yang", ["integrationtest"]) is ctx)
+        self.assertTrue(self.subject.get("yang/", ["integrationtest", "integrationtest"]) is ctx)
+        self.assertFalse(self.subject.get("yang", ["integrationtest", "foreign"]) is ctx)
+        self.assertEqual(len(self.subject), 2)
+
+    def test_each_thread_has_its_own_context(self):
+        ctx = self.subject.get("yang", ["integrationtest"])
+        results = []
+
+        # Act
+        thread = threading.Thread(target=lambda: results.append(self.subject.get("yang", ["integrationtest"])))
+        thread.start()
+        thread.join()
+
+        # Assert
+        self.assertFalse(results[0] is ctx)
+        self.assertEqual(len(self.subject), 2)
+
+        # Act
+        self.subject.get("yang", ["integrationtest", "foreign"])
+
+        # Assert - the context of the finished thread is released
+        self.assertEqual(len(self.subject), 2)
+        self.assertTrue(self.subject.get("yang", ["integrationtest"]) is ctx)
+
+    def test_sessions_share_a_pooled_context(self):
+        ctx = self.subject.get("yang", ["integrationtest"])
+        session_a = yangvoodoo.DataAccess()
+        session_a.connect("integrationtest", yang_location="yang", yang_ctx=ctx)
+        session_b = yangvoodoo.DataAccess()
+        session_b.connect("integrationtest", yang_location="yang", yang_ctx=ctx)
+
+        # Act
+        session_a.get_node().simpleleaf = "a"
+
+        # Assert
+        self.assertEqual(session_a.get_node().simpleleaf, "a")
+        self.assertEqual(session_b.get_node().simpleleaf, None)
+
+    def test_invalidate(self):
+        ctx = self.subject.get("yang", ["integrationtest"])
+
+        # Act
+        self.subject.invalidate("yang")
+
+        # Assert
+        self.assertEqual(len(self.subject), 0)
+        self.assertFalse(self.subject.get("yang", ["integrationtest"]) is ctx)
+
+    def test_yang_files_changed_on_disk(self):
+        now = [1000]
+        self.subject = ContextPool(mtime_interval=1, clock=lambda: now[0])
+        with patch.object(ContextPool, "get_yang_mtime", return_value=1):
+            ctx = self.subject.get("yang", ["integrationtest"])
+            self.assertTrue(self.subject.get("yang", ["integrationtest"]) is ctx)
+
+        # Act
+        with patch.object(ContextPool, "get_yang_mtime", return_value=2) as get_yang_mtime:
+            result = self.subject.get("yang", ["integrationtest"])
+
+        # Assert - the yang files are only checked once a second
+        self.assertTrue(result is ctx)
+        get_yang_mtime.assert_not_called()
+
+        # Act
+        now[0] += 1
+        with patch.object(ContextPool, "get_yang_mtime", return_value=2):
+            result = self.subject.get("yang", ["integrationtest"])
+
+        # Assert
+        self.assertFalse(result is ctx)
+
+    def test_expanders_share_a_context(self):
+        expander_a = Expander("integrationtest", None)
+        expander_b = Expander("integrationtest", None)
+
+        # Assert
+        self.assertTrue(expander_a.ctx is expander_b.ctx)
+        self.assertFalse(expander_a.data_ctx is expander_b.data_ctx)
@@ -780,3 +780,112 @@ class test_diff_engine(unittest.TestCase):
         self.assertEqual(list(differ.all(start_filter="/sdfsdf")), expected_results)
 
     #
+
+    def test_data_tree_diff_engine(self):
+        self.root_a.diff.deletes.a_list.create("Avril Lavigne")
+        self.root_a.diff.modifies.a_list.create("Lissie").listnonkey = "earworm"
+        self.root_a.diff.deletes.a_leaf = "a"
+        self.root_a.diff.modifies.a_leaf = "original value"
+        self.root_a.simpleleaf = "A"
+
+        self.root_b.diff.modifies.a_leaf = "new value"
+        self.root_b.diff.adds.a_list.create("Ghouls")
+        self.root_b.diff.modifies.a_list.create("Lissie").listnonkey = "earworm!"
+        self.root_b.simpleleaf = "B"
+
+        # Act
+        differ = yangvoodoo.DiffEngine.DataTreeDiffIterator(
+            self.session_a, self.session_b, start_filter="/integrationtest:diff"
+        )
+
+        # Assert
+        expected_modifies = [
+            (
+                "/integrationtest:diff/modifies/a-list[listkey='Lissie']/listnonkey",
+                "earworm",
+                "earworm!",
+                2,
+            ),
+            ("/integrationtest:diff/modifies/a-leaf", "original value", "new value", 2),
+        ]
+        expected_removes = [
+            ("/integrationtest:diff/deletes", "", None, 3),
+            (
+                "/integrationtest:diff/deletes/a-list[listkey='Avril Lavigne']/listkey",
+                "Avril Lavigne",
+                None,
+                3,
+            ),
+            ("/integrationtest:diff/deletes/a-leaf", "a", None, 3),
+        ]
+        expected_adds = [
+            ("/integrationtest:diff/adds", None, "", 1),
+            (
+                "/integrationtest:diff/adds/a-list[listkey='Ghouls']/listkey",
+                None,
+                "Ghouls",
+                1,
+            ),
+        ]
+        self.assertCountEqual(list(differ.modified()), expected_modifies)
+        self.assertEqual(list(differ.remove()), expected_removes)
+        self.assertEqual(list(differ.add()), expected_adds)
+        self.assertCountEqual(list(differ.all()), expected_modifies + expected_removes + expected_adds)
+        self.assertEqual(
+            list(differ.remove_modify_then_add()),
+            list(differ.remove()) + list(differ.modified()) + list(differ.add()),
+        )
+
+    def test_data_tree_diff_engine_with_nodes_and_filters(self):
+        self.root_a.simpleleaf = "a"
+        self.root_a.morecomplex.leaflists.simple.create("a")
+        self.root_a.morecomplex.leaflists.simple.create("b")
+        self.root_b.simpleleaf = "b"
+        self.root_b.morecomplex.leaflists.simple.create("b")
+        self.root_b.morecomplex.leaflists.simple.create("C")
+
+        # Act
+        differ = yangvoodoo.DiffEngine.DataTreeDiffIterator(
+            self.root_a, self.root_b, start_filter="/integrationtest:morecomplex"
+        )
+
+        # Assert
+        expected_results = [
+            ("/integrationtest:morecomplex/leaflists/simple[.='a']", "a", None, 3),
+            ("/integrationtest:morecomplex/leaflists/simple[.='C']", None, "C", 1),
+        ]
+        self.assertEqual(list(differ.all()), expected_results)
+        self.assertEqual(list(differ.all(end_filter="[.='C']")), [expected_results[1]])
+        self.assertEqual(list(differ.all(start_filter="/integrationtest:simpleleaf")), [])
+
+    def test_data_tree_diff_engine_identical(self):
+        self.root_a.bronze.silver.gold.platinum.deep = "c"
+        self.root_b.bronze.silver.gold.platinum.deep = "c"
+
+        # Act
+        differ = yangvoodoo.DiffEngine.DataTreeDiffIterator(self.root_a, self.root_b)
+
+        # Assert
+        self.assertEqual(list(differ.all()), [])
+
+    def test_data_tree_diff_engine_skips_identical_subtrees(self):
+        self.root_a.bronze.silver.gold.platinum.deep = "c"
+        self.root_b.bronze.silver.gold.platinum.deep = "c"
+        self.root_a.simpleleaf = "a"
+        self.root_b.simpleleaf = "b"
+        differ = yangvoodoo.DiffEngine.DataTreeDiffIterator(self.root_a, self.root_b)
+        visited = []
+        get_children = differ._get_children
+
+        def _get_children(dal, path):
+            visited.append(path)
+            return get_children(dal, path)
+
+        differ._get_children = _get_children
+
+        # Act
+        result = list(differ.all())
+
+        # Assert
+        self.assertEqual(result, [("/integrationtest:simpleleaf", "a", "b", 2)])
+        self.assertFalse("/integrationtest:bronze" in visited)
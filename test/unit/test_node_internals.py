@@ -4,6 +4,7 @@ import yangvoodoo
 from yangvoodoo.Common import IteratorToRaiseAnException, Utils
 from yangvoodoo import Errors
 from yangvoodoo.Cache import Cache
+from yangvoodoo.SchemaIndex import SchemaIndex, SchemaIndexEntry
 from jinja2 import Template
 from mock import Mock, patch
 
@@ -22,7 +23,8 @@ class test_node_based_access(unittest.TestCase):
         node.real_schema_path = "/integrationtest:list/integrationtest:container2"
         context = Mock()
         context.schemacache = Cache()
-        context.schemacache.add_entry(
+        context.datacache = Cache()
+        context.datacache.add_entry(
             "!/integrationtest:container/continerlist![key1='val1'][key2='val2']!/integrationtest:list/integrationtest:container2",
             "the-magic-cached-marker",
         )
@@ -33,23 +35,15 @@ class test_node_based_access(unittest.TestCase):
 
         self.assertEqual(result, "the-magic-cached-marker")
 
-    @patch("yangvoodoo.Common.Utils.get_original_name")
-    def test_get_yang_node_non_existing_node_with_other_module(
-        self, mockGetOriginalName
-    ):
+    def test_get_yang_node_non_existing_node_with_other_module(self):
         # Build
-        mockGetOriginalName.return_value = "DSFDF"
-
         node = Mock()
         node.real_data_path = "/integrationtest:container/continer"
         node.real_schema_path = "/integrationtest:list/integrationtest:container2"
         context = Mock()
-        context.schemactx = Mock()
-
-        context.schemactx.find_path.return_value = IteratorToRaiseAnException(
-            [], error_at=0, error_type=libyang.util.LibyangError
-        )
+        context.schemaindex = SchemaIndex()
         context.schemacache = Cache()
+        context.datacache = Cache()
         context.top_module = "integrationtest"
         context.other_yang_modules = ["othermodule"]
 
@@ -70,21 +64,15 @@ class test_node_based_access(unittest.TestCase):
 
         self.assertEqual(str(error_context.exception), expected_msg)
 
-    @patch("yangvoodoo.Common.Utils.get_original_name")
-    def test_get_yang_node_non_existing_node(self, mockGetOriginalName):
+    def test_get_yang_node_non_existing_node(self):
         # Build
-        mockGetOriginalName.return_value = "DSFDF"
-
         node = Mock()
         node.real_data_path = "/integrationtest:container/continer"
         node.real_schema_path = "/integrationtest:list/integrationtest:container2"
         context = Mock()
-        context.schemactx = Mock()
-
-        context.schemactx.find_path.return_value = IteratorToRaiseAnException(
-            [], error_at=0, error_type=libyang.util.LibyangError
-        )
+        context.schemaindex = SchemaIndex()
         context.schemacache = Cache()
+        context.datacache = Cache()
         context.top_module = "integrationtest"
         context.other_yang_modules = []
 
@@ -104,11 +92,8 @@ class test_node_based_access(unittest.TestCase):
 
         self.assertEqual(str(error_context.exception), expected_msg)
 
-    @patch("yangvoodoo.Common.Utils.get_original_name")
-    def test_get_yang_node_existing_node(self, mockGetOriginalName):
+    def test_get_yang_node_existing_node(self):
         # Build
-        mockGetOriginalName.return_value = "list-with-a-hyphen"
-
         node = Mock()
         node.real_data_path = "/integrationtest:container/continer"
         node.real_schema_path = "/integrationtest:list/integrationtest:container2"
@@ -118,15 +103,27 @@ class test_node_based_access(unittest.TestCase):
 
         node_schema = Mock()
         node_schema.nodetype.return_value = 4  # Leaf
-        context.schemactx.find_path.return_value = IteratorToRaiseAnException(
-            [node_schema], error_at=-1
+        context.schemaindex = SchemaIndex()
+        context.schemaindex.add(
+            "/integrationtest:list/integrationtest:container2",
+            SchemaIndexEntry(
+                "list-with-a-hyphen",
+                "integrationtest",
+                node_schema,
+                "/integrationtest:list/integrationtest:container2/integrationtest:list-with-a-hyphen",
+            ),
         )
         context.schemacache = Cache()
+        context.datacache = Cache()
         context.top_module = "integrationtest"
 
         # Act
         result = Utils.get_yangnode(
-            node, context, "list", ["key1", "key2"], [("val1", 10), ("val2", 10)]
+            node,
+            context,
+            "list_with_a_hyphen",
+            ["key1", "key2"],
+            [("val1", 10), ("val2", 10)],
         )
         self.assertTrue(isinstance(result, yangvoodoo.Common.YangNode))
         self.assertEqual(result.libyang_node, node_schema)
@@ -139,11 +136,61 @@ class test_node_based_access(unittest.TestCase):
             "/integrationtest:list/integrationtest:container2/integrationtest:list-with-a-hyphen",
         )
         self.assertEqual(
-            list(context.schemacache.items.keys()),
+            list(context.datacache.items.keys()),
             [
-                "!/integrationtest:container/continerlist![key1='val1'][key2='val2']!/integrationtest:list/integrationtest:container2"
+                "!/integrationtest:container/continerlist_with_a_hyphen![key1='val1'][key2='val2']!/integrationtest:list/integrationtest:container2"
             ],
         )
+        context.schemactx.find_path.assert_not_called()
+        self.assertEqual(
+            list(context.schemacache.items.keys()),
+            ["/integrationtest:list/integrationtest:container2!list_with_a_hyphen"],
+        )
+
+    def test_get_yang_node_shares_schema_resolution_between_list_elements(self):
+        context = self.root._context
+        web = Utils.get_yangnode(self.root._node, context, "web")
+        context.schemacache.reset_stats()
+
+        # Act
+        band_a = Utils.get_yangnode(web, context, "bands", predicates="[name='A']")
+        band_b = Utils.get_yangnode(web, context, "bands", predicates="[name='B']")
+
+        # Assert
+        self.assertEqual(band_a.real_data_path, "/integrationtest:web/bands[name='A']")
+        self.assertEqual(band_b.real_data_path, "/integrationtest:web/bands[name='B']")
+        self.assertEqual(band_a.libyang_node, band_b.libyang_node)
+        self.assertEqual(context.schemacache.stats()["misses"], 1)
+        self.assertEqual(context.schemacache.stats()["hits"], 1)
+
+    def test_yang_node_forwards_to_libyang_node(self):
+        libyang_node = Mock()
+        libyang_node.nodetype.return_value = 16
+        libyang_node.when_condition.return_value = "../a = 'b'"
+        subject = yangvoodoo.Common.YangNode(libyang_node, "/schema", "/data", "integrationtest")
+
+        # Assert
+        self.assertEqual(subject.nodetype(), 16)
+        self.assertEqual(subject.when_condition(), "../a = 'b'")
+        self.assertEqual(subject.module, "integrationtest")
+        self.assertFalse(hasattr(subject, "__dict__"))
+
+    def test_schema_index_is_built_on_connect(self):
+        index = self.root._context.schemaindex
+
+        # Assert
+        entry = index.get_child("", "container_and_lists")
+        self.assertEqual(entry.name, "container-and-lists")
+        self.assertEqual(entry.module, "integrationtest")
+        self.assertEqual(entry.schema_path, "/integrationtest:container-and-lists")
+        self.assertEqual(entry, index.get_child("", "container-and-lists"))
+        self.assertEqual(entry, index.get("/integrationtest:container-and-lists"))
+
+        entry = index.get_child("/integrationtest:morecomplex/integrationtest:inner", "leaf5")
+        self.assertEqual(entry.nodetype, yangvoodoo.Types.LIBYANG_NODETYPE["LEAF"])
+        self.assertEqual(entry.leaf_type, yangvoodoo.Types.DATA_ABSTRACTION_MAPPING["STRING"])
+
+        self.assertEqual(index.get_child("", "does_not_exist"), None)
 
     def test_get_yang_type_simple_base_case(self):
         # Very simple leaf with base string type
@@ -175,31 +222,27 @@ class test_node_based_access(unittest.TestCase):
             result, yangvoodoo.Types.DATA_ABSTRACTION_MAPPING["BOOLEAN"], None
         )
 
-        # More complex case where we have a leafref to a string
-        with self.assertRaises(NotImplementedError) as context:
-            yangnode = next(
-                self.schemactx.find_path(
-                    "/integrationtest:morecomplex/integrationtest:inner/integrationtest:leaf5555"
-                )
+        # Union containing a leafref (followed to the type it references)
+        yangnode = next(
+            self.schemactx.find_path(
+                "/integrationtest:morecomplex/integrationtest:inner/integrationtest:leaf5555"
             )
-            yangvoodoo.Common.Utils.get_yang_type(yangnode.type())
-        self.assertEqual(
-            str(context.exception),
-            "Union containing leafrefs not supported (see README.md)",
         )
+        result = yangvoodoo.Common.Utils.get_yang_type(yangnode.type(), "abc")
+        self.assertEqual(result, yangvoodoo.Types.DATA_ABSTRACTION_MAPPING["STRING"])
 
-        # More complex case where we have a leafref to a complex set of unions and we want to get an ENUm out
-        with self.assertRaises(NotImplementedError) as context:
-            yangnode = next(
-                self.schemactx.find_path(
-                    "/integrationtest:morecomplex/integrationtest:inner/integrationtest:leaf-union-of-union"
-                )
+        # Union containing a union (flattened)
+        yangnode = next(
+            self.schemactx.find_path(
+                "/integrationtest:morecomplex/integrationtest:inner/integrationtest:leaf-union-of-union"
             )
-            yangvoodoo.Common.Utils.get_yang_type(yangnode.type())
-        self.assertEqual(
-            str(context.exception),
-            "Union containing unions not supported (see README.md)",
         )
+        result = yangvoodoo.Common.Utils.get_yang_type(yangnode.type(), "abc")
+        self.assertEqual(result, yangvoodoo.Types.DATA_ABSTRACTION_MAPPING["STRING"])
+        result = yangvoodoo.Common.Utils.get_yang_type(yangnode.type(), 3.44)
+        self.assertEqual(result, yangvoodoo.Types.DATA_ABSTRACTION_MAPPING["DECIMAL64"])
+        result = yangvoodoo.Common.Utils.get_yang_type(yangnode.type(), 7000)
+        self.assertEqual(result, yangvoodoo.Types.DATA_ABSTRACTION_MAPPING["UINT32"])
 
         # More complex case where we have a leafref to a string
         yangnode = next(
@@ -315,6 +358,26 @@ class test_node_based_access(unittest.TestCase):
                 yangnode.type(), "not-valid", "/xpath"
             )
 
+    def test_type_descriptor_is_cached_on_the_schema_index(self):
+        context = self.root._context
+        entry = context.schemaindex.get("/integrationtest:morecomplex/integrationtest:inner/integrationtest:leaf9")
+
+        # Act
+        type_descriptor = entry.type_descriptor
+
+        # Assert
+        self.assertTrue(type_descriptor is entry.type_descriptor)
+        self.assertTrue(type_descriptor.is_union)
+        self.assertTrue("A" in type_descriptor.enums)
+        self.assertEqual(type_descriptor.get_yang_type("A"), yangvoodoo.Types.DATA_ABSTRACTION_MAPPING["ENUM"])
+        self.assertEqual(type_descriptor.get_yang_type("45"), yangvoodoo.Types.DATA_ABSTRACTION_MAPPING["UINT8"])
+        self.assertEqual(
+            yangvoodoo.Common.Utils.get_yang_type_from_path(
+                context, "/integrationtest:morecomplex/integrationtest:inner", "A", "leaf9"
+            ),
+            yangvoodoo.Types.DATA_ABSTRACTION_MAPPING["ENUM"],
+        )
+
     def test_ipython_canary(self):
         with self.assertRaises(AttributeError):
             self.root._ipython_canary_method_should_not_exist_
@@ -332,6 +395,12 @@ class test_node_based_access(unittest.TestCase):
         result = yangvoodoo.Common.Utils._find_best_number_type([12, 13], 40)
         assert result == yangvoodoo.Types.DATA_ABSTRACTION_MAPPING["INT8"]
 
+        result = yangvoodoo.Common.Utils._find_best_number_type([12, 13], 127)
+        assert result == yangvoodoo.Types.DATA_ABSTRACTION_MAPPING["INT8"]
+
+        result = yangvoodoo.Common.Utils._find_best_number_type([12, 13], 128)
+        assert result == yangvoodoo.Types.DATA_ABSTRACTION_MAPPING["UINT8"]
+
         result = yangvoodoo.Common.Utils._find_best_number_type([13, 14], 40)
         assert result == yangvoodoo.Types.DATA_ABSTRACTION_MAPPING["UINT8"]
 
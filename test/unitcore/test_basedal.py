@@ -51,6 +51,8 @@ class test_datastore_voodooentry_point(unittest.TestCase):
             self.subject.gets_unsorted("xpath", "schema_path", ignore_empty_lists=True)
         with self.assertRaises(NotImplementedError):
             self.subject.has_item("xpath")
+        with self.assertRaises(NotImplementedError):
+            self.subject.exists("xpath")
         with self.assertRaises(NotImplementedError):
             self.subject.get("xpath", default_value="")
         with self.assertRaises(NotImplementedError):
@@ -59,6 +61,20 @@ class test_datastore_voodooentry_point(unittest.TestCase):
             self.subject.is_session_dirty()
         with self.assertRaises(NotImplementedError):
             self.subject.has_datastore_changed()
+        with self.assertRaises(NotImplementedError):
+            self.subject.record_changes()
+        with self.assertRaises(NotImplementedError):
+            self.subject.checkpoint()
+        with self.assertRaises(NotImplementedError):
+            self.subject.changes_since(0)
+        with self.assertRaises(NotImplementedError):
+            self.subject.snapshot()
+        with self.assertRaises(NotImplementedError):
+            self.subject.release(None)
+        with self.assertRaises(NotImplementedError):
+            self.subject.revert(None)
+        with self.assertRaises(NotImplementedError):
+            self.subject.compare(None)
         with self.assertRaises(NotImplementedError):
             self.subject.dump_xpaths()
         with self.assertRaises(NotImplementedError):
@@ -69,6 +85,16 @@ class test_datastore_voodooentry_point(unittest.TestCase):
             self.subject.delete("xpath")
         with self.assertRaises(NotImplementedError):
             self.subject.gets_len("xpath")
+        with self.assertRaises(NotImplementedError):
+            self.subject.gets_nth("xpath", 0)
+        with self.assertRaises(NotImplementedError):
+            self.subject.gets_slice("xpath", slice(0, 1))
+        with self.assertRaises(NotImplementedError):
+            self.subject.gets_unsorted_nth("xpath", "schema_path", 0)
+        with self.assertRaises(NotImplementedError):
+            self.subject.gets_unsorted_slice("xpath", "schema_path", slice(0, 1))
+        with self.assertRaises(NotImplementedError):
+            self.subject.subtree_hash("xpath")
         with self.assertRaises(NotImplementedError):
             self.subject.dump("filename", format=1)
         with self.assertRaises(NotImplementedError):
@@ -83,6 +109,8 @@ class test_datastore_voodooentry_point(unittest.TestCase):
             self.subject.advanced_merges("", format=1)
         with self.assertRaises(NotImplementedError):
             self.subject.get_raw_xpath("/xpath", with_val=False)
+        with self.assertRaises(NotImplementedError):
+            self.subject.get_xpath_values("/xpath")
         self.subject.setup_root()
         self.subject._initdal()
         """
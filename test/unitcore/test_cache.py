@@ -0,0 +1,85 @@
+import unittest
+from yangvoodoo.Cache import Cache, PathCache
+
+
+class test_cache(unittest.TestCase):
+    def test_unbounded_cache_does_not_evict(self):
+        subject = Cache()
+        for i in range(100):
+            subject.add_entry(f"/path{i}", i)
+
+        self.assertEqual(len(subject), 100)
+        self.assertEqual(subject.stats()["evictions"], 0)
+
+    def test_bounded_cache_evicts_least_recently_used(self):
+        subject = Cache(capacity=2)
+        subject.add_entry("/a", "A")
+        subject.add_entry("/b", "B")
+
+        # Act
+        self.assertEqual(subject.get("/a"), "A")
+        subject.add_entry("/c", "C")
+
+        # Assert
+        self.assertEqual(list(subject.items.keys()), ["/a", "/c"])
+        self.assertFalse(subject.is_path_cached("/b"))
+        self.assertEqual(subject.evictions, 1)
+
+    def test_stats(self):
+        subject = Cache(capacity=10)
+        subject.add_entry("/a", "A")
+
+        # Act
+        self.assertTrue(subject.is_path_cached("/a"))
+        self.assertEqual(subject.get_item_from_cache("/a"), "A")
+        self.assertEqual(subject.get("/b", "default"), "default")
+        self.assertEqual(subject.get("/a"), "A")
+
+        # Assert
+        expected_result = {
+            "size": 1,
+            "capacity": 10,
+            "hits": 2,
+            "misses": 1,
+            "evictions": 0,
+            "hit_ratio": 2 / 3,
+        }
+        self.assertEqual(subject.stats(), expected_result)
+
+        subject.reset_stats()
+        self.assertEqual(subject.stats()["hits"], 0)
+
+    def test_invalid_capacity(self):
+        with self.assertRaises(ValueError):
+            Cache(capacity=0)
+
+    def test_path_cache_split(self):
+        result = PathCache.split("/integrationtest:web/bands[name='Idle/wild']/gigs[year='2019'][month='1']")
+
+        self.assertEqual(result, ["web", "bands", "[name='Idle/wild']", "gigs", "[year='2019'][month='1']"])
+
+    def test_path_cache_invalidates_ancestors_and_descendants_only(self):
+        idlewild = "/integrationtest:web/bands[name='Idlewild']/gigs"
+        longpigs = "/integrationtest:web/bands[name='Longpigs']/gigs"
+        subject = PathCache()
+        subject.add_entry(idlewild, "I")
+        subject.add_entry(longpigs, "L")
+        subject.add_entry("/integrationtest:web/bands", "B")
+        subject.add_entry("/integrationtest:simpleleaf", "S")
+
+        # Act
+        subject.invalidate("/integrationtest:web/integrationtest:bands[name='Longpigs']/gigs[year='2019']/venue")
+
+        # Assert
+        self.assertEqual(subject.get(idlewild), "I")
+        self.assertEqual(subject.get("/integrationtest:simpleleaf"), "S")
+        self.assertFalse(longpigs in subject)
+        self.assertFalse("/integrationtest:web/bands" in subject)
+        self.assertEqual(len(subject), 2)
+
+        # Act
+        subject.invalidate("/integrationtest:web")
+
+        # Assert
+        self.assertFalse(idlewild in subject)
+        self.assertEqual(len(subject), 1)
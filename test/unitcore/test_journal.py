@@ -0,0 +1,173 @@
+import unittest
+from yangvoodoo.Errors import ChangeJournalNotRecordingError
+from yangvoodoo.Journal import ChangeJournal
+
+
+class test_journal(unittest.TestCase):
+    def setUp(self):
+        self.subject = ChangeJournal()
+        self.subject.start_recording()
+
+    def test_checkpoints_survive_clear(self):
+        self.subject.record("set", "/a", "1")
+        checkpoint = self.subject.checkpoint()
+        self.subject.record("set", "/b", "2")
+
+        # Act
+        self.assertEqual(self.subject.changes_since(checkpoint), [("set", "/b", "2")])
+        self.subject.clear()
+        self.subject.record("set", "/c", "3")
+
+        # Assert
+        self.assertEqual(self.subject.changes_since(checkpoint), [("set", "/c", "3")])
+        self.assertEqual(len(self.subject), 1)
+
+    def test_changes_are_counted_but_not_kept_unless_recording(self):
+        self.subject.stop_recording()
+        checkpoint = self.subject.checkpoint()
+
+        # Act
+        self.subject.record("set", "/a", "1")
+
+        # Assert
+        self.assertEqual(len(self.subject), 1)
+        self.assertEqual(self.subject.entries, [])
+        with self.assertRaises(ChangeJournalNotRecordingError):
+            self.subject.changes_since(checkpoint)
+
+        # Act
+        self.subject.start_recording()
+        self.subject.record("set", "/b", "2")
+
+        # Assert
+        with self.assertRaises(ChangeJournalNotRecordingError):
+            self.subject.changes_since(checkpoint)
+        self.assertEqual(self.subject.changes_since(checkpoint + 1), [("set", "/b", "2")])
+
+    def test_ancestors(self):
+        result = list(ChangeJournal.ancestors("/a:x/list[k='1/2'][j=\"[\"]/b"))
+
+        self.assertEqual(result, ["/a:x", "/a:x/list", "/a:x/list[k='1/2'][j=\"[\"]", "/a:x/list[k='1/2'][j=\"[\"]/b"])
+
+    def test_coalesce_set_then_delete(self):
+        self.subject.record("set", "/a", "1", created="/a")
+        self.subject.record("set", "/a", "2")
+        self.subject.record("set", "/b", "1")
+        self.subject.record("delete", "/a")
+        self.subject.record("delete", "/b")
+
+        # Act
+        result = self.subject.changes_since(coalesce=True)
+
+        # Assert
+        self.assertEqual(result, [("delete", "/b", None)])
+
+    def test_coalesce_implicitly_created_list_element_then_delete(self):
+        self.subject.record("set", "/list[k='1']/leaf", "x", created="/list[k='1']")
+        self.subject.record("set", "/list[k='1']/leaf2", "y", created="/list[k='1']/leaf2")
+        self.subject.record("set", "/list[k='2']/leaf", "z", created="/list[k='2']")
+        self.subject.record("delete", "/list[k='1']")
+
+        # Act
+        result = self.subject.changes_since(coalesce=True)
+
+        # Assert
+        self.assertEqual(result, [("set", "/list[k='2']/leaf", "z")])
+
+    def test_coalesce_delete_within_a_created_node(self):
+        self.subject.record("set", "/container/list[k='1']/leaf", "x", created="/container")
+        self.subject.record("delete", "/container/list[k='1']")
+
+        # Act
+        result = self.subject.changes_since(coalesce=True)
+
+        # Assert
+        self.assertEqual(result, [("create", "/container", None)])
+
+    def test_coalesce_delete_recreate_and_delete(self):
+        self.subject.record("delete", "/list[k='1']")
+        self.subject.record("create", "/list[k='1']", created="/list[k='1']")
+        self.subject.record("set", "/list[k='1']/leaf", "x", created="/list[k='1']/leaf")
+        self.subject.record("delete", "/list[k='1']")
+
+        # Act
+        result = self.subject.changes_since(coalesce=True)
+
+        # Assert
+        self.assertEqual(result, [("delete", "/list[k='1']", None)])
+
+    def test_coalesce_delete_of_ancestor(self):
+        self.subject.record("create", "/list[k='1']")
+        self.subject.record("set", "/list[k='1']/leaf", "x", created="/list[k='1']/leaf")
+        self.subject.record("set", "/list2/leaf", "y", created="/list2/leaf")
+        self.subject.record("delete", "/list")
+
+        # Act
+        result = self.subject.changes_since(coalesce=True)
+
+        # Assert
+        self.assertEqual(result, [("set", "/list2/leaf", "y"), ("delete", "/list", None)])
+
+    def test_coalesce_leaflists_and_loads(self):
+        self.subject.record("add", "/ll", "a", created="/ll[.='a']")
+        self.subject.record("add", "/ll", "b", created="/ll[.='b']")
+        self.subject.record("add", "/ll", "c")
+        self.subject.record("remove", "/ll", "a")
+        self.subject.record("remove", "/ll", "c")
+
+        self.assertEqual(
+            self.subject.changes_since(coalesce=True),
+            [("add", "/ll", "b"), ("remove", "/ll", "c")],
+        )
+
+        self.subject.record("loads", None, "<payload/>")
+        self.subject.record("merges", None, "<payload2/>")
+        self.assertEqual(
+            self.subject.changes_since(coalesce=True),
+            [("loads", None, "<payload/>"), ("merges", None, "<payload2/>")],
+        )
+
+    def test_coalesce_does_not_discard_changes_before_a_merge(self):
+        self.subject.record("set", "/a", "1", created="/a")
+        self.subject.record("merges", None, "<payload/>")
+        self.subject.record("delete", "/a")
+
+        # Act
+        result = self.subject.changes_since(coalesce=True)
+
+        # Assert
+        self.assertEqual(result, [("set", "/a", "1"), ("merges", None, "<payload/>"), ("delete", "/a", None)])
+
+    def test_coalesce_stops_at_a_load_from_a_file(self):
+        self.subject.record("set", "/a", "1")
+        self.subject.record("load", None, "data.xml")
+        self.subject.record("merge", None, "more.xml")
+        self.subject.record("set", "/a", "2")
+
+        # Act
+        result = self.subject.changes_since(coalesce=True)
+
+        # Assert
+        self.assertEqual(result, [("load", None, "data.xml"), ("merge", None, "more.xml"), ("set", "/a", "2")])
+
+    def test_rewind_forgets_undone_changes(self):
+        self.subject.record("set", "/a", "1")
+        checkpoint = self.subject.checkpoint()
+        self.subject.record("set", "/b", "2")
+        self.subject.record("set", "/b", "1")
+
+        # Act
+        self.subject.rewind(checkpoint)
+
+        # Assert
+        self.assertEqual(self.subject.changes_since(checkpoint), [])
+        self.assertEqual(len(self.subject), 1)
+
+        # Act
+        self.subject.record("set", "/c", "3")
+        self.subject.clear()
+        self.subject.record("set", "/c", "4")
+        self.subject.rewind(checkpoint)
+
+        # Assert
+        self.assertEqual(self.subject.changes_since(checkpoint), [("set", "/c", "4")])
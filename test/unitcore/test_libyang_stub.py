@@ -131,6 +131,304 @@ class test_libyang_stub(unittest.TestCase):
         self.assertEqual(results[0].value, "ABC")
         self.assertEqual(len(results), 1)
 
+    def test_gets_sorted_uses_typed_keys_and_caches_until_changed(self):
+        xpath = "/integrationtest:web/bands[name='Idlewild']/gigs"
+        spath = "/integrationtest:web/integrationtest:bands/integrationtest:gigs"
+        for month in [10, 9, 1]:
+            self.subject.create(f"{xpath}[year='2019'][month='{month}'][day='1'][venue='v'][location='l']")
+
+        # Act
+        result = list(self.subject.gets_sorted(xpath, spath))
+
+        # Assert
+        expected_result = [
+            f"{xpath}[year='2019'][month='1'][day='1'][venue='v'][location='l']",
+            f"{xpath}[year='2019'][month='9'][day='1'][venue='v'][location='l']",
+            f"{xpath}[year='2019'][month='10'][day='1'][venue='v'][location='l']",
+        ]
+        self.assertEqual(result, expected_result)
+        self.assertTrue(xpath in self.subject._sorted_cache)
+
+        # Act
+        self.root.simpleleaf = "unrelated change"
+        self.assertTrue(xpath in self.subject._sorted_cache)
+        self.subject.create(f"{xpath}[year='2019'][month='2'][day='1'][venue='v'][location='l']")
+        self.assertFalse(xpath in self.subject._sorted_cache)
+        result = list(self.subject.gets_sorted(xpath, spath))
+
+        # Assert
+        self.assertEqual(result[1], f"{xpath}[year='2019'][month='2'][day='1'][venue='v'][location='l']")
+
+    def test_gets_sorted_cache_is_invalidated_by_exact_list_path(self):
+        idlewild = "/integrationtest:web/bands[name='Idlewild']/gigs"
+        longpigs = "/integrationtest:web/bands[name='Longpigs']/gigs"
+        spath = "/integrationtest:web/integrationtest:bands/integrationtest:gigs"
+        self.subject.create(f"{idlewild}[year='2019'][month='1'][day='1'][venue='v'][location='l']")
+        self.subject.create(f"{longpigs}[year='2019'][month='1'][day='1'][venue='v'][location='l']")
+        list(self.subject.gets_sorted(idlewild, spath))
+        list(self.subject.gets_sorted(longpigs, spath))
+
+        # Act
+        self.subject.create(f"{longpigs}[year='2019'][month='2'][day='1'][venue='v'][location='l']")
+
+        # Assert
+        self.assertTrue(idlewild in self.subject._sorted_cache)
+        self.assertFalse(longpigs in self.subject._sorted_cache)
+
+        # Act
+        self.subject.libyang_data.set_xpath(f"{idlewild}[year='2019'][month='2'][day='1'][venue='v'][location='l']", None)
+        self.subject.invalidate_caches(idlewild)
+
+        # Assert
+        self.assertEqual(len(list(self.subject.gets_sorted(idlewild, spath))), 2)
+
+    def test_subtree_hash(self):
+        bands = "/integrationtest:web/bands"
+        self.root.web.bands.create("Idlewild").gigs.create(2019, 1, 1, "v", "l")
+        self.root.web.bands.create("Longpigs")
+
+        # Act
+        idlewild = self.subject.subtree_hash(f"{bands}[name='Idlewild']")
+        web = self.subject.subtree_hash("/integrationtest:web")
+
+        # Assert
+        self.assertNotEqual(idlewild, self.subject.subtree_hash(f"{bands}[name='Longpigs']"))
+        self.assertEqual(self.subject.subtree_hash(f"{bands}[name='Idlewild']"), idlewild)
+        self.assertTrue(f"{bands}[name='Longpigs']" in self.subject._subtree_hashes)
+
+        # Act
+        self.root.simpleleaf = "unrelated change"
+        self.assertTrue(f"{bands}[name='Longpigs']" in self.subject._subtree_hashes)
+        self.root.web.bands["Longpigs"].genre = "britpop"
+        self.assertFalse(f"{bands}[name='Longpigs']" in self.subject._subtree_hashes)
+        self.assertFalse("/integrationtest:web" in self.subject._subtree_hashes)
+        self.assertTrue(f"{bands}[name='Idlewild']" in self.subject._subtree_hashes)
+
+        # Assert
+        self.assertEqual(self.subject.subtree_hash(f"{bands}[name='Idlewild']"), idlewild)
+        self.assertNotEqual(self.subject.subtree_hash("/integrationtest:web"), web)
+
+        # Act
+        web = self.subject.subtree_hash("/integrationtest:web")
+        self.subject.libyang_data.set_xpath(f"{bands}[name='Idlewild']/genre", "indie")
+        self.subject.invalidate_caches(f"{bands}[name='Idlewild']/genre")
+
+        # Assert
+        self.assertNotEqual(self.subject.subtree_hash(f"{bands}[name='Idlewild']"), idlewild)
+        self.assertNotEqual(self.subject.subtree_hash("/integrationtest:web"), web)
+
+    def test_change_journal(self):
+        self.assertFalse(self.subject.is_session_dirty())
+        self.subject.record_changes()
+        self.root.simpleleaf = "a"
+        checkpoint = self.subject.checkpoint()
+
+        # Act
+        self.root.simplelist.create("A").nonleafkey = 5
+        self.root.simpleleaf = "b"
+        self.root.morecomplex.leaflists.simple.create("x")
+        del self.root.simplelist["A"]
+
+        # Assert
+        self.assertTrue(self.subject.is_session_dirty())
+        self.assertEqual(
+            self.subject.changes_since(checkpoint, coalesce=True),
+            [
+                ("set", "/integrationtest:simpleleaf", "b"),
+                ("add", "/integrationtest:morecomplex/leaflists/simple", "x"),
+            ],
+        )
+        self.assertEqual(self.subject.changes_since()[0], ("set", "/integrationtest:simpleleaf", "a"))
+
+        self.subject.commit()
+        self.assertFalse(self.subject.is_session_dirty())
+        self.assertEqual(self.subject.changes_since(checkpoint), [])
+
+    def test_change_journal_only_keeps_changes_while_recording(self):
+        self.root.simpleleaf = "a"
+
+        # Assert
+        self.assertTrue(self.subject.is_session_dirty())
+        self.assertEqual(len(self.subject.journal.entries), 0)
+        with self.assertRaises(yangvoodoo.Errors.ChangeJournalNotRecordingError):
+            self.subject.changes_since()
+
+        # Act
+        self.subject.record_changes()
+        checkpoint = self.subject.checkpoint()
+        self.root.simplelist.create("A").nonleafkey = 5
+        self.root.morecomplex.leaflists.simple.create("x")
+        self.root.morecomplex.leaflists.simple.create("y")
+        del self.root.morecomplex.leaflists.simple["x"]
+        del self.root.simplelist["A"]
+
+        # Assert
+        self.assertEqual(
+            self.subject.changes_since(checkpoint, coalesce=True),
+            [("add", "/integrationtest:morecomplex/leaflists/simple", "y")],
+        )
+
+        # Act
+        self.subject.record_changes(False)
+
+        # Assert
+        self.assertEqual(len(self.subject.journal.entries), 0)
+
+    def test_snapshot_and_revert(self):
+        self.root.simpleleaf = "original"
+        self.root.simplelist.create("A").nonleafkey = 1
+        self.root.morecomplex.leaflists.simple.create("x")
+        before = self.subject.dump_xpaths()
+        snapshot = self.subject.snapshot()
+
+        # Act
+        self.root.simpleleaf = "speculative"
+        self.root.simpleenum = "A"
+        del self.root.simplelist["A"]
+        self.root.simplelist.create("B")
+        self.root.morecomplex.leaflists.simple.create("y")
+        del self.root.morecomplex.leaflists.simple["x"]
+
+        # Assert
+        self.assertEqual(
+            self.subject.compare(snapshot)[:2],
+            [
+                ("set", "/integrationtest:simpleleaf", "speculative"),
+                ("set", "/integrationtest:simpleenum", "A"),
+            ],
+        )
+
+        # Act
+        self.subject.revert(snapshot)
+
+        # Assert
+        self.assertEqual(self.subject.dump_xpaths(), before)
+        self.assertEqual(self.root.simplelist["A"].nonleafkey, 1)
+        self.assertEqual(self.subject._undo, [])
+        self.assertEqual(self.subject.compare(snapshot), [])
+
+        # Act
+        later_snapshot = self.subject.snapshot()
+        self.subject.release(later_snapshot)
+        self.subject.release(snapshot)
+
+        # Assert
+        with self.assertRaises(yangvoodoo.Errors.InvalidSnapshotError):
+            self.subject.revert(snapshot)
+
+    def test_revert_deletes_implicitly_created_parents_and_restores_presence_containers(self):
+        self.subject.create_container("/integrationtest:container1")
+        self.subject.create_container("/integrationtest:container1/container2")
+        self.subject.set("/integrationtest:container1/container2/leaf2a", "a")
+        before = self.subject.dump_xpaths()
+        snapshot = self.subject.snapshot()
+
+        # Act
+        self.subject.set("/integrationtest:simplelist[simplekey='NEW']/nonleafkey", "5")
+        self.subject.delete("/integrationtest:container1")
+        with self.assertRaises(LibyangError):
+            self.subject.set("/integrationtest:simpleenum", "not-an-enum")
+        self.subject.revert(snapshot)
+
+        # Assert
+        self.assertEqual(self.subject.dump_xpaths(), before)
+        self.assertFalse(self.subject.exists("/integrationtest:simplelist[simplekey='NEW']"))
+        self.assertTrue(self.subject.exists("/integrationtest:container1/container2"))
+
+    def test_revert_restores_nested_deletes(self):
+        self.subject.create_container("/integrationtest:morecomplex/inner")
+        self.subject.set("/integrationtest:morecomplex/inner/deviant/a-string", "a")
+        self.subject.set("/integrationtest:morecomplex/inner/uint8keylist[mykey='1']/nonkey", "one")
+        self.subject.set("/integrationtest:morecomplex/inner/uint8keylist[mykey='2']/nonkey", "two")
+        self.subject.commit()
+        before = self.subject.dump_xpaths()
+        snapshot = self.subject.snapshot()
+
+        # Act
+        self.subject.uncreate("/integrationtest:morecomplex/inner/uint8keylist[mykey='1']")
+        self.subject.delete("/integrationtest:morecomplex/inner")
+        self.subject.revert(snapshot)
+
+        # Assert
+        self.assertEqual(self.subject.dump_xpaths(), before)
+        self.assertEqual(self.subject.compare(snapshot), [])
+        self.assertFalse(self.subject.is_session_dirty())
+
+    def test_apply_batch(self):
+        rows = [
+            ("create", "/integrationtest:simplelist[simplekey='A']", None),
+            ("set", "/integrationtest:simplelist[simplekey='A']/nonleafkey", 1),
+            ("create", "/integrationtest:simplelist[simplekey='B/C']", None),
+            ("set", "/integrationtest:simplelist[simplekey='B/C']/nonleafkey", 2),
+            ("set", "/integrationtest:simpleleaf", "abc"),
+            ("add", "/integrationtest:morecomplex/leaflists/simple", "x"),
+            ("add", "/integrationtest:morecomplex/leaflists/simple", "y"),
+            ("remove", "/integrationtest:morecomplex/leaflists/simple", "x"),
+        ]
+
+        # Act
+        errors = self.subject.apply_batch(rows)
+
+        # Assert
+        self.assertEqual(errors, [])
+        self.assertEqual(self.root.simplelist["A"].nonleafkey, 1)
+        self.assertEqual(self.root.simplelist["B/C"].nonleafkey, 2)
+        self.assertEqual(self.root.simpleleaf, "abc")
+        self.assertEqual(list(self.root.morecomplex.leaflists.simple), ["y"])
+
+    def test_apply_batch_collects_errors(self):
+        rows = [
+            ("set", "/integrationtest:simpleenum", "not-an-enum"),
+            ("set", "/integrationtest:does-not-exist", "abc"),
+            ("explode", "/integrationtest:simpleleaf", "abc"),
+            ("set", "/integrationtest:simpleleaf", "abc"),
+        ]
+
+        # Act
+        errors = self.subject.apply_batch(rows, raise_exception=False)
+
+        # Assert
+        self.assertEqual(
+            [xpath for (_, xpath) in errors],
+            [
+                "/integrationtest:simpleenum",
+                "/integrationtest:does-not-exist",
+                "/integrationtest:simpleleaf",
+            ],
+        )
+        self.assertEqual(self.root.simpleleaf, "abc")
+
+        with self.assertRaises(yangvoodoo.Errors.BackendDatastoreError):
+            self.subject.apply_batch(rows)
+
+    def test_apply_batch_raises_unexpected_errors(self):
+        self.subject.create = Mock(side_effect=TypeError("broken"))
+
+        # Act
+        with self.assertRaises(TypeError):
+            self.subject.apply_batch([("create", "/integrationtest:simplelist[simplekey='A']", None)])
+
+    def test_apply_batch_with_validation(self):
+        # Act
+        errors = self.subject.apply_batch(
+            [("create", "/integrationtest:validator/mandatories", None)], validate=True, raise_exception=False
+        )
+
+        # Assert
+        expected_error = (
+            "Validation Error: /integrationtest:validator/mandatories:"
+            ' Missing required element "this-is-mandatory" in "mandatories".'
+        )
+        self.assertEqual(errors, [(expected_error, "/")])
+
+        # Act
+        errors = self.subject.apply_batch(
+            [("set", "/integrationtest:validator/mandatories/this-is-mandatory", "abc")], validate=True
+        )
+
+        # Assert
+        self.assertEqual(errors, [])
+
     def test_container_presence_explicit(self):
         # Act
         self.root.bronze.silver.gold.platinum.deeper.create()
@@ -154,6 +452,15 @@ class test_libyang_stub(unittest.TestCase):
 
         self.subject.dump("/tmp/xyz.json", 2)
 
+    def test_exists(self):
+        self.root.simplelist.create("ABC")
+
+        # Assert
+        self.assertTrue(self.subject.exists("/integrationtest:simplelist[simplekey='ABC']"))
+        self.assertTrue(self.subject.exists("/integrationtest:simplelist"))
+        self.assertFalse(self.subject.exists("/integrationtest:simplelist[simplekey='XYZ']"))
+        self.assertFalse(self.subject.exists("/integrationtest:simplecontainer"))
+
     def test_single_vs_double_quotes(self):
         # Act
         list_element = self.root.simplelist.create("ABX'C")
@@ -456,6 +763,24 @@ class test_libyang_stub(unittest.TestCase):
         )
         self.assertEqual(result, [("/integrationtest:simpleleaf", "abc")])
 
+    def test_get_xpath_values(self):
+        self.root.simpleleaf = "abc"
+        self.root.simplelist.create("A")
+        self.root.simplelist.create("B")
+
+        # Act
+        leaf_result = list(self.subject.get_xpath_values("/integrationtest:simpleleaf"))
+        list_result = list(self.subject.get_xpath_values("/integrationtest:simplelist/simplekey"))
+
+        # Assert
+        self.assertEqual(leaf_result, [("/integrationtest:simpleleaf", "abc", 4)])
+        expected_result = [
+            ("/integrationtest:simplelist[simplekey='A']/simplekey", "A", 4),
+            ("/integrationtest:simplelist[simplekey='B']/simplekey", "B", 4),
+        ]
+        self.assertEqual(list_result, expected_result)
+        self.assertEqual(list(self.subject.get_raw_xpath_only_values("/integrationtest:simplelist/simplekey")), ["A", "B"])
+
     def test_libyang_get_xpath(self):
         # Act
         self.root.validator.types.bool_with_default = False
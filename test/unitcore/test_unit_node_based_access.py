@@ -491,6 +491,34 @@ Children: 'A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K', 'L', 'M', 'N',
         self.assertEqual(2, len(self.root.morecomplex.leaflists.simple))
         self.assertFalse("A" in self.root.morecomplex.leaflists.simple)
 
+    def test_leaf_list_indexes_and_slices(self):
+        ll = self.root.morecomplex.leaflists.simple
+        for value in ["A", "B", "C", "D", "E"]:
+            ll.create(value)
+
+        # Assert
+        self.assertEqual(ll.get_index(-1), "E")
+        self.assertEqual(ll[0], "A")
+        self.assertEqual(ll[-2], "D")
+        self.assertEqual(ll[1:3], ["B", "C"])
+        self.assertEqual(ll[::2], ["A", "C", "E"])
+        self.assertEqual(ll[-2:], ["D", "E"])
+        self.assertEqual(ll[::-2], ["E", "C", "A"])
+        with self.assertRaises(Errors.LeafListDoesNotContainIndexError):
+            ll[-6]
+
+    def test_list_indexes_and_slices(self):
+        for key in ["A", "B", "C", "D"]:
+            self.root.simplelist.create(key)
+
+        # Assert
+        self.assertEqual(self.root.simplelist.get_index(-1).simplekey, "D")
+        self.assertEqual([x.simplekey for x in self.root.simplelist[1:3]], ["B", "C"])
+        self.assertEqual([x.simplekey for x in self.root.simplelist[-1:]], ["D"])
+        self.assertEqual(self.root.simplelist["B"].simplekey, "B")
+        with self.assertRaises(Errors.ListDoesNotContainIndexError):
+            self.root.simplelist.get_index(4)
+
     def test_extensions(self):
         expected_result = [("crux:hide", True)]
         self.assertEqual(
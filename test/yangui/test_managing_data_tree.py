@@ -1,8 +1,14 @@
+import base64
+
 import libyang
 import pytest
 from mock import Mock, call, ANY
 
-from yangvoodoo.SchemaData import Expander
+from examples.htmlforms.HtmlForms import HtmlFormExpander
+from yangvoodoo.Errors import OutputWrittenToWriterError
+from yangvoodoo.Merger import DataTree, DataTreeChange
+from yangvoodoo.RenderCache import RenderCache
+from yangvoodoo.SchemaData import Expander, Trail
 
 
 class TestExpander(Expander):
@@ -21,6 +27,15 @@ class TestExpander(Expander):
         self.callback_close_list = Mock()
         self.callback_open_list_element = Mock()
         self.callback_close_list_element = Mock()
+        self.callback_write_placeholder = Mock()
+
+
+class PathWritingExpander(Expander):
+    def callback_write_leaf(self, node, value, quote, explicit, default, key, template, node_id):
+        self.result.write(f"{node_id} = {value}\n")
+
+    def callback_open_list_element(self, node, key_values, empty_list_element, force_open, node_id):
+        self.result.write(f"{node_id}\n")
 
 
 @pytest.fixture
@@ -204,3 +219,237 @@ def test_trying_to_subprocess_a_non_list_element(subject):
         subject.subprocess_existing_list("/testforms:toplevel")
 
     assert str(err.value) == "subprocess only supports processing of a list: /testforms:toplevel"
+
+
+def test_attach_session_shares_the_data_tree(subject):
+    changes = [DataTreeChange(DataTreeChange.ACTION_SET, "/testforms:simpleleaf", "a")]
+    session, json_dict, _ = DataTree.process_data_tree_against_libyang(
+        '{"testforms:topdrop": "b"}',
+        changes,
+        yang_model="testforms",
+        yang_location="yang",
+        log=Mock(),
+        return_payload=False,
+    )
+    empty_hash = session.subtree_hash("/testforms:toplevel")
+
+    # Act
+    subject.attach_session(session)
+    subject.data_tree_create_container("/testforms:toplevel")
+
+    # Assert
+    assert json_dict is None
+    assert subject.data_ctx is session.libyang_data
+    assert subject._exists("/testforms:simpleleaf")
+    assert session.exists("/testforms:toplevel")
+    assert session.subtree_hash("/testforms:toplevel") != empty_hash
+
+
+def test_process_a_list_element_from_a_start_data_path(subject):
+    # Act
+    subject.process(
+        open("templates/forms/simplelist2.xml").read(),
+        start_data_path="/testforms:toplevel/simplelist[simplekey='B']",
+    )
+
+    # Assert
+    assert subject.callback_open_containing_node.mock_calls == []
+    assert subject.callback_open_list.mock_calls == []
+    assert subject.callback_open_list_element.mock_calls == [
+        call(
+            ANY,
+            key_values=[("simplekey", "B")],
+            empty_list_element=False,
+            force_open=False,
+            node_id="/testforms:toplevel/simplelist[simplekey='B']",
+        )
+    ]
+    assert [c.kwargs["node_id"] for c in subject.callback_write_leaf.mock_calls] == [
+        "/testforms:toplevel/simplelist[simplekey='B']/simplekey",
+        "/testforms:toplevel/simplelist[simplekey='B']/simplenonkey",
+    ]
+    assert subject.data_path_trail == [""]
+    assert subject.id_path_trail == [""]
+    assert subject.schema_path_trail == [""]
+
+
+def test_process_with_a_max_depth_writes_placeholders(subject):
+    # Act
+    subject.process(open("templates/forms/simplelist2.xml").read(), start_data_path="/testforms:toplevel", max_depth=1)
+
+    # Assert
+    assert subject.callback_open_containing_node.mock_calls == [call(ANY, presence=True, node_id="/testforms:toplevel")]
+    assert subject.callback_write_placeholder.mock_calls == [call(ANY, node_id="/testforms:toplevel")]
+    assert subject.callback_write_leaf.mock_calls == []
+    assert subject.callback_open_list.mock_calls == []
+
+
+def test_html_forms_placeholders_load_the_data_path(subject):
+    forms = HtmlFormExpander("testforms", Mock())
+
+    # Act
+    forms.process(open("templates/forms/simplelist2.xml").read(), start_data_path="/testforms:toplevel", max_depth=1)
+
+    # Assert
+    data_path = base64.urlsafe_b64encode(b"/testforms:toplevel").decode()
+    leaf_id = base64.urlsafe_b64encode(b"/testforms:toplevel/hello").decode()
+    assert f"yangui_load_placeholder('{data_path}', '{data_path}', 2)" in forms.dumps()
+    assert leaf_id not in forms.dumps()
+
+    # Act
+    forms.subprocess_data_path("/testforms:toplevel", max_depth=2)
+
+    # Assert
+    assert f"id={data_path}>" in forms.dumps()
+    assert leaf_id in forms.dumps()
+
+
+def test_schema_nodes_and_render_plans_are_reused_for_every_list_element(subject):
+    subject.load(open("templates/forms/simplelist2.xml").read())
+
+    # Act
+    subject.subprocess_existing_list("/testforms:toplevel/simplelist")
+
+    # Assert
+    simplekeys = [c.args[0] for c in subject.callback_write_leaf.mock_calls if c.kwargs["key"]]
+    assert len(simplekeys) == 2
+    assert simplekeys[0] is simplekeys[1]
+    assert subject._get_render_plan(simplekeys[0]) is subject._get_render_plan(simplekeys[1])
+    assert subject._get_render_plan(simplekeys[0]).is_key is True
+    assert len(subject._schema_nodes) == 1
+
+
+def test_trail_keeps_the_joined_path_at_every_depth():
+    trail = Trail()
+
+    # Act
+    trail.append("/testforms:toplevel")
+    trail.append("/simplelist[simplekey='A']")
+    trail.append("/simplenonkey")
+    trail.pop()
+
+    # Assert
+    assert trail == ["", "/testforms:toplevel", "/simplelist[simplekey='A']"]
+    assert trail.path == "/testforms:toplevel/simplelist[simplekey='A']"
+    assert trail.paths == ["", "", "/testforms:toplevel", "/testforms:toplevel/simplelist[simplekey='A']"]
+
+
+def test_uuids_are_cached_per_hybrid_trail(subject):
+    subject.load(open("templates/forms/simplelist2.xml").read())
+    subject.id_path_trail.append("/testforms:toplevel")
+
+    # Act
+    first = subject.get_uuid()
+    second = subject.get_hybrid_id(as_uuid=True)
+
+    # Assert
+    assert first is second
+    assert subject._uuids == {"/testforms:toplevel": first}
+
+
+def test_process_streams_the_output_to_a_writer(subject):
+    writer = Mock()
+    subject.callback_write_leaf.side_effect = lambda *args, **kwargs: subject.result.write("leaf\n")
+
+    # Act
+    subject.process(
+        open("templates/forms/simplelist2.xml").read(), start_data_path="/testforms:toplevel", writer=writer
+    )
+
+    # Assert
+    assert writer.write.mock_calls[0] == call("leaf\n")
+    with pytest.raises(OutputWrittenToWriterError):
+        subject.dumps()
+
+
+@pytest.mark.parametrize("template", ["simplelist2.xml", "choicecase.xml"])
+def test_data_driven_traversal_matches_querying_every_schema_node(subject, template):
+    data_driven = TestExpander("testforms", Mock())
+    data_driven.DATA_DRIVEN = True
+    payload = open(f"templates/forms/{template}").read()
+
+    # Act
+    subject.process(payload)
+    data_driven.process(payload)
+
+    # Assert
+    for callback in (
+        "callback_write_leaf",
+        "callback_open_list",
+        "callback_open_list_element",
+        "callback_open_containing_node",
+        "callback_open_case",
+    ):
+        expected = [(c.args[1:], c.kwargs) for c in getattr(subject, callback).mock_calls]
+        assert [(c.args[1:], c.kwargs) for c in getattr(data_driven, callback).mock_calls] == expected
+    assert data_driven._data_children[""]
+
+
+def test_rendering_top_level_nodes_in_worker_processes_matches_a_serial_render():
+    serial = PathWritingExpander("testforms", Mock())
+    parallel = PathWritingExpander("testforms", Mock())
+    payload = open("templates/forms/choicecase.xml").read()
+
+    # Act
+    serial.process(payload)
+    parallel.process(payload, workers=2)
+
+    # Assert
+    assert "/testforms:toplevel/simplelist[simplekey='B']/simplenonkey = brian-jonestown-massacre" in serial.dumps()
+    assert parallel.dumps() == serial.dumps()
+
+
+def test_process_cached_only_renders_unchanged_inputs_once(tmp_path):
+    cache = RenderCache(str(tmp_path))
+    payload = open("templates/forms/simplelist2.xml").read()
+    expected = PathWritingExpander("testforms", Mock())
+    expected.process(payload)
+    first = PathWritingExpander("testforms", Mock())
+    second = PathWritingExpander("testforms", Mock())
+    second.process = Mock()
+
+    # Act
+    first.process_cached(cache, payload)
+    second.process_cached(cache, payload)
+
+    # Assert
+    assert first.dumps() == expected.dumps()
+    assert second.dumps() == expected.dumps()
+    second.process.assert_not_called()
+
+
+def test_process_cached_renders_the_loaded_data_tree(tmp_path):
+    cache = RenderCache(str(tmp_path))
+    first_payload = open("templates/forms/simplelist2.xml").read()
+    second_payload = first_payload.replace("<hello>world</hello>", "<hello>there</hello>")
+    subject = PathWritingExpander("testforms", Mock())
+
+    # Act
+    subject.load(first_payload)
+    first = subject.process_cached(cache)
+    subject.data_ctx = libyang.DataTree(subject.ctx)
+    subject.load(second_payload)
+    second = subject.process_cached(cache)
+
+    # Assert
+    assert "/testforms:toplevel/hello = world" in first
+    assert "/testforms:toplevel/hello = there" in second
+    assert first != second
+
+
+def test_cache_key_depends_on_the_module_text(subject):
+    module = Mock()
+    module.revision.return_value = "2021-01-01"
+    module.print_mem.return_value = "module testforms { leaf a { type string; } }"
+    subject.ctx = Mock()
+    subject.ctx.get_module.return_value = module
+    key = subject.get_cache_key("<data/>")
+
+    # Act
+    module.print_mem.return_value = "module testforms { leaf b { type string; } }"
+
+    # Assert
+    assert subject.get_cache_key("<data/>") != key
+    module.print_mem.return_value = "module testforms { leaf a { type string; } }"
+    assert subject.get_cache_key("<data/>") == key
+    module.print_mem.assert_called_with("yang")
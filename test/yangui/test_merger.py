@@ -5,7 +5,7 @@ from mock import Mock
 
 import libyang
 import yangvoodoo
-from yangvoodoo.Merger import DataTree, DataTreeChange, DataTreeChanges, InvalidChangeError
+from yangvoodoo.Merger import DataTree, DataTreeChange, DataTreeChanges, InvalidChangeError, LazyDumps
 from yangvoodoo.Errors import InvalidPayloadError
 
 
@@ -224,3 +224,21 @@ def test_creating_and_deleting_list_items():
     assert root.mainlist.get_index(1).subkey == "z"
     assert root.mainlist.get_index(2).mainkey == "x"
     assert root.mainlist.get_index(2).subkey == "x"
+
+
+def test_merging_without_returning_the_payload():
+    log = Mock()
+    changes = [DataTreeChange(DataTreeChange.ACTION_SET, "/testforms:simpleleaf", "a")]
+
+    # Act
+    session, json_dict, changes = DataTree.process_data_tree_against_libyang(
+        '{"testforms:topdrop": "b"}', changes, yang_location="yang", log=log, return_payload=False
+    )
+
+    # Assert
+    assert json_dict is None
+    assert changes == []
+    assert session.get("/testforms:simpleleaf") == "a"
+    final_data_tree = log.info.mock_calls[-1].args[1]
+    assert isinstance(final_data_tree, LazyDumps)
+    assert json.loads(str(final_data_tree)) == {"testforms:topdrop": "b", "testforms:simpleleaf": "a"}
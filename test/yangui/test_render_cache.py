@@ -0,0 +1,57 @@
+import os
+
+from yangvoodoo.RenderCache import RenderCache
+
+
+class Options:
+    def __init__(self):
+        self.hide_types = False
+
+
+def test_cached_output_is_returned_for_the_same_key(tmp_path):
+    subject = RenderCache(str(tmp_path))
+    key = RenderCache.get_key(
+        "examples.htmlforms.HtmlForms.HtmlFormExpander",
+        "2021-01-01",
+        RenderCache.get_checksum("module testforms {}"),
+        RenderCache.get_checksum("<data/>"),
+        Options(),
+    )
+
+    # Act
+    subject.put(key, "rendered output")
+
+    # Assert
+    assert subject.get(key) == "rendered output"
+    assert subject.get(RenderCache.get_key("something-else")) is None
+    assert os.listdir(tmp_path) == [f"{key}.render"]
+
+
+def test_keys_depend_on_every_part():
+    options = Options()
+    key = RenderCache.get_key("module-checksum", "data-checksum", options)
+
+    # Act
+    options.hide_types = True
+
+    # Assert
+    assert RenderCache.get_key("module-checksum", "data-checksum", Options()) == key
+    assert RenderCache.get_key("module-checksum", "data-checksum", options) != key
+    assert RenderCache.get_key("module-checksum", "other-data-checksum", Options()) != key
+
+
+def test_least_recently_used_entries_are_removed_above_the_size_limit(tmp_path):
+    subject = RenderCache(str(tmp_path), max_bytes=10)
+    subject.put("a", "12345")
+    os.utime(tmp_path / "a.render", (1000, 1000))
+    subject.put("b", "12345")
+    os.utime(tmp_path / "b.render", (2000, 2000))
+    subject.get("a")
+
+    # Act
+    subject.put("c", "12345")
+
+    # Assert
+    assert subject.get("a") == "12345"
+    assert subject.get("b") is None
+    assert subject.get("c") == "12345"
@@ -0,0 +1,75 @@
+import pytest
+from mock import Mock
+
+from yangvoodoo.Errors import SessionExpiredError
+from yangvoodoo.Merger import DataTreeChange
+from yangvoodoo.SessionStore import SessionStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def subject(clock):
+    return SessionStore(capacity=2, ttl=60, clock=clock)
+
+
+def test_applying_only_new_changes_to_a_stored_session(subject):
+    log = Mock()
+    changes = [DataTreeChange(DataTreeChange.ACTION_SET, "/testforms:simpleleaf", "a")]
+    session = subject.get_session("abc", {"testforms:topdrop": "b"}, changes, 0, yang_model="testforms", log=log)
+
+    # Act
+    changes = [DataTreeChange(DataTreeChange.ACTION_SET, "/testforms:topleaf", "b")]
+    result = subject.get_session("abc", None, changes, 1, yang_model="testforms", log=log)
+
+    # Assert
+    assert result is session
+    assert subject.get("abc").applied == 2
+    assert session.get("/testforms:topdrop") == "b"
+    assert session.get("/testforms:simpleleaf") == "a"
+    assert session.get("/testforms:topleaf") == "b"
+
+
+def test_changes_not_following_on_from_the_stored_session(subject):
+    log = Mock()
+    changes = [DataTreeChange(DataTreeChange.ACTION_SET, "/testforms:simpleleaf", "a")]
+    subject.get_session("abc", {"testforms:topdrop": "b"}, changes, 0, yang_model="testforms", log=log)
+
+    # Act
+    with pytest.raises(SessionExpiredError):
+        subject.get_session("abc", None, [], 3, yang_model="testforms", log=log)
+
+    # Assert
+    assert "abc" not in subject
+    with pytest.raises(SessionExpiredError):
+        subject.get_session("xyz", None, [], 1, yang_model="testforms", log=log)
+
+
+def test_sessions_are_evicted_after_the_ttl_or_when_the_store_is_full(subject, clock):
+    subject.add("a", Mock())
+    clock.now += 30
+    subject.add("b", Mock())
+    clock.now += 40
+
+    # Act
+    assert subject.get("a") is None
+    assert subject.get("b") is not None
+    subject.add("c", Mock())
+    subject.add("d", Mock())
+
+    # Assert
+    assert "b" not in subject
+    assert "c" in subject
+    assert "d" in subject
+    assert len(subject) == 2
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+from mock import Mock, call
+
+from yangvoodoo.Writers import ChunkedWriter, TornadoWriter, iter_chunks
+
+
+def test_chunked_writer_gathers_writes_into_chunks():
+    sink = Mock()
+    subject = ChunkedWriter(sink, chunk_size=5)
+
+    # Act
+    subject.write("abc")
+    subject.write("def")
+    subject.write("g")
+    subject.close()
+
+    # Assert
+    assert sink.mock_calls == [call("abcdef"), call("g")]
+
+
+def test_tornado_writer_writes_and_flushes_each_chunk():
+    handler = Mock()
+    io_loop = Mock()
+    subject = TornadoWriter(handler, chunk_size=2, io_loop=io_loop)
+
+    # Act
+    subject.write("ab")
+    subject.write("c")
+    subject.close()
+
+    # Assert
+    assert io_loop.add_callback.mock_calls == [call(subject._write_and_flush, "ab")]
+    assert handler.mock_calls == [call.write("c"), call.flush()]
+    assert subject.chunks_sent == 2
+
+
+def test_tornado_writer_waits_for_pending_chunks_to_be_flushed():
+    class FakeHandler:
+        def __init__(self):
+            self.written = []
+
+        def write(self, chunk):
+            self.written.append(chunk)
+
+        async def flush(self):
+            pass
+
+    handler = FakeHandler()
+    io_loop = Mock()
+    subject = TornadoWriter(handler, chunk_size=1, io_loop=io_loop, max_pending=1)
+    subject.write("a")
+    assert subject.chunks_sent == 1
+    assert not subject.pending.acquire(blocking=False)
+
+    # Act
+    asyncio.run(subject._write_and_flush("a"))
+
+    # Assert
+    assert handler.written == ["a"]
+    subject.write("b")
+    assert subject.chunks_sent == 2
+    assert io_loop.add_callback.mock_calls == [call(subject._write_and_flush, "a"), call(subject._write_and_flush, "b")]
+
+
+def test_iter_chunks_yields_the_output_as_it_is_rendered():
+    def render(writer):
+        for i in range(5):
+            writer.write(f"<{i}>")
+
+    # Act
+    result = list(iter_chunks(render, chunk_size=6, max_pending=1))
+
+    # Assert
+    assert result == ["<0><1>", "<2><3>", "<4>"]
+
+
+def test_iter_chunks_raises_the_rendering_error():
+    def render(writer):
+        writer.write("partial")
+        raise ValueError("broken")
+
+    # Act
+    with pytest.raises(ValueError):
+        list(iter_chunks(render, chunk_size=1))
@@ -1,13 +1,60 @@
+import re
+from collections import OrderedDict
+from typing import List
+
+
 class Cache:
-    def __init__(self):
-        self.items = {}
+
+    """
+    A simple key/value cache with optional least-recently-used eviction.
+
+    When capacity is None the cache is unbounded (suitable for schema-only entries which are
+    few in number and frequently used). When a capacity is provided the least recently used
+    entry is evicted once the capacity is exceeded (suitable for entries which are specific to
+    a data path, e.g. one entry per list element).
+
+    Hits, misses and evictions are counted so that the capacity can be sized, see stats().
+    """
+
+    def __init__(self, capacity=None):
+        if capacity is not None and capacity < 1:
+            raise ValueError("capacity must be a positive integer or None")
+        self.capacity = capacity
+        self.items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.items)
 
     def is_path_cached(self, path):
-        return path in self.items
+        if path in self.items:
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
 
     def get_item_from_cache(self, path):
+        self.items.move_to_end(path)
         return self.items[path]
 
+    def get(self, path, default=None):
+        """
+        Return an entry from the cache, or the default if there is no entry.
+
+        This is equivalent to is_path_cached() followed by get_item_from_cache() but requires
+        only a single lookup.
+        """
+        try:
+            cache_object = self.items[path]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self.items.move_to_end(path)
+        return cache_object
+
     def remove_entry(self, path):
         if path in self.items:
             del self.items[path]
@@ -21,6 +68,144 @@ class Cache:
         """
 
         self.items[path] = cache_object
+        self.items.move_to_end(path)
+        if self.capacity is not None:
+            while len(self.items) > self.capacity:
+                self.items.popitem(last=False)
+                self.evictions += 1
 
     def empty(self):
         self.items.clear()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self):
+        """
+        Return a dictionary describing the usage of the cache.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.items),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+        }
+
+
+class PathCache:
+
+    """
+    A cache of values held against data XPATHs, where changing the data at an XPATH must discard
+    the entries for that XPATH, every ancestor and every descendant - but not the entries of
+    unrelated siblings.
+
+    Entries are held in a tree following the components of the XPATH (the predicates of a list
+    element are a component beneath the list itself), so discarding the entries for a change only
+    visits the nodes along the changed XPATH rather than every entry in the cache.
+
+    Module prefixes are ignored when placing an entry in the tree, so an entry is discarded even
+    if the changed XPATH spells out a prefix which the cached XPATH omitted.
+    """
+
+    MODULE_PREFIX = re.compile(r"^[A-Za-z0-9_.-]+:")
+
+    def __init__(self):
+        self.root = {}
+        self.entries = {}
+
+    def __len__(self):
+        return len(self.entries) + sum(len(entries) for entries in self._walk(self.root))
+
+    def __contains__(self, xpath):
+        node = self._find(xpath)
+        return node is not None and xpath in node[0]
+
+    @classmethod
+    def split(cls, xpath: str) -> List[str]:
+        """
+        Split an XPATH into it's components, the predicates of a list element are returned as a
+        component of their own.
+
+        /integrationtest:web/bands[name='Idlewild']/gigs gives ['web', 'bands', "[name='Idlewild']", 'gigs']
+        """
+        components = []
+        current = ""
+        quote = None
+        depth = 0
+        for char in xpath:
+            if quote:
+                current += char
+                if char == quote:
+                    quote = None
+            elif char in "'\"":
+                quote = char
+                current += char
+            elif char == "[":
+                if depth == 0 and current and not current.endswith("]"):
+                    components.append(cls.MODULE_PREFIX.sub("", current))
+                    current = ""
+                depth += 1
+                current += char
+            elif char == "]":
+                depth -= 1
+                current += char
+            elif char == "/" and depth == 0:
+                if current:
+                    components.append(cls.MODULE_PREFIX.sub("", current))
+                current = ""
+            else:
+                current += char
+        if current:
+            components.append(cls.MODULE_PREFIX.sub("", current))
+        return components
+
+    def _find(self, xpath: str, create: bool = False):
+        node = (self.entries, self.root)
+        for component in self.split(xpath):
+            (_, children) = node
+            if component not in children:
+                if not create:
+                    return None
+                children[component] = ({}, {})
+            node = children[component]
+        return node
+
+    def get(self, xpath: str, default=None):
+        node = self._find(xpath)
+        if node is None:
+            return default
+        return node[0].get(xpath, default)
+
+    def add_entry(self, xpath: str, value):
+        self._find(xpath, create=True)[0][xpath] = value
+
+    def invalidate(self, xpath: str):
+        """
+        Discard the entries for the XPATH, it's ancestors and it's descendants.
+        """
+        (entries, children) = (self.entries, self.root)
+        components = self.split(xpath)
+        for (index, component) in enumerate(components):
+            entries.clear()
+            if component not in children:
+                return
+            if index == len(components) - 1:
+                del children[component]
+                return
+            (entries, children) = children[component]
+        entries.clear()
+        children.clear()
+
+    def empty(self):
+        self.root = {}
+        self.entries = {}
+
+    def _walk(self, children):
+        for (entries, grandchildren) in children.values():
+            yield entries
+            yield from self._walk(grandchildren)
@@ -6,16 +6,31 @@ import libyang
 from libyang import Node as LibyangSchemaNode
 from yangvoodoo import Types, Errors
 from yangvoodoo.Cache import Cache
+from yangvoodoo.SchemaIndex import SchemaIndex
+from yangvoodoo.TypeDescriptor import TypeDescriptor
+
+# The number of data-path specific YangNode's to keep in the cache for a session.
+DATA_CACHE_SIZE = 10000
 
 
 class VoodooContext:
-    def __init__(self, module, data_access_layer, yang_schema, yang_ctx, log=None):
+    def __init__(
+        self,
+        module,
+        data_access_layer,
+        yang_schema,
+        yang_ctx,
+        log=None,
+        data_cache_size=DATA_CACHE_SIZE,
+    ):
         self.module = module
         self.top_module = module
         self.schema = yang_schema
         self.schemactx = yang_ctx
         self.dal = data_access_layer
         self.schemacache = Cache()
+        self.datacache = Cache(capacity=data_cache_size)
+        self.schemaindex = SchemaIndex(yang_ctx)
         self.log = log
         self.yang_module = module
         self.other_yang_modules = []
@@ -48,6 +63,8 @@ class YangNode:
     This object will be returned by get_schema_node_from_libyang()
     """
 
+    __slots__ = ("libyang_node", "real_data_path", "real_schema_path", "module")
+
     def __init__(self, libyang_node, real_schema_path, real_data_path, module):
         self.libyang_node = libyang_node
         self.real_data_path = real_data_path
@@ -57,9 +74,48 @@ class YangNode:
     def __repr__(self):
         return f"<InternalVoodooNode: {self.real_data_path} - {id(self)}>"
 
+    # The commonly used libyang methods are forwarded explicitly, this avoids the
+    # cost of a failed attribute lookup followed by __getattr__ on each call.
+    def nodetype(self):
+        return self.libyang_node.nodetype()
+
+    def type(self):
+        return self.libyang_node.type()
+
+    def name(self):
+        return self.libyang_node.name()
+
+    def presence(self):
+        return self.libyang_node.presence()
+
+    def is_key(self):
+        return self.libyang_node.is_key()
+
+    def default(self):
+        return self.libyang_node.default()
+
+    def keys(self):
+        return self.libyang_node.keys()
+
+    def description(self):
+        return self.libyang_node.description()
+
+    def extensions(self):
+        return self.libyang_node.extensions()
+
+    def get_extension(self, *args, **kwargs):
+        return self.libyang_node.get_extension(*args, **kwargs)
+
+    def schema_path(self):
+        return self.libyang_node.schema_path()
+
+    def data_path(self):
+        return self.libyang_node.data_path()
+
     def __getattr__(self, attr):
-        if attr in ("real_schema_path", "real_data_path", "module"):
-            return getattr(self, attr)
+        if attr in YangNode.__slots__:
+            # an unset slot - avoid recursing into libyang_node
+            raise AttributeError(attr)
         return getattr(self.libyang_node, attr)
 
 
@@ -110,8 +166,8 @@ class Utils:
     LOG_ERROR = logging.ERROR
     LOG_TRACE = 7
 
-    LOOKS_LIKE_A_FLOAT = re.compile(r"^\d+\.\d+$")
-    LOOKS_LIKE_A_NUMBER = re.compile(r"^\d+$")
+    LOOKS_LIKE_A_FLOAT = TypeDescriptor.LOOKS_LIKE_A_FLOAT
+    LOOKS_LIKE_A_NUMBER = TypeDescriptor.LOOKS_LIKE_A_NUMBER
     LAST_LEAF_AND_PREDICTAES = re.compile(r"(.*/)([A-Za-z\.]+[A-Za-z0-9_:-]*)(\[.*\])$")
     PREDICATE_KEY_VALUES_SINGLE = re.compile(r"\[([A-z\.]+[A-z0-9_\-]*)='([^']*)'\]")
     PREDICATE_KEY_VALUES_DOUBLE = re.compile(r"\[([A-z\.]+[A-z0-9_\-]*)=\"([^\"]*)\"\]")
@@ -122,6 +178,37 @@ class Utils:
     MODULE_AND_LEAF_REGEX = re.compile(r"/([A-Za-z0-9_-]+:)?([A-Za-z0-9_-]+)")
     EXTRACT_ALL_KEYS = re.compile(r"(\[[\.A-Z0-9a-z_-]+\s*=\s*(?P<quote>['\"]).*?(?P=quote)\s*\])")
 
+    @staticmethod
+    def split_data_path(path):
+        """
+        Split a data path into the parent path and the last component, taking care of any
+        slashes within the predicates.
+
+        /path/abc/def[g='s/f']/xyz  -> ("/path/abc/def[g='s/f']", "xyz")
+        /path/abc/def[g='s/f']      -> ("/path/abc", "def[g='s/f']")
+        """
+        idx = path.rfind("/")
+        last = path[idx:]
+        if "[" not in last and "'" not in last and '"' not in last:
+            return path[:idx], path[idx + 1 :]
+
+        quote = None
+        depth = 0
+        idx = -1
+        for (i, char) in enumerate(path):
+            if quote:
+                if char == quote:
+                    quote = None
+            elif char in ("'", '"'):
+                quote = char
+            elif char == "[":
+                depth += 1
+            elif char == "]":
+                depth -= 1
+            elif char == "/" and depth == 0:
+                idx = i
+        return path[:idx], path[idx + 1 :]
+
     @staticmethod
     def convert_path_to_schema_path(path, module):
         """
@@ -171,10 +258,23 @@ class Utils:
     @staticmethod
     def get_yang_type_from_path(context, schema_path, value, child_attr=None):
         if child_attr:
-            _, schema_path, node_schema, _ = Utils._find_child_schema_node(context, schema_path, child_attr)
+            entry = Utils._find_child_schema_index_entry(context, schema_path, child_attr)
         else:
+            entry = context.schemaindex.get(schema_path)
+        if entry is None:
             node_schema = next(context.schemactx.find_path(schema_path))
-        return Utils.get_yang_type(node_schema.type(), value, schema_path)
+            return Utils.get_yang_type(node_schema.type(), value, schema_path)
+        return entry.type_descriptor.get_yang_type(value, entry.schema_path)
+
+    @staticmethod
+    def get_type_descriptor(context, node_schema) -> TypeDescriptor:
+        """
+        Return the TypeDescriptor for a YangNode, cached on the schema index entry.
+        """
+        entry = context.schemaindex.get(node_schema.real_schema_path)
+        if entry is None:
+            return TypeDescriptor(node_schema.type())
+        return entry.type_descriptor
 
     def get_yang_type(
         node_schema: LibyangSchemaNode,
@@ -199,78 +299,20 @@ class Utils:
           node.type().base()
 
 
-        Unless we find a Union (11) or leafref (9) then we can just map directly.
+        Unless we find a Union (11) or leafref (9) then we can just map directly. Leafrefs are followed
+        and unions are flattened (including unions of unions and unions containing leafrefs), see
+        TypeDescriptor. Where a schema index entry is available prefer the TypeDescriptor cached on
+        the entry (get_yang_type_from_path/get_type_descriptor) to rebuilding it for each value.
 
         raises:
             ValueNotMappedToType
         """
 
-        base_type = node_schema.base()
-        if base_type in Types.LIBYANG_MAPPING:
-            return Types.LIBYANG_MAPPING[base_type]
-
-        if base_type == 9:  # LEAF REF
-            base_type = node_schema.leafref_type().base()
-            node_schema = node_schema.leafref_type()
-            if base_type in Types.LIBYANG_MAPPING:
-                return Types.LIBYANG_MAPPING[base_type]
-
-        if base_type == 11:  # Uninon
-            """
-            Note: for sysrepo if we are a union of enumerations and other types
-            then we must set the data as sr.SR_ENUM_T if it matches the enumeration.
-            e.g. leaf666/type6
-            """
-
-            u_types = []
-            for union_type in node_schema.union_types():
-                if union_type.base() == 11:
-                    raise NotImplementedError("Union containing unions not supported (see README.md)")
-                elif union_type.base() == 9:
-                    raise NotImplementedError("Union containing leafrefs not supported (see README.md)")
-                elif union_type.base() == 6:
-                    # TODO: we need to lookup enumerations
-                    for (val, validx) in union_type.enums():
-                        if str(val) == str(value):
-                            return Types.DATA_ABSTRACTION_MAPPING["ENUM"]
-                u_types.append(union_type.base())
-
-            if 10 in u_types and isinstance(value, str):
-                return Types.DATA_ABSTRACTION_MAPPING["STRING"]
-            elif Utils.LOOKS_LIKE_A_FLOAT.match(str(value)):
-                return Types.DATA_ABSTRACTION_MAPPING["DECIMAL64"]
-            elif Utils.LOOKS_LIKE_A_NUMBER.match(str(value)):
-                return Utils._find_best_number_type(u_types, int(value))
-            if value:
-                raise Errors.ValueNotMappedToTypeUnion(xpath, value)
-        if default_to_string:
-            return Types.DATA_ABSTRACTION_MAPPING["STRING"]
-
-        if value:
-            raise Errors.ValueNotMappedToType(xpath, value)
-
-        msg = "Unable to handle the yang type at path " + str(xpath)
-        msg += " (this may be listed as a corner-case on the README already"
-        raise NotImplementedError(msg)
+        return TypeDescriptor(node_schema).get_yang_type(value, xpath, default_to_string)
 
     @staticmethod
     def _find_best_number_type(u_types, value):
-        if 12 in u_types and value >= -127 and value <= 128:
-            return Types.DATA_ABSTRACTION_MAPPING["INT8"]
-        elif 13 in u_types and value >= 0 and value <= 255:
-            return Types.DATA_ABSTRACTION_MAPPING["UINT8"]
-        elif 14 in u_types and value >= -32768 and value <= 32767:
-            return Types.DATA_ABSTRACTION_MAPPING["INT16"]
-        elif 15 in u_types and value >= 0 and value <= 65535:
-            return Types.DATA_ABSTRACTION_MAPPING["UINT16"]
-        elif 16 in u_types and value >= -2147483648 and value <= 2147483647:
-            return Types.DATA_ABSTRACTION_MAPPING["INT32"]
-        elif 17 in u_types and value >= 0 and value <= 4294967295:
-            return Types.DATA_ABSTRACTION_MAPPING["UINT32"]
-        elif 19 in u_types and value >= 0:
-            return Types.DATA_ABSTRACTION_MAPPING["UINT64"]
-        else:
-            return Types.DATA_ABSTRACTION_MAPPING["INT64"]
+        return TypeDescriptor.find_best_number_type(u_types, value)
 
     @staticmethod
     def encode_xpath_predicate(k, v):
@@ -380,8 +422,7 @@ class Utils:
     ) -> Generator[str, None, None]:
         """
         Allow methods to implement searching across all loaded yang models to find augmented
-        nodes. In future a mapping could be implemented here to speed lookups if the number
-        of yang models augmenting nodes in grows to high.
+        nodes. The order is significant, the top module takes precedence (see SchemaIndex).
         """
         yield context.top_module
         for yang_model in context.other_yang_modules:
@@ -397,6 +438,9 @@ class Utils:
         the same. If we augment other yang models they will retain their own module
         name for their component of the schema.
 
+        The lookup is made against the schema index (built when connecting or adding
+        a yang module) rather than searching each yang module with libyang.
+
         Args:
             context: Voodoo VoodooContext
             the_real_schema_path: the schema path without this attribute
@@ -408,23 +452,41 @@ class Utils:
             node_schema,
             yang_module_name,
         """
-        for yang_module_name in Utils.recurse_all_available_yang_models(context):
-            real_attribute_name = Utils.get_original_name(the_real_schema_path, context, attr)
-            real_schema_path = f"{the_real_schema_path}/{yang_module_name}:{real_attribute_name}"
-            try:
-                node_schema = next(context.schemactx.find_path(real_schema_path))
-                return (
-                    real_attribute_name,
-                    real_schema_path,
-                    node_schema,
-                    yang_module_name,
-                )
-            except libyang.util.LibyangError:
-                pass
-        raise Errors.NonExistingNode(
-            f"{the_real_schema_path}/***********:{attr}",
-            "\n  - ".join(list(Utils.recurse_all_available_yang_models(context))),
-        )
+        entry = Utils._find_child_schema_index_entry(context, the_real_schema_path, attr)
+        return (entry.name, entry.schema_path, entry.libyang_node, entry.module)
+
+    @staticmethod
+    def _find_child_schema_index_entry(context: VoodooContext, the_real_schema_path: str, attr: str):
+        entry = context.schemaindex.get_child(the_real_schema_path, attr)
+        if entry is None:
+            raise Errors.NonExistingNode(
+                f"{the_real_schema_path}/***********:{attr}",
+                "\n  - ".join(list(Utils.recurse_all_available_yang_models(context))),
+            )
+        return entry
+
+    @staticmethod
+    def _get_cached_schema_entry(context: VoodooContext, node: Union[PlainObject, YangNode], attr: str):
+        """
+        Resolve the schema for a child attribute of a node (or the node itself if attr is empty).
+
+        The resolution is independent of the data path (i.e. of any list keys) so it is cached in
+        context.schemacache keyed by the schema path. This means every list element shares one
+        schema lookup regardless of how many elements are iterated.
+        """
+        schema_cache_entry = f"{node.real_schema_path}!{attr}"
+        entry = context.schemacache.get(schema_cache_entry)
+        if entry is not None:
+            return entry
+
+        if attr:
+            entry = Utils._find_child_schema_index_entry(context, node.real_schema_path, attr)
+        else:
+            entry = context.schemaindex.get(node.real_schema_path)
+            if entry is None:
+                raise Errors.NonExistingNode(f"{node.real_schema_path}/{node.module}:{attr}")
+        context.schemacache.add_entry(schema_cache_entry, entry)
+        return entry
 
     @staticmethod
     def get_yangnode(
@@ -451,7 +513,11 @@ class Utils:
          - values paths only require the yang module prefix at the first component.
            (unless the schema was augments by another yang model)
 
-        The cache entries are built deliberately not to be a valid path (designated by the %).
+        There are two levels of caching, the schema resolution (libyang node, real name and module) is
+        cached per schema path in context.schemacache. The YangNode is then composed from the cached
+        schema entry and the data path - these YangNode's are memoised in the bounded context.datacache.
+
+        The datacache entries are built deliberately not to be a valid path (designated by the !).
         This is done so that we can lookup the cache without having to carry out processing of predicates.
 
         Attributes:
@@ -473,45 +539,32 @@ class Utils:
 
         cache_entry = f"!{node.real_data_path}{attr}!{predicates}!{node.real_schema_path}"
 
-        if context.schemacache.is_path_cached(cache_entry):
-            return context.schemacache.get_item_from_cache(cache_entry)
-
-        module = node.module
-        real_schema_path = node.real_schema_path
-        if not attr == "":
-            (
-                real_attribute_name,
-                real_schema_path,
-                node_schema,
-                module,
-            ) = Utils._find_child_schema_node(context, real_schema_path, attr)
+        item = context.datacache.get(cache_entry)
+        if item is not None:
+            return item
 
+        entry = Utils._get_cached_schema_entry(context, node, attr)
         if not attr:
-            try:
-                node_schema = next(context.schemactx.find_path(real_schema_path))
-            except libyang.util.LibyangError:
-                raise Errors.NonExistingNode(f"{node.real_schema_path}/{module}:{attr}")
-
-        if attr:
-            real_data_path = node.real_data_path
-            if node_schema.nodetype() not in (
-                Types.LIBYANG_NODETYPE["CHOICE"],
-                Types.LIBYANG_NODETYPE["CASE"],
-            ):
-                if not node.real_data_path:
-                    real_data_path = f"/{module}:{real_attribute_name}{predicates}"
-                elif node.module != module:
-                    real_data_path += f"/{module}:{real_attribute_name}{predicates}"
-                else:
-                    real_data_path += f"/{real_attribute_name}{predicates}"
-
-        if not attr:
-            real_data_path = node.real_data_path + predicates
-            real_schema_path = node.real_schema_path
-            node_schema = node
-
-        item = YangNode(node_schema, real_schema_path, real_data_path, module)
-        context.schemacache.add_entry(cache_entry, item)
+            item = YangNode(node, node.real_schema_path, node.real_data_path + predicates, node.module)
+        elif not entry.is_data_node:
+            item = YangNode(entry.libyang_node, entry.schema_path, node.real_data_path, entry.module)
+        elif not node.real_data_path:
+            item = YangNode(entry.libyang_node, entry.schema_path, f"/{entry.qualified_name}{predicates}", entry.module)
+        elif node.module != entry.module:
+            item = YangNode(
+                entry.libyang_node,
+                entry.schema_path,
+                f"{node.real_data_path}/{entry.qualified_name}{predicates}",
+                entry.module,
+            )
+        else:
+            item = YangNode(
+                entry.libyang_node,
+                entry.schema_path,
+                f"{node.real_data_path}/{entry.name}{predicates}",
+                entry.module,
+            )
+        context.datacache.add_entry(cache_entry, item)
 
         return item
 
@@ -547,13 +600,12 @@ class Utils:
         real_values = []
         keys = Utils.get_keys_from_a_node(node)
 
-        i = 0
         if isinstance(values[0], tuple):
             values = values[0]
 
         if len(keys) != len(values):
             raise Errors.ListWrongNumberOfKeys(node.real_data_path, len(keys), len(values))
-        for value in values:
+        for (i, value) in enumerate(values):
             key_yang_type = Utils.get_yang_type_from_path(context, node.real_schema_path, value, keys[i])
             real_values.append((value, key_yang_type))
 
@@ -0,0 +1,122 @@
+import os
+import threading
+import time
+from typing import Iterable
+
+import libyang
+
+
+class ContextPool:
+
+    """
+    A process-wide pool of libyang contexts, keyed by the yang location and the set of yang modules
+    loaded into the context, so that parsing the yang modules from disk happens once per thread rather
+    than for every Expander or DataAccess session.
+
+    Example usage:
+
+        ctx = DEFAULT_CONTEXT_POOL.get("yang", ["integrationtest"])
+        session.connect("integrationtest", yang_ctx=ctx)
+
+    Contexts are shared, the caller must not load additional modules into a context obtained from
+    the pool (instead ask the pool for a context with the full set of modules).
+
+    libyang contexts are not thread-safe, so each thread is given a context of it's own (a thread pool
+    parses the yang modules once for each thread). A context, and any data tree built with it (e.g. a
+    DataAccess session), must only be used by one thread at a time. The contexts of threads which have
+    finished are released when the next context is created.
+
+    When check_mtime is set the modification time of the newest .yang file in the yang location is
+    checked (at most once every mtime_interval seconds for each yang location) and a new context is
+    created if any yang file has changed on disk, invalidate() can be used to drop contexts explicitly.
+    """
+
+    def __init__(self, check_mtime: bool = True, mtime_interval: float = 1, clock=time.monotonic):
+        self.check_mtime = check_mtime
+        self.mtime_interval = mtime_interval
+        self.clock = clock
+        self.contexts = {}
+        self.mtimes = {}
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.contexts)
+
+    @staticmethod
+    def _get_key(yang_location: str, modules: Iterable[str]):
+        if yang_location:
+            yang_location = os.path.abspath(yang_location)
+        return (threading.get_ident(), yang_location, tuple(sorted(set(modules))))
+
+    @staticmethod
+    def get_yang_mtime(yang_location: str) -> float:
+        """
+        Return the modification time of the newest yang file (or the directory itself) within the yang location.
+        """
+        if not yang_location or not os.path.isdir(yang_location):
+            return 0
+        mtime = os.stat(yang_location).st_mtime
+        with os.scandir(yang_location) as entries:
+            for entry in entries:
+                if entry.name.endswith(".yang"):
+                    mtime = max(mtime, entry.stat().st_mtime)
+        return mtime
+
+    def get(self, yang_location: str, modules: Iterable[str]) -> libyang.Context:
+        """
+        Return a libyang context for the yang location with every module loaded, the context is created
+        the first time it is requested by the calling thread (or after the yang files have changed/the
+        context was invalidated).
+        """
+        modules = list(modules)
+        key = self._get_key(yang_location, modules)
+        mtime = self._get_checked_mtime(key[1]) if self.check_mtime else 0
+
+        with self.lock:
+            cached = self.contexts.get(key)
+            if cached and cached[1] == mtime:
+                return cached[0]
+
+            self._release_finished_threads()
+            ctx = libyang.Context(yang_location)
+            for module in modules:
+                ctx.load_module(module)
+            self.contexts[key] = (ctx, mtime)
+            return ctx
+
+    def _get_checked_mtime(self, yang_location: str) -> float:
+        """
+        Return the modification time of the yang location, only scanning the yang files again once
+        mtime_interval seconds have passed since they were last scanned.
+        """
+        now = self.clock()
+        checked = self.mtimes.get(yang_location)
+        if checked and now - checked[0] < self.mtime_interval:
+            return checked[1]
+        mtime = self.get_yang_mtime(yang_location)
+        self.mtimes[yang_location] = (now, mtime)
+        return mtime
+
+    def _release_finished_threads(self):
+        alive = {thread.ident for thread in threading.enumerate()}
+        for key in list(self.contexts):
+            if key[0] not in alive:
+                del self.contexts[key]
+
+    def invalidate(self, yang_location: str = None):
+        """
+        Drop the pooled contexts (of every thread) for a yang location, or every context if no yang location
+        is given. Sessions which already hold a context continue to use it.
+        """
+        if yang_location:
+            yang_location = os.path.abspath(yang_location)
+        with self.lock:
+            for key in list(self.contexts):
+                if yang_location is None or key[1] == yang_location:
+                    del self.contexts[key]
+            for location in list(self.mtimes):
+                if yang_location is None or location == yang_location:
+                    del self.mtimes[location]
+
+
+DEFAULT_CONTEXT_POOL = ContextPool()
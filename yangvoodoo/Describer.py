@@ -103,6 +103,15 @@ class Yang2Text(Expander):
         super().__init__(yang_module, log)
         self.display = Yang2Text.Display
 
+    def get_worker_state(self):
+        state = super().get_worker_state()
+        # options may be an argparse namespace (holding open files), only the rendering options are copied
+        state["options"] = Yang2Text.Options()
+        for (option, default) in vars(state["options"]).items():
+            setattr(state["options"], option, type(default)(getattr(self.options, option, default)))
+        state["display"] = self.display
+        return state
+
     def callback_write_title(self, module):
         if self.options.hide_title:
             return
@@ -245,7 +254,7 @@ class Yang2Text(Expander):
             self.result.write(f"{node.name()} {self.display.DIM} {self.display.MISSING} {self.display.NORMAL}")
         if not self.options.hide_types:
             self._show_types(node)
-        self._show_paths(node.schema_path(), "".join(self.data_path_trail))
+        self._show_paths(node.schema_path(), self.data_path_trail.path)
         self._show_when(node)
         self._show_description(node.description)
 
@@ -263,6 +272,9 @@ class Yang2Text(Expander):
     def callback_close_containing_node(self, node):
         self.close_indent()
 
+    def callback_write_placeholder(self, node, node_id):
+        self.result.write(f"{self.get_blank_indent(6)}{self.display.DIM}...{self.display.NORMAL}{self.display.NEWLINE}")
+
     def callback_open_leaflist(self, node, count, node_id):
         self.result.write(f"{self.open_indent()} {self.display.NORMAL}{self.display.LEAF_LIST} {node.name()} - ")
         self.result.write(f"- {self.display.DIM}({count} item{self.pluralise(count)}){self.display.NORMAL}")
@@ -1,7 +1,10 @@
 #!/usr/bin/env python3
 # from dictdiffer import diff, patch, swap, revert
+from collections import OrderedDict
 from dictdiffer import diff
 import yangvoodoo
+from yangvoodoo import Types
+from yangvoodoo.Common import Utils
 
 
 class DiffIterator:
@@ -154,3 +157,184 @@ class DiffIterator:
                 path, start_filter, end_filter
             ):
                 yield (path, old, new, op)
+
+
+class DataTreeDiffIterator:
+
+    """
+    This class returns a diffset for a particular part of a dataset by walking the two libyang
+    data trees in lockstep, rather than comparing full dumps of both datasets.
+
+    The return value is a generator of
+        (path, old-value, new-value, operation)
+
+    Example usage:
+
+        differ = DataTreeDiffIterator(session_A, session_B, start_filter='/integrationtest:diffs')
+
+    dataset_a and dataset_b may be a VoodooNode or a data abstraction layer (i.e. a DataAccess
+    session). The methods (all, remove, add, modified, remove_modify_then_add, modify_then_add
+    and remove_then_modify) mirror DiffIterator.
+
+    Children are matched by their data path (list elements carry their keys in the predicates)
+    and subtrees which cannot match the start filter are never visited. Nothing is held beyond
+    the children of the nodes on the current branch; each call re-walks the trees.
+
+    Where both data abstraction layers provide subtree_hash() identical containers and list
+    elements are skipped without being walked.
+
+    The order of results follows the data tree of dataset_a (modifies and removes) followed by
+    any nodes only present in dataset_b (adds) at each level.
+    """
+
+    ADD = DiffIterator.ADD
+    MODIFY = DiffIterator.MODIFY
+    REMOVE = DiffIterator.REMOVE
+
+    CONTAINING_NODETYPES = (
+        Types.LIBYANG_NODETYPE["CONTAINER"],
+        Types.LIBYANG_NODETYPE["LIST"],
+    )
+
+    def __init__(self, dataset_a, dataset_b, start_filter="", end_filter=""):
+        self.a = self._get_dal(dataset_a)
+        self.b = self._get_dal(dataset_b)
+        self.modules = list(OrderedDict.fromkeys(self._get_modules(dataset_a) + self._get_modules(dataset_b)))
+        self.start_filter = start_filter
+        self.end_filter = end_filter
+        self.use_subtree_hash = True
+
+    @staticmethod
+    def _get_dal(dataset):
+        if isinstance(dataset, yangvoodoo.VoodooNode.Node):
+            return dataset._context.dal
+        return dataset
+
+    @staticmethod
+    def _get_modules(dataset):
+        if isinstance(dataset, yangvoodoo.VoodooNode.Node):
+            context = dataset._context
+        else:
+            context = getattr(dataset, "context", None)
+        if context is None:
+            return [dataset.module]
+        return list(Utils.recurse_all_available_yang_models(context))
+
+    def _get_children(self, dal, path):
+        """
+        Return an ordered dictionary of {path: (value, nodetype)} for the immediate children
+        of the path (or the top-level nodes of each yang module when path is empty).
+        """
+        if path:
+            queries = [f"{path}/*"]
+        else:
+            queries = [f"/{module}:*" for module in self.modules]
+
+        children = OrderedDict()
+        for query in queries:
+            for (child_path, value, nodetype) in dal.get_xpath_values(query):
+                children[child_path] = (value, nodetype)
+        return children
+
+    @staticmethod
+    def _is_relevant(path, filters):
+        """
+        A path is relevant if it is within the start filter, or it is an ancestor of the
+        start filter (and must be descended to reach it).
+        """
+        for (start_filter, _) in filters:
+            if not (path.startswith(start_filter) or start_filter.startswith(path)):
+                return False
+        return True
+
+    @staticmethod
+    def _is_filtered(path, filters):
+        for (start_filter, end_filter) in filters:
+            if DiffIterator.is_filtered(path, start_filter, end_filter):
+                return True
+        return False
+
+    def _is_reported(self, path, nodetype, filters):
+        """
+        List elements are not reported in their own right (as with the dump used by DiffIterator),
+        the keys of the list element are reported instead.
+        """
+        return nodetype != Types.LIBYANG_NODETYPE["LIST"] and not self._is_filtered(path, filters)
+
+    def _is_identical(self, path):
+        if not self.use_subtree_hash:
+            return False
+        try:
+            return self.a.subtree_hash(path) == self.b.subtree_hash(path)
+        except NotImplementedError:
+            self.use_subtree_hash = False
+        return False
+
+    def _walk(self, path, filters, ops):
+        children_a = self._get_children(self.a, path)
+        children_b = self._get_children(self.b, path)
+
+        for (child_path, (old, nodetype)) in children_a.items():
+            if not self._is_relevant(child_path, filters):
+                continue
+            if child_path not in children_b:
+                if self.REMOVE in ops:
+                    yield from self._walk_one_side(self.a, child_path, old, nodetype, filters, self.REMOVE)
+                continue
+
+            (new, _) = children_b[child_path]
+            if old != new and self.MODIFY in ops and self._is_reported(child_path, nodetype, filters):
+                yield (child_path, old, new, self.MODIFY)
+            if nodetype in self.CONTAINING_NODETYPES and not self._is_identical(child_path):
+                yield from self._walk(child_path, filters, ops)
+
+        if self.ADD not in ops:
+            return
+        for (child_path, (new, nodetype)) in children_b.items():
+            if child_path not in children_a and self._is_relevant(child_path, filters):
+                yield from self._walk_one_side(self.b, child_path, new, nodetype, filters, self.ADD)
+
+    def _walk_one_side(self, dal, path, value, nodetype, filters, op):
+        """
+        Yield the node and all of it's descendants as either added or removed.
+        """
+        if self._is_reported(path, nodetype, filters):
+            if op == self.ADD:
+                yield (path, None, value, op)
+            else:
+                yield (path, value, None, op)
+
+        if nodetype not in self.CONTAINING_NODETYPES:
+            return
+        for (child_path, (child_value, child_nodetype)) in self._get_children(dal, path).items():
+            if self._is_relevant(child_path, filters):
+                yield from self._walk_one_side(dal, child_path, child_value, child_nodetype, filters, op)
+
+    def _diff(self, start_filter, end_filter, ops):
+        filters = [(self.start_filter, self.end_filter), (start_filter, end_filter)]
+        yield from self._walk("", filters, ops)
+
+    def all(self, start_filter="", end_filter=""):
+        yield from self._diff(start_filter, end_filter, (self.ADD, self.MODIFY, self.REMOVE))
+
+    def remove(self, start_filter="", end_filter=""):
+        yield from self._diff(start_filter, end_filter, (self.REMOVE,))
+
+    def add(self, start_filter="", end_filter=""):
+        yield from self._diff(start_filter, end_filter, (self.ADD,))
+
+    def modified(self, start_filter="", end_filter=""):
+        yield from self._diff(start_filter, end_filter, (self.MODIFY,))
+
+    def remove_modify_then_add(self, start_filter="", end_filter=""):
+        yield from self.remove(start_filter, end_filter)
+        yield from self.modified(start_filter, end_filter)
+        yield from self.add(start_filter, end_filter)
+
+    def modify_then_add(self, start_filter="", end_filter=""):
+        yield from self.modified(start_filter, end_filter)
+        yield from self.add(start_filter, end_filter)
+
+    def remove_then_modify(self, start_filter="", end_filter=""):
+        yield from self.remove(start_filter, end_filter)
+        yield from self.modified(start_filter, end_filter)
@@ -180,6 +180,29 @@ class PathIsNotALeaf(Exception):
         super().__init__(message)
 
 
+class UnsupportedBatchOperation(Exception):
+    def __init__(self, op):
+        message = "The batch operation %s is not supported (use set, create, delete, add or remove)." % (op)
+
+        super().__init__(message)
+
+
+class InvalidSnapshotError(Exception):
+    def __init__(self, snapshot):
+        message = "The snapshot %s is not active (it has been released or an earlier snapshot was reverted)." % (
+            snapshot
+        )
+
+        super().__init__(message)
+
+
+class SessionExpiredError(Exception):
+    def __init__(self, session_id):
+        message = f"The session {session_id} is not held by the session store, the full payload must be provided."
+
+        super().__init__(message)
+
+
 class NodeProvidedIsNotAContainer(Exception):
     def __init__(self):
         message = "Require a containing node not a leaf"
@@ -207,3 +230,20 @@ class CannotOperateOnCompositeKeyListError(Exception):
         message = f"The items() method can only be used on a list with a single key.\n\nXPATH: {xpath}"
 
         super().__init__(message)
+
+
+class OutputWrittenToWriterError(Exception):
+    def __init__(self):
+        message = "The output has been streamed to a writer, it is not held in memory."
+
+        super().__init__(message)
+
+
+class ChangeJournalNotRecordingError(Exception):
+    def __init__(self):
+        message = (
+            "The changes since the checkpoint were not recorded, use record_changes() (or take a snapshot) "
+            "before making the changes."
+        )
+
+        super().__init__(message)
@@ -0,0 +1,242 @@
+from typing import List, Tuple
+from yangvoodoo.Errors import ChangeJournalNotRecordingError
+
+
+class ChangeJournal:
+
+    """
+    A record of the changes made through a data abstraction layer.
+
+    Each entry is a tuple of (op, xpath, value, created) where op is one of set, create, delete,
+    add, remove (the operations understood by DataAccess.apply_batch) or the name of the method
+    which merged/loaded data - merges, advanced_merges and loads record the payload as the value,
+    merge, advanced_merge and load record the filename. The created field is the XPATH of the
+    top-most data node the change created (i.e. a set of a leaf within a new list element records
+    the list element), or None if nothing was created.
+
+    Every change is counted, but the entries themselves are only kept while recording, so a long
+    running session does not accumulate every change it has ever made. Recording is started and
+    stopped with start_recording()/stop_recording(), which may be nested (e.g. one for each active
+    snapshot).
+
+    A checkpoint is an opaque position within the journal, checkpoints remain valid after the
+    journal is cleared (i.e. on commit) - changes made before the journal was cleared are simply
+    no longer returned.
+
+    Example usage:
+
+        journal.start_recording()
+        checkpoint = journal.checkpoint()
+        ... make changes ...
+        journal.changes_since(checkpoint, coalesce=True)
+    """
+
+    SET = "set"
+    CREATE = "create"
+    DELETE = "delete"
+    ADD = "add"
+    REMOVE = "remove"
+    MERGE = "merges"
+    MERGE_FILE = "merge"
+    ADVANCED_MERGE = "advanced_merges"
+    ADVANCED_MERGE_FILE = "advanced_merge"
+    LOAD = "loads"
+    LOAD_FILE = "load"
+
+    MERGES = (MERGE, MERGE_FILE, ADVANCED_MERGE, ADVANCED_MERGE_FILE)
+    LOADS = (LOAD, LOAD_FILE)
+
+    def __init__(self):
+        self.entries = []
+        self.position = 0
+        self.cleared = 0
+        self.start = 0
+        self.recorders = 0
+
+    def __len__(self):
+        """
+        Return the number of changes made since the journal was last cleared.
+        """
+        return self.position - self.cleared
+
+    @property
+    def recording(self) -> bool:
+        return self.recorders > 0
+
+    def start_recording(self):
+        if not self.recorders:
+            self.entries = []
+            self.start = self.position
+        self.recorders += 1
+
+    def stop_recording(self):
+        if self.recorders:
+            self.recorders -= 1
+        if not self.recorders:
+            self.entries = []
+
+    def record(self, op, xpath, value=None, created=None):
+        self.position += 1
+        if self.recorders:
+            self.entries.append((op, xpath, value, created))
+
+    def checkpoint(self) -> int:
+        return self.position
+
+    def rewind(self, checkpoint: int):
+        """
+        Forget the changes made after the checkpoint because they have been undone (see revert),
+        checkpoints taken after it are no longer valid. Nothing is forgotten unless every change
+        since the checkpoint was kept and the journal has not been cleared since.
+        """
+        if self.recorders and self.start <= checkpoint <= self.position:
+            del self.entries[checkpoint - self.start :]
+            self.position = checkpoint
+
+    def clear(self):
+        self.cleared = self.position
+        self.start = self.position
+        self.entries = []
+
+    def changes_since(self, checkpoint: int = 0, coalesce: bool = False) -> List[Tuple[str, str, object]]:
+        """
+        Return the list of (op, xpath, value) changes recorded after the checkpoint, optionally
+        coalesced into the smallest equivalent set of changes.
+
+        ChangeJournalNotRecordingError is raised if changes were made after the checkpoint which
+        were not recorded.
+        """
+        since = max(checkpoint, self.cleared)
+        if since == self.position:
+            return []
+        if not self.recorders or since < self.start:
+            raise ChangeJournalNotRecordingError()
+        entries = self.entries[since - self.start :]
+        if coalesce:
+            entries = self.coalesce(entries)
+        return [(op, xpath, value) for (op, xpath, value, _) in entries]
+
+    @staticmethod
+    def is_within(xpath, ancestor_xpath):
+        """
+        Return True if the xpath is the ancestor_xpath, or a descendant of it (including list
+        elements of a list).
+        """
+        if not xpath.startswith(ancestor_xpath):
+            return False
+        return len(xpath) == len(ancestor_xpath) or xpath[len(ancestor_xpath)] in "/["
+
+    @staticmethod
+    def ancestors(xpath):
+        """
+        Yield each ancestor of the xpath (starting from the root) and then the xpath itself, the
+        list is an ancestor of each of it's list elements.
+
+        /a/list[k='1/2']/b yields /a, /a/list, /a/list[k='1/2'], /a/list[k='1/2']/b
+        """
+        quote = None
+        depth = 0
+        for (index, char) in enumerate(xpath):
+            if quote:
+                if char == quote:
+                    quote = None
+            elif char in ("'", '"'):
+                quote = char
+            elif char == "[":
+                if depth == 0 and index and xpath[index - 1] != "]":
+                    yield xpath[:index]
+                depth += 1
+            elif char == "]":
+                depth -= 1
+            elif char == "/" and depth == 0 and index:
+                yield xpath[:index]
+        yield xpath
+
+    @staticmethod
+    def coalesce(entries):
+        """
+        Reduce journal entries to the smallest equivalent set of changes.
+
+         - a set/create supersedes an earlier set/create of the same xpath
+         - a delete discards earlier changes to the xpath and its descendants, if the xpath was
+           created within the entries (directly, or implicitly by a set of a descendant) the
+           delete is discarded too (set-then-delete is a no-op)
+         - an add/remove supersedes an earlier add/remove of the same leaf-list value, adding a
+           new value and then removing it is a no-op
+         - a load/loads replaces the entire data tree, discarding every earlier change
+         - a merge/merges (or advanced merge) may change anything, so earlier changes are never
+           discarded by later ones
+
+        Entries are visited once, newest first, looking up the xpath (and it's ancestors) of each
+        entry in dictionaries of the later changes which have been retained.
+        """
+        result = []
+        latest = {}
+        items = {}
+        deleted = {}
+        for (op, xpath, value, created) in reversed(entries):
+            if op in ChangeJournal.LOADS:
+                result.append((op, xpath, value, created))
+                break
+            if op in ChangeJournal.MERGES:
+                result.append((op, xpath, value, created))
+                (latest, items, deleted) = ({}, {}, {})
+                continue
+
+            deleted_by = next((path for path in ChangeJournal.ancestors(xpath) if path in deleted), None)
+            if deleted_by is not None:
+                if created is not None and ChangeJournal.is_within(deleted_by, created):
+                    # The deleted data did not exist before this entry, the delete only needs to
+                    # remove what was created - nothing at all if the deleted node was created.
+                    index = deleted.pop(deleted_by)
+                    if created == deleted_by:
+                        result[index] = None
+                    else:
+                        result[index] = (ChangeJournal.CREATE, created, None, created)
+                        latest[created] = index
+                continue
+
+            if op in (ChangeJournal.SET, ChangeJournal.CREATE):
+                index = latest.get(xpath)
+                if index is not None:
+                    (later_op, _, later_value, later_created) = result[index]
+                    result[index] = (later_op, xpath, later_value, later_created or created)
+                    continue
+                latest[xpath] = len(result)
+            elif op == ChangeJournal.DELETE:
+                deleted[xpath] = len(result)
+            elif op in (ChangeJournal.ADD, ChangeJournal.REMOVE):
+                index = items.get((xpath, value))
+                if index is not None:
+                    (later_op, _, _, later_created) = result[index]
+                    if later_op == op:
+                        result[index] = (later_op, xpath, value, later_created or created)
+                        continue
+                    if op == ChangeJournal.ADD and created is not None:
+                        result[index] = None
+                        del items[(xpath, value)]
+                        continue
+                    if op == ChangeJournal.ADD:
+                        continue
+                items[(xpath, value)] = len(result)
+            result.append((op, xpath, value, created))
+        return [entry for entry in reversed(result) if entry is not None]
+
+
+class Snapshot:
+
+    """
+    A handle returned by snapshot() which can be passed to revert() or compare().
+
+    position:   the length of the undo log when the snapshot was taken
+    checkpoint: the change journal checkpoint when the snapshot was taken
+    """
+
+    __slots__ = ("position", "checkpoint")
+
+    def __init__(self, position, checkpoint):
+        self.position = position
+        self.checkpoint = checkpoint
+
+    def __repr__(self):
+        return f"<Snapshot: {self.checkpoint}>"
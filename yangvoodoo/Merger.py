@@ -1,11 +1,12 @@
 import base64
 import json
 import logging
-from typing import Generator, List, Tuple
+from typing import Generator, List, Optional, Tuple, Union
 import libyang
 from yangvoodoo import DataAccess
 from yangvoodoo import Types
 from yangvoodoo.Common import Utils
+from yangvoodoo.ContextPool import DEFAULT_CONTEXT_POOL
 
 from yangvoodoo.Errors import InvalidPayloadError, InvalidChangeError
 
@@ -14,6 +15,24 @@ def base64_tostring(input_string):
     return base64.b64decode(input_string.encode("utf-8")).decode("utf-8")
 
 
+class LazyDumps:
+
+    """
+    Defer serialising a data tree until a log record is actually formatted, i.e.
+
+        log.info("Data tree: %s", LazyDumps(session))
+    """
+
+    __slots__ = ("session", "format")
+
+    def __init__(self, session: DataAccess, format: int = 2):
+        self.session = session
+        self.format = format
+
+    def __str__(self):
+        return self.session.dumps(self.format)
+
+
 class DataTreeChange:
 
     ACTION_SET = "set"
@@ -102,21 +121,23 @@ class DataTree:
         session = DataAccess()
         if not yang_model:
             yang_model = cls.get_root_yang_model(json_dict)
-        session.connect(yang_model, yang_location)
-        if yang_model in cls.ADDITIONAL_YANG_MODELS:
-            for yang_model in cls.ADDITIONAL_YANG_MODELS[yang_model]:
-                session.add_module(yang_model)
+        additional_yang_models = cls.ADDITIONAL_YANG_MODELS.get(yang_model, [])
+        yang_ctx = DEFAULT_CONTEXT_POOL.get(yang_location, [yang_model] + list(additional_yang_models))
+        session.connect(yang_model, yang_location, yang_ctx=yang_ctx)
+        for additional_yang_model in additional_yang_models:
+            session.add_module(additional_yang_model)
 
         return session
 
     @staticmethod
     def process_data_tree_against_libyang(
-        json_dict: dict,
+        json_dict: Union[dict, str],
         changes: List[DataTreeChange],
         yang_model: str = None,
         yang_location: str = None,
         log=logging.Logger,
-    ) -> Tuple[DataAccess, dict, List[DataTreeChange]]:
+        return_payload: bool = True,
+    ) -> Tuple[DataAccess, Optional[dict], List[DataTreeChange]]:
         """
         Load a yang model from a given payload Merge the changes to the base data tree. In this case if we are asked
         to merge in an action which violates the YANG model the exception will not be instantly raised but instead
@@ -130,20 +151,53 @@ class DataTree:
         old contents. The assumption is a UI would allow a user to delete the list element and then 'commit' or 'submit'
         the data. to force a full removal of the children of the list element.
 
+        When the data tree is handed on to an Expander (see Expander.attach_session) there is no need to
+        serialise it back to JSON, return_payload=False skips the dumps/json.loads round-trip and None is
+        returned in place of the payload.
+
         Args:
-            json_dict: A dcitionary matching the JSON encoded data for a YANG model.
+            json_dict: A dcitionary matching the JSON encoded data for a YANG model (or the JSON string itself).
             changes: A list of changes
             yang_location: A location to look for yang modles
             log: A python logger
+            return_payload: return the resulting data tree as a dictionary
 
         """
+        if isinstance(json_dict, str):
+            json_string = json_dict
+            if json_string and not yang_model:
+                json_dict = json.loads(json_string)
+        else:
+            json_string = json.dumps(json_dict) if json_dict else ""
         session = DataTree.connect_yang_model(json_dict, yang_model, yang_location)
         if json_dict:
             log.info("Loading initial JSON payload for %s...", session.module)
-            session.loads(json.dumps(json_dict), 2)
+            session.loads(json_string, 2)
         else:
             log.info("Initial JSON payload is empty for %s...", session.module)
 
+        DataTree.apply_changes(session, changes, log)
+
+        if not return_payload:
+            log.info("Final Data tree: %s", LazyDumps(session))
+            return session, None, []
+        if json_dict or changes:
+            payload = session.dumps(2)
+            log.info("Final Data tree: %s", payload)
+            return session, json.loads(payload), []
+        return session, {}, []
+
+    @staticmethod
+    def apply_changes(session: DataAccess, changes: List[DataTreeChange], log=logging.Logger):
+        """
+        Apply a list of changes to a session which already holds a data tree (see process_data_tree_against_libyang
+        for the handling of failed changes and list elements).
+
+        Args:
+            session: A connected DataAccess session.
+            changes: A list of changes
+            log: A python logger
+        """
         failed_xpaths = {}
         list_elements = {}
 
@@ -191,8 +245,3 @@ class DataTree:
                 session.create(xpath)
             elif list_elements[xpath] is False:
                 session.uncreate(xpath)
-
-        if json_dict or changes:
-            log.info("Final Data tree: %s", session.dumps(2))
-            return session, json.loads(session.dumps(2)), []
-        return session, {}, []
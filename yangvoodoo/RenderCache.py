@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+
+class RenderCache:
+
+    """
+    An on-disk cache of rendered output (e.g. Yang2Text), keyed by the checksum of the yang module, the
+    checksum of the data payload and the render options, so repeatedly rendering unchanged inputs only
+    has to read a file.
+
+    Example usage:
+
+        cache = RenderCache("/tmp/yang-on-a-page")
+        generator.process_cached(cache, payload, 1)
+
+    Entries are written to a temporary file and renamed into place, so a reader never sees a partially
+    written entry, and several processes may share a cache directory. When the entries exceed max_bytes
+    the least recently used entries are removed.
+    """
+
+    SUFFIX = ".render"
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def _describe(obj):
+        if isinstance(obj, type):
+            return f"{obj.__module__}.{obj.__qualname__}"
+        return vars(obj)
+
+    @classmethod
+    def get_key(cls, *parts) -> str:
+        """
+        Return a key for the given parts, which may be strings, numbers, lists, dicts, classes or simple
+        objects (i.e. an Options instance).
+        """
+        text = json.dumps(parts, sort_keys=True, default=cls._describe)
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def get_checksum(text: str) -> str:
+        return hashlib.sha1((text or "").encode("utf-8")).hexdigest()
+
+    def _get_filename(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}{self.SUFFIX}")
+
+    def get(self, key: str) -> str:
+        """
+        Return the cached output (or None if the output is not in the cache).
+        """
+        filename = self._get_filename(key)
+        try:
+            with open(filename, encoding="utf-8") as fh:
+                output = fh.read()
+            os.utime(filename)
+        except FileNotFoundError:
+            return None
+        return output
+
+    def put(self, key: str, output: str):
+        (fd, temp_filename) = tempfile.mkstemp(dir=self.directory, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                fh.write(output)
+            os.replace(temp_filename, self._get_filename(key))
+        except BaseException:
+            os.unlink(temp_filename)
+            raise
+        self.prune()
+
+    def prune(self):
+        """
+        Remove the least recently used entries until the entries take no more than max_bytes.
+        """
+        with self.lock:
+            entries = []
+            total = 0
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith(self.SUFFIX):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+                        total += stat.st_size
+            entries.sort()
+            for (_, size, path) in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+    def clear(self):
+        with self.lock:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith(self.SUFFIX):
+                        os.unlink(entry.path)
@@ -1,4 +1,5 @@
 import base64
+import concurrent.futures
 import logging
 import uuid
 
@@ -8,7 +9,9 @@ from typing import List, Tuple
 import libyang
 from yangvoodoo import Types
 from yangvoodoo.Common import Utils
-from yangvoodoo.Errors import YangModelCouldNotBeLoadedError
+from yangvoodoo.ContextPool import DEFAULT_CONTEXT_POOL
+from yangvoodoo.Errors import NonExistingNode, OutputWrittenToWriterError, YangModelCouldNotBeLoadedError
+from yangvoodoo.RenderCache import RenderCache
 
 
 class EscapeOptions:
@@ -27,6 +30,124 @@ class UnableToDetermineQuotesError(UnableToRenderFormError):
         super().__init__(f"Unable to find a quote style to use for the following value:\n{value}")
 
 
+_SUBTREE_WORKER = {}
+
+
+def _init_subtree_worker(cls, yang_module: str, state: dict, payload: str):
+    """
+    Create the Expander used by a worker process to render top-level subtrees (see Expander.process(workers=...)),
+    the data tree is loaded once per worker rather than once per subtree.
+    """
+    if cls.CONTEXT_POOL is not None:
+        # a forked worker inherits the parent's pooled contexts, each worker uses a libyang context of its own
+        cls.CONTEXT_POOL.invalidate()
+    expander = cls(yang_module, logging.getLogger(__name__))
+    expander.set_worker_state(state)
+    expander.load(payload or None, 1, trusted=True)
+    _SUBTREE_WORKER["expander"] = expander
+    _SUBTREE_WORKER["indent"] = expander.indent
+
+
+def _render_subtree(index: int) -> str:
+    """
+    Render the top-level schema node at the given index (in schema order) and return the output.
+    """
+    expander = _SUBTREE_WORKER["expander"]
+    expander._clear()
+    expander.indent = _SUBTREE_WORKER["indent"]
+    expander.depth = 0
+    expander._process_nodes(expander._get_schema_nodes(f"/{expander.yang_module}:*")[index])
+    return expander.dumps()
+
+
+class Trail(list):
+
+    """
+    The components of a path (data, schema or hybrid) along with the joined path at every depth, so
+    the path can be read as trail.path rather than by joining the components for every node.
+
+        trail = Trail()
+        trail.append("/testforms:toplevel")
+        trail.append("/simplelist")
+        trail.path == "".join(trail) == "/testforms:toplevel/simplelist"
+    """
+
+    def __init__(self, components=("",)):
+        super().__init__()
+        self.paths = [""]
+        for component in components:
+            self.append(component)
+
+    def append(self, component: str):
+        super().append(component)
+        self.paths.append(self.paths[-1] + component)
+
+    def pop(self) -> str:
+        self.paths.pop()
+        return super().pop()
+
+    @property
+    def path(self) -> str:
+        return self.paths[-1]
+
+
+class RenderPlan:
+
+    """
+    The parts of a schema node needed to render each data instance of the node, computed once per
+    Expander (rather than once per list element) to avoid repeated calls into libyang.
+    """
+
+    __slots__ = (
+        "node",
+        "name",
+        "module_name",
+        "schema_path",
+        "nodetype",
+        "presence",
+        "hidden",
+        "force_minimised",
+        "force_expand",
+        "is_key",
+        "is_empty",
+        "raw_default",
+        "default",
+        "extensions",
+    )
+
+    def __init__(self, node: libyang.schema.Node, hidden_key: str):
+        self.node = node
+        self.name = node.name()
+        self.module_name = node.module().name()
+        self.schema_path = node.schema_path()
+        self.nodetype = node.nodetype()
+        self.extensions = {}
+        self.hidden = self.get_extension(hidden_key) is not None
+        self.force_minimised = self.get_extension("yangui-force-minimised") is not None
+        self.force_expand = self.get_extension("yangui-force-expand") is not None
+        self.presence = None
+        self.is_key = False
+        self.is_empty = False
+        self.raw_default = None
+        self.default = None
+        if self.nodetype == Types.LIBYANG_NODETYPE["CONTAINER"]:
+            self.presence = node.presence()
+        elif self.nodetype in (Types.LIBYANG_NODETYPE["LEAF"], Types.LIBYANG_NODETYPE["LEAFLIST"]):
+            self.is_empty = node.type() == Types.DATA_ABSTRACTION_MAPPING["EMPTY"]
+            if self.nodetype == Types.LIBYANG_NODETYPE["LEAF"]:
+                self.is_key = node.is_key()
+                self.raw_default = node.default()
+                self.default = Utils.convert_to_libyang_value_to_pythonic(node, self.raw_default)
+
+    def __repr__(self):
+        return f"<RenderPlan: {self.schema_path}>"
+
+    def get_extension(self, extension: str):
+        if extension not in self.extensions:
+            self.extensions[extension] = self.node.get_extension(extension)
+        return self.extensions[extension]
+
+
 class Expander:
 
     """
@@ -50,6 +171,8 @@ class Expander:
     """
 
     YANG_LOCATION = "yang"
+    # Expanders share libyang contexts from the pool, set to None to parse the yang modules for every instance.
+    CONTEXT_POOL = DEFAULT_CONTEXT_POOL
     QUOTE_ESCAPE_STYLE = EscapeOptions.SELECT_SINGLE_VS_DOUBE
     ESCAPE_FOR_DOUBLE_QUOTES = '\\"'
     ESCAPE_FOR_SINGLE_QUOTES = "\\'"
@@ -70,21 +193,40 @@ class Expander:
     ALWAYS_FETCH_LISTELEMENT_CONTENTS = True
     ALWAYS_FETCH_LIST_CONTENTS = True
     AUTO_EXPAND_NON_PRESENCE_CONTAINERS = True
+    # List the children of each data node once and answer 'is there data for this schema node' from that listing,
+    # rather than querying the data tree for every schema node (worthwhile for sparse data against large schemas).
+    DATA_DRIVEN = False
+    # Top-level subtrees can be rendered independently of each other (see process(workers=...)), an Expander which
+    # carries state from one top-level node to the next (or only writes in the footer) must set this to False.
+    PARALLEL_SAFE = True
+    UUID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "pyvwu")
 
     def __init__(self, yang_module, log: logging.Logger):
         self.log = log
         self.yang_module = yang_module
-        self.ctx = libyang.Context(self.YANG_LOCATION)
-        self.ctx.load_module(yang_module)
+        if self.CONTEXT_POOL is not None:
+            self.ctx = self.CONTEXT_POOL.get(self.YANG_LOCATION, [yang_module])
+        else:
+            self.ctx = libyang.Context(self.YANG_LOCATION)
+            self.ctx.load_module(yang_module)
         self.data_ctx = libyang.DataTree(self.ctx)
         self.schema_filter_list = []
         self.schema_path_not_matched = False
         self.schema_path_matched = True
         self._is_schema_node_filtered = lambda x: False
+        self.writer = None
         self.result = StringIO()
         self.indent = 0
         self.data_loaded = False
         self.expanded_elements = {}
+        self.max_depth = None
+        self.depth = 0
+        self._render_plans = {}
+        self._schema_nodes = {}
+        self._uuids = {}
+        self._data_children = {}
+        self._data_names = {}
+        self.session = None
 
     def set_schema_filter_list(self, filter_list: List[str]):
         """
@@ -96,14 +238,28 @@ class Expander:
         self._is_schema_node_filtered = self._is_schema_node_filtered_check_with_filter_list
         self.schema_filter_list = filter_list
 
+    def set_writer(self, writer=None):
+        """
+        Stream the output to a writer (any object with a write(str) method, e.g. a file object or
+        yangvoodoo.Writers.ChunkedWriter/TornadoWriter) instead of building it in memory, or revert to
+        building the output in memory if no writer is given.
+
+        The writer is used by process() and the subprocess_* methods, dumps() and dump() are not
+        available while a writer is set.
+        """
+        self.writer = writer
+        self.result = writer if writer is not None else StringIO()
+
     def dumps(self) -> str:
-        self.result.seek(0)
-        return self.result.read()
+        if self.writer is not None:
+            raise OutputWrittenToWriterError()
+        return self.result.getvalue()
 
     def dump(self, filename):
-        self.result.seek(0)
+        if self.writer is not None:
+            raise OutputWrittenToWriterError()
         with open(filename, "w") as fh:
-            fh.write(self.result.read())
+            fh.write(self.result.getvalue())
 
     def _is_schema_node_filtered_check_with_filter_list(self, node: libyang.schema.Node) -> bool:
         """
@@ -134,11 +290,42 @@ class Expander:
         self.log.info("Loading: %s", self.yang_module)
         if initial_data:
             self.data_ctx.loads(initial_data, format, trusted=trusted)
-        self.data_path_trail = [""]
-        self.id_path_trail = [""]
-        self.schema_path_trail = [""]
+        self.data_path_trail = Trail()
+        self.id_path_trail = Trail()
+        self.schema_path_trail = Trail()
+        self._data_children = {}
+
+    def attach_session(self, session):
+        """
+        Use the libyang data tree of a DataAccess session (using the libyang stub) directly instead of
+        loading a serialised payload, this avoids a dumps/loads round-trip when the data tree has already
+        been built (e.g. by DataTree.process_data_tree_against_libyang).
+
+        The data tree is shared, changes made by the Expander (e.g. data_tree_add_list_element) are made
+        directly to the libyang data tree. The session's cached sorted lists and subtree hashes are
+        invalidated for each change, but the changes are not recorded in the session's change journal -
+        use the session's own methods (e.g. session.create) when that matters.
+
+        Args:
+            session: A connected DataAccess session.
+        """
+        self.session = session
+        self.ctx = session.libyang_ctx
+        self.data_ctx = session.libyang_data
+        self._render_plans = {}
+        self._schema_nodes = {}
+        self._data_names = {}
+        self.load()
 
-    def process(self, initial_data: str = None, format: int = 1) -> StringIO:
+    def process(
+        self,
+        initial_data: str = None,
+        format: int = 1,
+        start_data_path: str = None,
+        max_depth: int = None,
+        writer=None,
+        workers: int = None,
+    ) -> StringIO:
         """
         Process a starting data tree in a given format (XML=1, JSON=2) as recursing the schema expand
         to include any data that exists against each part of the schema. During expansion of the schema/data tree
@@ -155,16 +342,32 @@ class Expander:
         In the process of navigating the schema we keep track of the hirearchy of the model in three 'trails', this
         allows us to keep a consistent view of the schema path, data path and a hybrid path.
 
+        Large data trees can be rendered piece by piece, start_data_path renders only the subtree of a data node
+        (a container, list, list element, leaf-list or leaf) and max_depth limits the number of levels which are
+        expanded - containing nodes at the limit call callback_write_placeholder instead of expanding their contents.
+
+        The output is built in memory (see dumps()) unless a writer is provided, in which case it is written to the
+        writer as the data tree is expanded (see set_writer()).
+
+        When workers is more than 1 each top-level node is rendered in a worker process (each with its own libyang
+        context), the output of each subtree is written in schema order so the result is identical to rendering
+        the nodes one after another. Starting the workers costs a libyang context per worker so this is only
+        worthwhile for large models.
+
         Args:
             initial_data: An IETF JSON or XML data payload conforming to a yang model.
             format: payload format (1=XML, 2=IETF JSON)
+            start_data_path: A data path to render instead of the entire yang module.
+            max_depth: The number of levels of the schema to expand (None for no limit)
+            writer: An object with a write(str) method to stream the output to.
+            workers: The number of worker processes to render top-level nodes with (None to render in this process)
         """
         self.log.info("Schema Data Expander: %s", self.__class__.__name__)
         if initial_data:
             self.log.info("Loading: %s: %s bytes", self.yang_module, len(initial_data))
             self.load(initial_data, format)
             self.data_loaded = True
-        self.result = StringIO()
+        self.set_writer(writer if writer is not None else self.writer)
 
         try:
             self.ctx.get_module(self.yang_module)
@@ -176,24 +379,121 @@ class Expander:
 
         self.callback_write_open_body(self.ctx.get_module(self.yang_module))
 
-        self.data_path_trail = [""]
-        self.id_path_trail = [""]
-        self.schema_path_trail = [""]
+        self.data_path_trail = Trail()
+        self.id_path_trail = Trail()
+        self.schema_path_trail = Trail()
+        self._data_children = {}
+        self.max_depth = max_depth
+        self.depth = 0
 
         self.log.info("Schema Data Expander: starting recursion")
-        for node in self.ctx.find_path(f"/{self.yang_module}:*"):
-            self._process_nodes(node)
+        if start_data_path:
+            self._process_data_path(start_data_path)
+        elif workers and workers > 1 and self.PARALLEL_SAFE:
+            self._process_nodes_in_workers(workers)
+        else:
+            for node in self._get_schema_nodes(f"/{self.yang_module}:*"):
+                self._process_nodes(node)
         self.log.info("Schema Data Expander: completed recursion")
 
         self.callback_write_close_body(self.ctx.get_module(self.yang_module))
 
         self.callback_write_footer(self.ctx.get_module(self.yang_module))
 
-        self.result.seek(0)
+        if self.writer is None:
+            self.result.seek(0)
         return self.result
 
+    def _process_nodes_in_workers(self, workers: int):
+        """
+        Render the top-level nodes in a pool of worker processes, writing the output of each node in schema order
+        as soon as it (and every node before it) has been rendered.
+        """
+        nodes = self._get_schema_nodes(f"/{self.yang_module}:*")
+        payload = self.data_ctx.dumps(1)
+        self.log.info("Schema Data Expander: rendering %s top-level nodes with %s workers", len(nodes), workers)
+        with concurrent.futures.ProcessPoolExecutor(
+            min(workers, len(nodes)) or 1,
+            initializer=_init_subtree_worker,
+            initargs=(type(self), self.yang_module, self.get_worker_state(), payload),
+        ) as executor:
+            for output in executor.map(_render_subtree, range(len(nodes))):
+                self.result.write(output)
+
+    def get_worker_state(self) -> dict:
+        """
+        Return the settings a worker process needs to render a subtree exactly as this Expander would, the
+        values must be picklable. Subclasses with settings of their own should extend this.
+        """
+        return {
+            "expanded_elements": self.expanded_elements,
+            "schema_filter_list": self.schema_filter_list,
+            "max_depth": self.max_depth,
+            "indent": self.indent,
+        }
+
+    def set_worker_state(self, state: dict):
+        state = dict(state)
+        if state["schema_filter_list"]:
+            self.set_schema_filter_list(state["schema_filter_list"])
+        del state["schema_filter_list"]
+        for (attribute, value) in state.items():
+            setattr(self, attribute, value)
+
+    def get_cache_key(self, initial_data: str = None, format: int = 1) -> str:
+        """
+        Return the render cache key for processing the initial data against the yang module with the current
+        settings (see get_worker_state), the module is identified by its revision and the checksum of its text.
+
+        Without initial data process() renders the data tree already loaded (by load(), attach_session() or a
+        previous process()), so the key covers the checksum of that data tree instead.
+        """
+        if initial_data is None:
+            initial_data = self.data_ctx.dumps(format)
+        try:
+            module = self.ctx.get_module(self.yang_module)
+        except libyang.util.LibyangError as err:
+            raise YangModelCouldNotBeLoadedError(self.yang_module) from err
+        return RenderCache.get_key(
+            type(self),
+            module.revision(),
+            RenderCache.get_checksum(module.print_mem("yang")),
+            RenderCache.get_checksum(initial_data),
+            format,
+            self.get_worker_state(),
+        )
+
+    def process_cached(
+        self, cache: RenderCache, initial_data: str = None, format: int = 1, writer=None, workers: int = None
+    ) -> str:
+        """
+        Return the output of process() from the render cache, processing (and caching) the output only if the
+        yang module, initial data or settings have not been rendered before. The output is also available from
+        dumps() (or written to the writer).
+
+        The output must only depend on the schema, data and settings - i.e. the htmlforms page includes a session
+        id so should not be cached.
+        """
+        key = self.get_cache_key(initial_data, format)
+        output = cache.get(key)
+        if output is None:
+            self.set_writer(None)
+            self.process(initial_data, format, workers=workers)
+            output = self.dumps()
+            cache.put(key, output)
+        else:
+            self.log.info("Schema Data Expander: using cached output %s", key)
+        self.set_writer(writer)
+        self.result.write(output)
+        return output
+
+    def _data_tree_changed(self, xpath: str):
+        if self.session is not None:
+            self.session.invalidate_caches(xpath)
+
     def data_tree_delete_list_element(self, list_element_xpath: str):
         self.data_ctx.delete_xpath(list_element_xpath)
+        self._data_tree_changed(list_element_xpath)
 
     def data_tree_add_list_element(self, list_xpath: str, key_values: List[Tuple[str, str]]) -> str:
         """
@@ -208,26 +508,31 @@ class Expander:
         for k, v in key_values:
             predicates += Utils.encode_xpath_predicate(k, v)
         self.data_ctx.set_xpath(list_xpath + predicates, "")
+        self._data_tree_changed(list_xpath + predicates)
         return predicates
 
     def data_tree_create_container(self, xpath: str):
         self.data_ctx.set_xpath(xpath, "")
+        self._data_tree_changed(xpath)
 
     def data_tree_delete_container(self, xpath: str):
         self.data_ctx.delete_xpath(xpath)
+        self._data_tree_changed(xpath)
 
     def data_tree_set_leaf(self, xpath: str, value: str):
         if not value:
             self.data_ctx.delete_xpath(xpath)
         else:
             self.data_ctx.set_xpath(xpath, value)
+        self._data_tree_changed(xpath)
 
     def _clear(self):
-        self.result.seek(0)
-        self.result.truncate()
-        self.data_path_trail = [""]
-        self.id_path_trail = [""]
-        self.schema_path_trail = [""]
+        if self.writer is None:
+            self.result = StringIO()
+        self.data_path_trail = Trail()
+        self.id_path_trail = Trail()
+        self.schema_path_trail = Trail()
+        self._data_children = {}
 
     def subprocess_create_list(self, data_xpath: str, schema_xpath: str):
         """
@@ -240,10 +545,11 @@ class Expander:
         self.schema_path_trail.append(schema_xpath)
 
         self.grow_trail(list_element_predicates="", schema=False)
-        for subnode in self.ctx.find_path(f"{schema_xpath}/*"):
-            if subnode.get_extension(self.YANGUI_HIDDEN_KEY):
+        for subnode in self._get_schema_nodes(f"{schema_xpath}/*"):
+            plan = self._get_render_plan(subnode)
+            if plan.hidden:
                 continue
-            if subnode.nodetype() == Types.LIBYANG_NODETYPE["LEAF"] and subnode.is_key():
+            if plan.nodetype == Types.LIBYANG_NODETYPE["LEAF"] and plan.is_key:
                 self.grow_trail(subnode)
                 self.callback_write_leaf(
                     subnode,
@@ -253,7 +559,7 @@ class Expander:
                     default="",
                     key=True,
                     template=True,
-                    node_id="".join(self.id_path_trail),
+                    node_id=self.id_path_trail.path,
                 )
                 self.shrink_trail()
 
@@ -266,17 +572,17 @@ class Expander:
         self.data_path_trail.append(data_xpath)
         self.schema_path_trail.append(schema_xpath)
 
-        node = next(self.ctx.find_path("".join(self.schema_path_trail)))
+        node = next(self.ctx.find_path(self.schema_path_trail.path))
         self.grow_trail(list_element_predicates="", schema=False)
 
-        xpath = "".join(self.schema_path_trail)
+        xpath = self.schema_path_trail.path
         self.callback_write_leaflist_item(
             node,
             "",
             '"',
             True,
             template=True,
-            node_id="".join(self.id_path_trail),
+            node_id=self.id_path_trail.path,
         )
 
         self.shrink_trail(schema=False)
@@ -401,10 +707,107 @@ class Expander:
             node,
             *self.get_data(node),
             template=False,
-            node_id="".join(self.id_path_trail),
+            node_id=self.id_path_trail.path,
         )
         self.shrink_trail(schema=False)
 
+    def subprocess_data_path(self, data_path: str, max_depth: int = None):
+        """
+        Render the subtree of a data node (without the header/body/footer), i.e. to lazily load a
+        placeholder which was written because of max_depth.
+        """
+        self._clear()
+        self.max_depth = max_depth
+        self.depth = 0
+
+        self.log.info("Schema Data Expander: starting recursion for a data path: %s", data_path)
+        self._process_data_path(data_path)
+        self.log.info("Schema Data Expander: completed recursion for a data path: %s", data_path)
+
+    def _process_data_path(self, data_path: str):
+        """
+        Grow the trails along the data path (including any choice/case statements which are not part of
+        the data path) and then process the final node of the data path.
+        """
+        components = []
+        path = data_path
+        while path:
+            (path, last) = Utils.split_data_path(path)
+            components.insert(0, last)
+
+        schema_path = f"/{self.yang_module}:"
+        grown = []
+        for (index, component) in enumerate(components):
+            (name, _, predicates) = component.partition("[")
+            predicates = f"[{predicates}" if predicates else ""
+            nodes = self._find_schema_nodes_to(schema_path, name.split(":")[-1])
+            if not nodes:
+                raise NonExistingNode(data_path)
+            for choice_or_case in nodes[:-1]:
+                self.grow_trail(choice_or_case, data=False)
+                grown.append({"data": False})
+            node = nodes[-1]
+
+            if index == len(components) - 1 and not predicates:
+                self._process_nodes(node)
+                break
+
+            self.grow_trail(node)
+            grown.append({})
+            if predicates:
+                self.grow_trail(list_element_predicates=predicates, schema=False)
+                grown.append({"schema": False})
+            schema_path = f"{node.schema_path()}/"
+
+            if index == len(components) - 1:
+                self.depth += 1
+                if node.nodetype() == Types.LIBYANG_NODETYPE["LIST"]:
+                    self._handle_list_element(node)
+                else:
+                    self.callback_write_leaflist_item(
+                        node, *self.get_data(node), template=False, node_id=self.id_path_trail.path
+                    )
+                self.depth -= 1
+
+        for kwargs in reversed(grown):
+            self.shrink_trail(**kwargs)
+
+    def _find_schema_nodes_to(self, schema_path: str, name: str) -> List[libyang.schema.Node]:
+        """
+        Return the schema node with the given name which is a child of the schema path, preceeded by
+        any choice and case statements which have to be passed through to reach it.
+        """
+        for node in self._get_schema_nodes(f"{schema_path}*"):
+            plan = self._get_render_plan(node)
+            if plan.nodetype == Types.LIBYANG_NODETYPE["CHOICE"]:
+                for case in self._get_schema_nodes(f"{plan.schema_path}/*"):
+                    nodes = self._find_schema_nodes_to(f"{self._get_render_plan(case).schema_path}/", name)
+                    if nodes:
+                        return [node, case] + nodes
+            elif plan.name == name:
+                return [node]
+        return []
+
+    def _should_expand_contents(self, node: libyang.schema.Node) -> bool:
+        """
+        Return False (and write a placeholder) if expanding the contents of a containing node would exceed
+        the max depth.
+        """
+        if self.max_depth is None or self.depth < self.max_depth:
+            return True
+        self.callback_write_placeholder(node, node_id=self.id_path_trail.path)
+        return False
+
+    def callback_write_placeholder(self, node: libyang.schema.Node, node_id: str):
+        """
+        Called in place of the contents of a containing node (container, list, choice) when processing
+        has reached the max depth, the contents can be loaded later with subprocess_data_path.
+
+        Args:
+            node: The libyang schema node
+            node_id: The node id using a hybrid schema/data path.
+        """
+
     def callback_write_header(self, module: libyang.schema.Module):
         """
         Called in order to provide information in a body before starting to process the yang model.
@@ -616,24 +1019,53 @@ class Expander:
         """
         raise NotImplementedError("callback_close_case")
 
+    def _get_render_plan(self, node: libyang.schema.Node) -> RenderPlan:
+        """
+        Return the render plan of a schema node, the plan holds a reference to the node so the
+        id of the node cannot be reused while the plan is cached.
+        """
+        plan = self._render_plans.get(id(node))
+        if plan is None or plan.node is not node:
+            plan = RenderPlan(node, self.YANGUI_HIDDEN_KEY)
+            self._render_plans[id(node)] = plan
+        return plan
+
+    def _get_schema_nodes(self, schema_xpath: str) -> List[libyang.schema.Node]:
+        """
+        Return (and cache) the schema nodes matching a schema xpath, i.e. the children of a container
+        are only looked up once however many list elements contain the container.
+        """
+        nodes = self._schema_nodes.get(schema_xpath)
+        if nodes is None:
+            nodes = list(self.ctx.find_path(schema_xpath))
+            self._schema_nodes[schema_xpath] = nodes
+        return nodes
+
     def _process_nodes(self, node):
-        if node.get_extension(self.YANGUI_HIDDEN_KEY):
+        plan = self._get_render_plan(node)
+        if plan.hidden:
             return
-        if node.nodetype() not in self.SCHEMA_NODE_TYPE_MAP:
-            raise NotImplementedError(f"{node.schema_path()} has unknown type {node.nodetype()}")
+        if plan.nodetype not in self.SCHEMA_NODE_TYPE_MAP:
+            raise NotImplementedError(f"{plan.schema_path} has unknown type {plan.nodetype}")
         if not self._is_schema_node_filtered(node):
-            getattr(self, self.SCHEMA_NODE_TYPE_MAP[node.nodetype()])(node)
+            self.depth += 1
+            getattr(self, self.SCHEMA_NODE_TYPE_MAP[plan.nodetype])(node)
+            self.depth -= 1
 
     def _handle_schema_containing_node(self, node):
         self.grow_trail(node)
+        data_xpaths = self._get_data_xpaths(node)
+        if data_xpaths == []:
+            self._data_children[self.data_path_trail.path] = {}
         presence = None
-        if node.presence() is not None:
-            presence = False
-            if self.get_raw_data() is not None:
-                presence = True
+        if self._get_render_plan(node).presence is not None:
+            if data_xpaths is not None:
+                presence = bool(data_xpaths)
+            else:
+                presence = self.get_raw_data() is not None
 
-        self.callback_open_containing_node(node, presence=presence, node_id="".join(self.id_path_trail))
-        if self._should_container_be_visible(node, presence):
+        self.callback_open_containing_node(node, presence=presence, node_id=self.id_path_trail.path)
+        if self._should_container_be_visible(node, presence) and self._should_expand_contents(node):
             self._handle_container_contents(node)
 
         self.callback_close_containing_node(node)
@@ -645,7 +1077,7 @@ class Expander:
         This can be used for the inner of a container (and also list elements)
         """
         try:
-            for subnode in self.ctx.find_path(f"{node.schema_path()}/*"):
+            for subnode in self._get_schema_nodes(f"{self._get_render_plan(node).schema_path}/*"):
                 self._process_nodes(subnode)
         except libyang.util.LibyangError:
             pass
@@ -667,10 +1099,11 @@ class Expander:
             # base on the data we should be expanded
             result = True
 
-        if node.get_extension("yangui-force-minimised"):
+        plan = self._get_render_plan(node)
+        if plan.force_minimised:
             return False
 
-        if node.get_extension("yangui-force-expand"):
+        if plan.force_expand:
             return True
 
         if self.ALWAYS_FETCH_CONTAINER_CONTENTS:
@@ -694,10 +1127,11 @@ class Expander:
         if uuid in self.expanded_elements and self.expanded_elements[uuid]:
             return True
 
-        if node.get_extension("yangui-force-minimised"):
+        plan = self._get_render_plan(node)
+        if plan.force_minimised:
             return False
 
-        if node.get_extension("yangui-force-expand"):
+        if plan.force_expand:
             return True
 
         if self.ALWAYS_FETCH_LISTELEMENT_CONTENTS:
@@ -717,10 +1151,11 @@ class Expander:
         if uuid in self.expanded_elements and self.expanded_elements[uuid]:
             return True
 
-        if node.get_extension("yangui-force-minimised"):
+        plan = self._get_render_plan(node)
+        if plan.force_minimised:
             return False
 
-        if node.get_extension("yangui-force-expand"):
+        if plan.force_expand:
             return True
 
         if self.ALWAYS_FETCH_LIST_CONTENTS:
@@ -761,14 +1196,15 @@ class Expander:
             node: A libyang schema node
             key: if None (default) lookup if the node is a key (otherwise use this argument as an override)
         """
+        plan = self._get_render_plan(node)
         self.grow_trail(node)
         self.callback_write_leaf(
             node,
             *self.get_data(node),
-            default=Utils.convert_to_libyang_value_to_pythonic(node, node.default()),
-            key=node.is_key(),
+            default=plan.default,
+            key=plan.is_key,
             template=False,
-            node_id="".join(self.id_path_trail),
+            node_id=self.id_path_trail.path,
         )
         self.shrink_trail()
 
@@ -792,26 +1228,29 @@ class Expander:
 
         self.grow_trail(node)
 
-        trail = "".join(self.data_path_trail)
+        list_items = self._get_list_items(node)
         self.callback_open_list(
             node,
-            count=len(list(self.data_ctx.gets_xpath(trail))),
-            node_id="".join(self.id_path_trail),
+            count=len(list_items),
+            node_id=self.id_path_trail.path,
         )
 
-        if self._should_list_be_visible(node):
-            self._handle_list_contents(node)
+        if self._should_list_be_visible(node) and self._should_expand_contents(node):
+            self._handle_list_contents(node, list_items)
 
         self.callback_close_list(node)
 
         self.shrink_trail()
 
-    def _handle_list_contents(self, node):
-        trail = "".join(self.data_path_trail)
-        list_items = list(self.data_ctx.gets_xpath(trail))
+    def _handle_list_contents(self, node, list_items: List[str] = None):
+        trail = self.data_path_trail.path
+        if list_items is None:
+            list_items = self._get_list_items(node)
 
         if not list_items and self.INCLUDE_BLANK_LIST_ELEMENTS:
             self.grow_trail(list_element_predicates="", schema=False)
+            if self.DATA_DRIVEN:
+                self._data_children[self.data_path_trail.path] = {}
             self._handle_list_element(node, populate_key_value_tuple=False)
             self.shrink_trail(schema=False)
 
@@ -828,7 +1267,7 @@ class Expander:
             populate_key_value_tuple: flag indicating if we should populate a full_key_value tuple.
         """
         if populate_key_value_tuple:
-            xpath = "".join(self.data_path_trail)
+            xpath = self.data_path_trail.path
             key_values = list(list(self.data_ctx.get_xpath(xpath))[0].get_list_key_values())
         else:
             key_values = [(k.name(), None) for k in node.keys()]
@@ -838,12 +1277,12 @@ class Expander:
             key_values=key_values,
             empty_list_element=populate_key_value_tuple is not True,
             force_open=force_open,
-            node_id="".join(self.id_path_trail),
+            node_id=self.id_path_trail.path,
         )
 
         if self._should_listelement_be_visible(node, force_open):
-            xpath = "".join(self.schema_path_trail)
-            for subnode in self.ctx.find_path(f"{xpath}/*"):
+            xpath = self.schema_path_trail.path
+            for subnode in self._get_schema_nodes(f"{xpath}/*"):
                 self._process_nodes(subnode)
 
         self.callback_close_list_element(node)
@@ -851,21 +1290,22 @@ class Expander:
     def _handle_schema_leaflist(self, node):
         self.grow_trail(node)
 
-        trail = "".join(self.data_path_trail)
+        trail = self.data_path_trail.path
+        list_items = self._get_list_items(node)
         self.callback_open_leaflist(
             node,
-            count=len(list(self.data_ctx.gets_xpath(trail))),
-            node_id="".join(self.id_path_trail),
+            count=len(list_items),
+            node_id=self.id_path_trail.path,
         )
 
-        for list_node in self.data_ctx.gets_xpath(trail):
+        for list_node in list_items:
             list_xpath = list_node[len(trail) :]
             self.grow_trail(list_element_predicates=list_xpath, schema=False)
             self.callback_write_leaflist_item(
                 node,
                 *self.get_data(node),
                 template=False,
-                node_id="".join(self.id_path_trail),
+                node_id=self.id_path_trail.path,
             )
             self.shrink_trail(schema=False)
 
@@ -878,32 +1318,41 @@ class Expander:
 
         active_case = None
         cases = []
-        for case in self.ctx.find_path(f"{node.schema_path()}/*"):
-            if case.nodetype() == 64:
+        for case in self._get_schema_nodes(f"{self._get_render_plan(node).schema_path}/*"):
+            if self._get_render_plan(case).nodetype == Types.LIBYANG_NODETYPE["CASE"]:
                 cases.append(case)
 
-        trail = "".join(self.data_path_trail)
-        for data_xpath in self.data_ctx.gets_xpath(f"{trail}/*"):
-            value = list(self.data_ctx.get_xpath(data_xpath))
-            if value:
-                for case in cases:
-                    if value[0].get_schema_path().startswith(case.schema_path()):
-                        active_case = case
-                        break
-
-        self.callback_open_choice(node, node_id="".join(self.id_path_trail))
-
+        trail = self.data_path_trail.path
+        data_children = self._get_data_children(trail) if self.DATA_DRIVEN else None
+        if data_children is not None:
+            for case in cases:
+                if not self._get_data_names(case).isdisjoint(data_children):
+                    active_case = case
+                    break
+        else:
+            for data_xpath in self.data_ctx.gets_xpath(f"{trail}/*"):
+                value = list(self.data_ctx.get_xpath(data_xpath))
+                if value:
+                    for case in cases:
+                        if value[0].get_schema_path().startswith(case.schema_path()):
+                            active_case = case
+                            break
+
+        self.callback_open_choice(node, node_id=self.id_path_trail.path)
+
+        if not self._should_expand_contents(node):
+            cases = []
         for case in cases:
             self.grow_trail(case, data=False)
             self.callback_open_case(
                 case,
                 active_case == case,
                 active_case is None,
-                node_id="".join(self.id_path_trail),
+                node_id=self.id_path_trail.path,
             )
 
             try:
-                for subnode in self.ctx.find_path(f"{case.schema_path()}/*"):
+                for subnode in self._get_schema_nodes(f"{self._get_render_plan(case).schema_path}/*"):
                     self._process_nodes(subnode)
             except libyang.util.LibyangError:
                 pass
@@ -915,6 +1364,73 @@ class Expander:
 
         self.shrink_trail(data=False)
 
+    def _get_list_items(self, node: libyang.schema.Node) -> List[str]:
+        """
+        Return the data xpaths of the list elements (or leaf-list items) of the list at the head of the trail.
+        """
+        list_items = self._get_data_xpaths(node)
+        if list_items is None:
+            list_items = list(self.data_ctx.gets_xpath(self.data_path_trail.path))
+        return list_items
+
+    def _get_data_children(self, data_path: str) -> dict:
+        """
+        DATA_DRIVEN: Return (and cache) the children of a data node as a dictionary of node name to the
+        data xpaths of the children with that name, i.e. list elements are in document order.
+
+            {"simplelist": ["/testforms:toplevel/simplelist[simplekey='A']", ...], "topleaf": [...]}
+
+        None is returned if the data tree could not be queried, the caller must then query the data tree
+        for each node itself.
+        """
+        if data_path in self._data_children:
+            return self._data_children[data_path]
+        children = {}
+        try:
+            for xpath in self.data_ctx.gets_xpath(f"{data_path}/*"):
+                (name, _, _) = xpath[len(data_path) + 1 :].partition("[")
+                children.setdefault(name.split(":")[-1], []).append(xpath)
+        except libyang.util.LibyangError:
+            children = None
+        self._data_children[data_path] = children
+        return children
+
+    def _get_data_xpaths(self, node: libyang.schema.Node) -> List[str]:
+        """
+        DATA_DRIVEN: Return the data xpaths of the node at the head of the data trail (more than one for
+        list elements and leaf-list items) from the children of the parent data node, an empty list means
+        there is no data so nothing below this node needs to be queried.
+
+        None is returned if not DATA_DRIVEN (or the parent's children are not known).
+        """
+        if not self.DATA_DRIVEN:
+            return None
+        children = self._get_data_children(self.data_path_trail.paths[-2])
+        if children is None:
+            return None
+        return children.get(self._get_render_plan(node).name, [])
+
+    def _get_data_names(self, node: libyang.schema.Node) -> set:
+        """
+        Return (and cache) the names of the data nodes which may be instantiated within a choice or case,
+        including those within nested choices/cases.
+        """
+        plan = self._get_render_plan(node)
+        names = self._data_names.get(plan.schema_path)
+        if names is None:
+            names = set()
+            try:
+                for subnode in self._get_schema_nodes(f"{plan.schema_path}/*"):
+                    subplan = self._get_render_plan(subnode)
+                    if subplan.nodetype in (Types.LIBYANG_NODETYPE["CHOICE"], Types.LIBYANG_NODETYPE["CASE"]):
+                        names.update(self._get_data_names(subnode))
+                    else:
+                        names.add(subplan.name)
+            except libyang.util.LibyangError:
+                pass
+            self._data_names[plan.schema_path] = names
+        return names
+
     def get_raw_data(self) -> str:
         """
         Return raw data
@@ -922,7 +1438,7 @@ class Expander:
         Returns:
             The raw libyang data (str)
         """
-        xpath = "".join(self.data_path_trail)
+        xpath = self.data_path_trail.path
         value = list(self.data_ctx.get_xpath(xpath))
         if value:
             return value[0].value
@@ -937,8 +1453,9 @@ class Expander:
         suffix: str = "",
         escape: bool = False,
     ) -> str:
-        if node.get_extension(extension):
-            value = node.get_extension(extension).argument()
+        plan = self._get_render_plan(node)
+        if plan.get_extension(extension):
+            value = plan.get_extension(extension).argument()
             if escape:
                 value = self.escape_value(value)
             return f"{prefix}{value}{suffix}"
@@ -954,9 +1471,13 @@ class Expander:
         Returns:
             Tuple of escaped (if required) data, a preferred quoting style, and if the data is explicit in the data tree
         """
-        xpath = "".join(self.data_path_trail)
-        value = list(self.data_ctx.get_xpath(xpath))
-        if node.type() == Types.DATA_ABSTRACTION_MAPPING["EMPTY"]:
+        xpath = self.data_path_trail.path
+        plan = self._get_render_plan(node)
+        if plan.nodetype == Types.LIBYANG_NODETYPE["LEAF"] and self._get_data_xpaths(node) == []:
+            value = []
+        else:
+            value = list(self.data_ctx.get_xpath(xpath))
+        if plan.is_empty:
             if value is not None:
                 return True
             return False
@@ -964,8 +1485,8 @@ class Expander:
             self.log.debug("GET XPATH: %s = %s", xpath, value[0].value)
             quote = self.get_quote_style(value[0].value)
             return self.escape_value(value[0].value, quote), quote, True
-        if node.default():
-            default = Utils.convert_to_libyang_value_to_pythonic(node, node.default())
+        if plan.raw_default:
+            default = plan.default
             quote = self.get_quote_style(default)
             return self.escape_value(default, quote), quote, False
         return "", self.get_quote_style(""), False
@@ -1017,27 +1538,30 @@ class Expander:
         if schema:
             self.schema_path_trail.pop()
         self.id_path_trail.pop()
-        self.log.debug("SHRINK: %s", self.data_path_trail)
-        self.log.debug("SHRINK: %s", self.schema_path_trail)
-        self.log.debug("SHRINK: %s", self.id_path_trail)
+        if self.log.isEnabledFor(logging.DEBUG):
+            self.log.debug("SHRINK: %s", self.data_path_trail)
+            self.log.debug("SHRINK: %s", self.schema_path_trail)
+            self.log.debug("SHRINK: %s", self.id_path_trail)
 
     def grow_trail(self, node=None, list_element_predicates=None, schema=True, data=True):
+        plan = self._get_render_plan(node) if node is not None else None
         if data:
             if list_element_predicates is not None:
                 data_component = list_element_predicates
-            elif node.module().name() != self.yang_module or len(self.data_path_trail) == 1:
-                data_component = f"/{node.module().name()}:{node.name()}"
+            elif plan.module_name != self.yang_module or len(self.data_path_trail) == 1:
+                data_component = f"/{plan.module_name}:{plan.name}"
             else:
-                data_component = f"/{node.name()}"
-            self.data_path_trail.append(f"{data_component}")
-            self.id_path_trail.append(f"{data_component}")
+                data_component = f"/{plan.name}"
+            self.data_path_trail.append(data_component)
+            self.id_path_trail.append(data_component)
         else:
-            self.id_path_trail.append(f"/{node.name()}")
+            self.id_path_trail.append(f"/{plan.name}")
         if schema:
-            self.schema_path_trail.append(f"/{node.module().name()}:{node.name()}")
-        self.log.debug("GROW: %s", self.data_path_trail)
-        self.log.debug("GROW: %s", self.schema_path_trail)
-        self.log.debug("GROW: %s", self.id_path_trail)
+            self.schema_path_trail.append(f"/{plan.module_name}:{plan.name}")
+        if self.log.isEnabledFor(logging.DEBUG):
+            self.log.debug("GROW: %s", self.data_path_trail)
+            self.log.debug("GROW: %s", self.schema_path_trail)
+            self.log.debug("GROW: %s", self.id_path_trail)
 
     def get_id(self, escape=False, prefix=""):
         """
@@ -1050,7 +1574,7 @@ class Expander:
         """
         if len(self.data_path_trail) == 1:
             return "'__root__'"
-        trail = "".join(self.data_path_trail)
+        trail = self.data_path_trail.path
         if self.BASE64_ENCODE_PATHS:
             return base64.urlsafe_b64encode(trail.encode("utf-8")).decode("utf-8")
         if escape:
@@ -1061,7 +1585,7 @@ class Expander:
     def get_schema_id(self):
         if len(self.schema_path_trail) == 1:
             return "'__root__'"
-        trail = "".join(self.schema_path_trail)
+        trail = self.schema_path_trail.path
         if self.BASE64_ENCODE_PATHS:
             return base64.urlsafe_b64encode(trail.encode("utf-8")).decode("utf-8")
         quote = self.get_quote_style(trail)
@@ -1074,17 +1598,25 @@ class Expander:
         """
         if len(self.id_path_trail) == 1:
             return "'__root__'"
-        trail = "".join(self.id_path_trail)
         if as_uuid:
-            return str(uuid.uuid5(uuid.uuid5(uuid.NAMESPACE_URL, "pyvwu"), trail))
+            return self.get_uuid()
+        trail = self.id_path_trail.path
         if self.BASE64_ENCODE_PATHS:
             return base64.urlsafe_b64encode(trail.encode("utf-8")).decode("utf-8")
         quote = self.get_quote_style(trail)
         return f"{quote}{trail}{quote}"
 
     def get_uuid(self):
-        trail = "".join(self.id_path_trail)
-        return str(uuid.uuid5(uuid.uuid5(uuid.NAMESPACE_URL, "pyvwu"), trail))
+        """
+        Return a uuid based on the hybrid trail, the uuids are cached as the same node is asked for its
+        uuid several times while it is rendered.
+        """
+        trail = self.id_path_trail.path
+        node_uuid = self._uuids.get(trail)
+        if node_uuid is None:
+            node_uuid = str(uuid.uuid5(self.UUID_NAMESPACE, trail))
+            self._uuids[trail] = node_uuid
+        return node_uuid
 
     def get_indent(self):
         return self.INDENT_CHAR * (self.indent + self.INDENT_MINIMUM) * self.INDENT_SPACING
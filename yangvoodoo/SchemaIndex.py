@@ -0,0 +1,146 @@
+from typing import Iterable, Optional
+
+import libyang
+from yangvoodoo import Types
+from yangvoodoo.TypeDescriptor import TypeDescriptor
+
+
+class SchemaIndexEntry:
+
+    """
+    A pre-resolved child of a schema node.
+
+    Attributes:
+        name: the real (yang) name of the node, e.g. dirty-secret
+        module: the yang module which defines the node (this will differ for augmented nodes)
+        libyang_node: the libyang schema node
+        schema_path: the schema path as formed by yangvoodoo (every component prefixed with the module)
+        qualified_name: the name prefixed with the module, e.g. integrationtest:dirty-secret
+        nodetype: see Types.LIBYANG_NODETYPE
+        is_data_node: False for choices and cases which do not form part of a data path
+        leaf_type: for leaves/leaf-lists the libyang base type (see Types.LIBYANG_LEAF_TYPES) otherwise None
+        type_descriptor: for leaves/leaf-lists a TypeDescriptor, built the first time it is required
+    """
+
+    def __init__(self, name, module, libyang_node, schema_path):
+        self.name = name
+        self.module = module
+        self.libyang_node = libyang_node
+        self.schema_path = schema_path
+        self.qualified_name = f"{module}:{name}"
+        self.nodetype = libyang_node.nodetype()
+        self.is_data_node = self.nodetype not in (
+            Types.LIBYANG_NODETYPE["CHOICE"],
+            Types.LIBYANG_NODETYPE["CASE"],
+        )
+        self.leaf_type = None
+        if self.nodetype in Types.LIBYANG_LEAF_LIKE_NODES:
+            self.leaf_type = libyang_node.type().base()
+        self._type_descriptor = None
+
+    @property
+    def type_descriptor(self) -> TypeDescriptor:
+        if self._type_descriptor is None:
+            self._type_descriptor = TypeDescriptor(self.libyang_node.type())
+        return self._type_descriptor
+
+    def __repr__(self):
+        return f"<SchemaIndexEntry: {self.schema_path}>"
+
+
+class SchemaIndex:
+
+    """
+    An index of the yang schema, built once when connecting (or adding a module) so that navigating
+    from a parent schema path to a child with a pythonic attribute name is a dictionary lookup rather
+    than a set of speculative libyang find_path() calls for each loaded yang module.
+
+    The index is keyed by
+        (parent schema path, attribute)   - attribute may be the real name or the pythonic name
+                                            (i.e. hyphens translated to underscores, reserved python
+                                            keywords suffixed with an underscore)
+        schema path
+
+    The root of the yang module is represented by a parent schema path of "".
+    """
+
+    CONTAINING_NODES = (
+        Types.LIBYANG_NODETYPE["CONTAINER"],
+        Types.LIBYANG_NODETYPE["CHOICE"],
+        Types.LIBYANG_NODETYPE["LIST"],
+        Types.LIBYANG_NODETYPE["CASE"],
+    )
+
+    def __init__(self, schemactx=None):
+        self.schemactx = schemactx
+        self.children = {}
+        self.nodes = {}
+        self.modules = []
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def build(self, modules: Iterable[str]):
+        """
+        (Re)build the index for the given yang modules, the first module is the top module and
+        takes precedence if two modules provide a node with the same name at the same point.
+        """
+        self.children.clear()
+        self.nodes.clear()
+        self.modules = list(modules)
+        for module in self.modules:
+            self._index_children("", f"/{module}:*")
+
+    def _index_children(self, parent_schema_path: str, search_path: str):
+        try:
+            children = list(self.schemactx.find_path(search_path))
+        except libyang.util.LibyangError:
+            return
+
+        for child in children:
+            module = child.module().name()
+            schema_path = f"{parent_schema_path}/{module}:{child.name()}"
+            if schema_path in self.nodes:
+                continue
+            entry = SchemaIndexEntry(child.name(), module, child, schema_path)
+            self.add(parent_schema_path, entry)
+            if entry.nodetype in self.CONTAINING_NODES:
+                self._index_children(schema_path, f"{schema_path}/*")
+
+    def add(self, parent_schema_path: str, entry: SchemaIndexEntry):
+        """
+        Add an entry to the index under all of the names it may be accessed by.
+        """
+        self.nodes[entry.schema_path] = entry
+        for attr in self.get_pythonic_names(entry.name):
+            key = (parent_schema_path, attr)
+            existing = self.children.get(key)
+            if existing is None or self._rank(entry.module) < self._rank(existing.module):
+                self.children[key] = entry
+
+    def _rank(self, module: str) -> int:
+        if module in self.modules:
+            return self.modules.index(module)
+        return len(self.modules)
+
+    @staticmethod
+    def get_pythonic_names(name: str):
+        """
+        Return the set of attribute names which map to a real yang name.
+        """
+        names = {name, name.replace("-", "_")}
+        if name in Types.RESERVED_PYTHON_KEYWORDS:
+            names.update({f"{n}_" for n in names})
+        return names
+
+    def get_child(self, parent_schema_path: str, attr: str) -> Optional[SchemaIndexEntry]:
+        """
+        Return the entry for a child of the parent schema path (or None if no such child exists).
+        """
+        return self.children.get((parent_schema_path, attr))
+
+    def get(self, schema_path: str) -> Optional[SchemaIndexEntry]:
+        """
+        Return the entry for a schema path (or None if no such schema node exists).
+        """
+        return self.nodes.get(schema_path)
@@ -0,0 +1,143 @@
+import logging
+import threading
+import time
+from typing import List, Union
+
+from yangvoodoo import DataAccess
+from yangvoodoo.Cache import Cache
+from yangvoodoo.Errors import SessionExpiredError
+from yangvoodoo.Merger import DataTree, DataTreeChange
+
+
+class StoredSession:
+
+    """
+    A live data tree held by the session store.
+
+    session:   the DataAccess session holding the libyang data tree
+    applied:   the number of the client's changes which have been applied to the data tree
+    last_used: the time (see SessionStore.clock) the session was last used
+    """
+
+    __slots__ = ("session", "applied", "last_used")
+
+    def __init__(self, session, applied, last_used):
+        self.session = session
+        self.applied = applied
+        self.last_used = last_used
+
+    def __repr__(self):
+        return f"<StoredSession: {self.applied} changes applied>"
+
+
+class SessionStore:
+
+    """
+    A server-side cache of live data trees, keyed by a session id chosen by the client, so that a client
+    which holds an initial payload and an ever growing list of changes (i.e. the htmlforms UI) only has to
+    send the changes made since its previous request.
+
+    Sessions are evicted once they have not been used for ttl seconds, or when the store holds more than
+    capacity sessions (least recently used first).
+
+    Example usage:
+
+        session = store.get_session(session_id, payload, changes, changes_from, yang_model, log)
+
+    The client sends the full payload and every change with changes_from=0, afterwards only the changes
+    from changes_from onwards. If the changes do not follow on from the changes already applied (e.g. the
+    session has been evicted or the client has undone a change) SessionExpiredError is raised and the
+    client must send the full payload again.
+    """
+
+    def __init__(self, capacity: int = 100, ttl: float = 1800, clock=time.monotonic):
+        self.sessions = Cache(capacity)
+        self.ttl = ttl
+        self.clock = clock
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def __contains__(self, session_id):
+        return session_id in self.sessions.items
+
+    def expire(self):
+        """
+        Remove sessions which have not been used within the ttl, the cache is ordered by use so only
+        the expired sessions are visited.
+        """
+        cutoff = self.clock() - self.ttl
+        with self.lock:
+            for (session_id, stored) in list(self.sessions.items.items()):
+                if stored.last_used > cutoff:
+                    break
+                self.sessions.remove_entry(session_id)
+
+    def get(self, session_id: str) -> StoredSession:
+        """
+        Return the stored session (or None if there is no session or the session has expired).
+        """
+        self.expire()
+        with self.lock:
+            stored = self.sessions.get(session_id)
+            if stored:
+                stored.last_used = self.clock()
+            return stored
+
+    def add(self, session_id: str, session: DataAccess, applied: int = 0) -> StoredSession:
+        self.expire()
+        stored = StoredSession(session, applied, self.clock())
+        with self.lock:
+            self.sessions.add_entry(session_id, stored)
+        return stored
+
+    def remove(self, session_id: str):
+        with self.lock:
+            self.sessions.remove_entry(session_id)
+
+    def get_session(
+        self,
+        session_id: str,
+        json_dict: Union[dict, str],
+        changes: List[DataTreeChange],
+        changes_from: int = 0,
+        yang_model: str = None,
+        log=logging.Logger,
+        changes_to: int = None,
+    ) -> DataAccess:
+        """
+        Return a session with the client's changes applied, creating the session from the payload when
+        changes_from is 0 and otherwise applying only the new changes to the stored session.
+
+        changes_to is the number of the client's changes accounted for once this request has been processed,
+        by default changes_from + len(changes) - it only needs to be provided if the caller discards changes.
+
+        If a change cannot be applied the session is dropped from the store (the data tree may be partially
+        updated), the client is expected to send the full payload with the next request.
+
+        raises:
+            SessionExpiredError
+        """
+        if changes_to is None:
+            changes_to = changes_from + len(changes)
+
+        if changes_from == 0:
+            session, _, _ = DataTree.process_data_tree_against_libyang(
+                json_dict, changes, yang_model=yang_model, log=log, return_payload=False
+            )
+            self.add(session_id, session, changes_to)
+            return session
+
+        stored = self.get(session_id)
+        if not stored or stored.applied != changes_from:
+            self.remove(session_id)
+            raise SessionExpiredError(session_id)
+
+        try:
+            DataTree.apply_changes(stored.session, changes, log)
+        except Exception:
+            self.remove(session_id)
+            raise
+        stored.applied = changes_to
+        return stored.session
@@ -0,0 +1,136 @@
+import re
+
+from yangvoodoo import Errors, Types
+
+
+class TypeDescriptor:
+
+    """
+    A pre-computed description of the type of a leaf (or leaf-list), built once from the libyang
+    type so that inferring the backend type for a value is a dictionary/set lookup.
+
+    Leafrefs are followed to the type they reference and unions are flattened (including unions
+    of unions and unions containing leafrefs).
+
+    Attributes:
+        yang_type: the backend type (see Types.DATA_ABSTRACTION_MAPPING) if it does not depend on
+                   the value, otherwise None
+        is_union: True if the type (after following leafrefs) is a union
+        is_enum: True if the type is an enumeration (leafrefs are not followed)
+        base_types: a frozenset of the libyang base types of the union members
+        enums: a frozenset of the enumeration names of an enumeration, or within the union members
+    """
+
+    LOOKS_LIKE_A_FLOAT = re.compile(r"^\d+\.\d+$")
+    LOOKS_LIKE_A_NUMBER = re.compile(r"^\d+$")
+
+    # Integer types in order of preference, with the range of values the type can hold. The range
+    # restrictions of the union members are left to libyang to validate.
+    NUMBER_TYPES = (
+        (12, -128, 127, "INT8"),
+        (13, 0, 255, "UINT8"),
+        (14, -32768, 32767, "INT16"),
+        (15, 0, 65535, "UINT16"),
+        (16, -2147483648, 2147483647, "INT32"),
+        (17, 0, 4294967295, "UINT32"),
+        (19, 0, None, "UINT64"),
+    )
+
+    __slots__ = ("yang_type", "is_union", "is_enum", "base_types", "enums")
+
+    def __init__(self, libyang_type):
+        self.yang_type = None
+        self.is_union = False
+        self.base_types = frozenset()
+        self.enums = frozenset()
+
+        base_type = libyang_type.base()
+        self.is_enum = base_type == Types.LIBYANG_LEAFTYPE["ENUM"]
+        if self.is_enum:
+            self.enums = frozenset(str(val) for (val, _) in libyang_type.enums())
+        elif base_type == Types.LIBYANG_LEAF_TYPES_LEAFREF:
+            libyang_type = libyang_type.leafref_type()
+            base_type = libyang_type.base()
+
+        if base_type in Types.LIBYANG_MAPPING:
+            self.yang_type = Types.LIBYANG_MAPPING[base_type]
+        elif base_type == Types.LIBYANG_LEAF_TYPES_UNION:
+            base_types = set()
+            enums = set()
+            self._flatten_union(libyang_type, base_types, enums)
+            self.is_union = True
+            self.base_types = frozenset(base_types)
+            self.enums = frozenset(enums)
+
+    def __repr__(self):
+        if self.is_union:
+            return f"<TypeDescriptor: union {sorted(self.base_types)}>"
+        return f"<TypeDescriptor: {self.yang_type}>"
+
+    @staticmethod
+    def _flatten_union(libyang_type, base_types, enums):
+        for union_type in libyang_type.union_types():
+            base_type = union_type.base()
+            if base_type == Types.LIBYANG_LEAF_TYPES_LEAFREF:
+                union_type = union_type.leafref_type()
+                base_type = union_type.base()
+
+            if base_type == Types.LIBYANG_LEAF_TYPES_UNION:
+                TypeDescriptor._flatten_union(union_type, base_types, enums)
+                continue
+            if base_type == Types.LIBYANG_LEAFTYPE["ENUM"]:
+                enums.update(str(val) for (val, _) in union_type.enums())
+            base_types.add(base_type)
+
+    def get_yang_type(self, value=None, xpath=None, default_to_string=False) -> int:
+        """
+        Return the backend type for the value (see Utils.get_yang_type).
+
+        raises:
+            ValueNotMappedToType
+        """
+        if self.yang_type is not None:
+            return self.yang_type
+
+        if self.is_union:
+            yang_type = self._get_union_yang_type(value)
+            if yang_type is not None:
+                return yang_type
+            if value:
+                raise Errors.ValueNotMappedToTypeUnion(xpath, value)
+
+        if default_to_string:
+            return Types.DATA_ABSTRACTION_MAPPING["STRING"]
+
+        if value:
+            raise Errors.ValueNotMappedToType(xpath, value)
+
+        msg = "Unable to handle the yang type at path " + str(xpath)
+        msg += " (this may be listed as a corner-case on the README already"
+        raise NotImplementedError(msg)
+
+    def _get_union_yang_type(self, value):
+        """
+        Note: for sysrepo if we are a union of enumerations and other types then we must set
+        the data as sr.SR_ENUM_T if it matches the enumeration.
+        """
+        if str(value) in self.enums:
+            return Types.DATA_ABSTRACTION_MAPPING["ENUM"]
+        if Types.LIBYANG_LEAF_TYPES_STRING in self.base_types and isinstance(value, str):
+            return Types.DATA_ABSTRACTION_MAPPING["STRING"]
+        if self.LOOKS_LIKE_A_FLOAT.match(str(value)):
+            return Types.DATA_ABSTRACTION_MAPPING["DECIMAL64"]
+        if self.LOOKS_LIKE_A_NUMBER.match(str(value)):
+            return self.find_best_number_type(self.base_types, int(value))
+        return None
+
+    @staticmethod
+    def find_best_number_type(base_types, value):
+        """
+        Return the first integer type present in the base types which can hold the value,
+        falling back to INT64.
+        """
+        for (base_type, minimum, maximum, name) in TypeDescriptor.NUMBER_TYPES:
+            if base_type in base_types and value >= minimum and (maximum is None or value <= maximum):
+                return Types.DATA_ABSTRACTION_MAPPING[name]
+        return Types.DATA_ABSTRACTION_MAPPING["INT64"]
@@ -115,6 +115,10 @@ LIBYANG_LEAF_TYPES = {
 
 LIBYANG_LEAFTYPE = {5: "EMPTY", 6: "ENUM", "EMPTY": 5, "ENUM": 6}
 
+LIBYANG_LEAF_TYPES_LEAFREF = 9
+LIBYANG_LEAF_TYPES_STRING = 10
+LIBYANG_LEAF_TYPES_UNION = 11
+
 LIBYANG_LEAF_LIKE_NODES = {
     4: "LEAF",
     8: "LEAFLIST",
@@ -50,13 +50,16 @@ class Node:
       - libyang_node     = The libyang node for this schema path of the yang model.
     """
 
+    __slots__ = ("_context", "_node", "_parent", "_path")
+
     _NODE_TYPE = "Node"
 
     def __init__(self, context, node, parent_self=None):
-        self.__dict__["_context"] = context
-        self.__dict__["_node"] = node
-        self.__dict__["_parent"] = parent_self
-        self.__dict__["_path"] = node.real_data_path
+        # __setattr__ is overridden to write to the datastore, so the slots are set directly.
+        object.__setattr__(self, "_context", context)
+        object.__setattr__(self, "_node", node)
+        object.__setattr__(self, "_parent", parent_self)
+        object.__setattr__(self, "_path", node.real_data_path)
 
     def __name__(self):
         return "VoodooNode"
@@ -89,8 +92,8 @@ class Node:
         """
         if attr in ("_ipython_canary_method_should_not_exist_", "_repr_mimebundle_"):
             raise AttributeError("Go Away!")
-        context = self.__dict__["_context"]
-        node = self.__dict__["_node"]
+        context = self._context
+        node = self._node
         context.log.trace("__getattr__ %s %s", attr, node.real_schema_path)
         node_schema = Common.Utils.get_yangnode(node, context, attr)
         node_type = node_schema.nodetype()
@@ -161,8 +164,8 @@ class Node:
         )
 
     def __setattr__(self, attr, val):
-        context = self.__dict__["_context"]
-        node = self.__dict__["_node"]
+        context = self._context
+        node = self._node
         node_schema = Common.Utils.get_yangnode(node, context, attr)
         context.log.trace("__setattr__ %s=%s %s", attr, val, node.real_data_path)
 
@@ -175,19 +178,16 @@ class Node:
         if node_schema.is_key():
             raise Errors.ListKeyCannotBeChanged(node_schema.real_data_path, attr)
 
-        leaf_type = node_schema.type().base()
+        type_descriptor = Common.Utils.get_type_descriptor(context, node_schema)
         # Enumeration:
-        if leaf_type == 6:
-            match = any(str(enum_valid_val) == str(val) for (enum_valid_val, _) in node_schema.type().enums())
-
-            if not match:
-                self._raise_ValueDoesMatchEnumeration(node_schema, val)
+        if type_descriptor.is_enum and str(val) not in type_descriptor.enums:
+            self._raise_ValueDoesMatchEnumeration(node_schema, val)
 
         if val is None:
             context.dal.delete(node_schema.real_data_path)
             return
 
-        backend_type = Common.Utils.get_yang_type(node_schema.type(), val, node_schema.real_data_path)
+        backend_type = type_descriptor.get_yang_type(val, node_schema.real_data_path)
         context.dal.set(node_schema.real_data_path, val, backend_type)
 
     @staticmethod
@@ -239,11 +239,13 @@ class Empty:
 
     """
 
+    __slots__ = ("_context", "_node")
+
     _NODE_TYPE = "Empty"
 
     def __init__(self, context, node_schema):
-        self.__dict__["_context"] = context
-        self.__dict__["_node"] = node_schema
+        self._context = context
+        self._node = node_schema
 
     def __dir__(self):
         return []
@@ -278,11 +280,13 @@ class Empty:
 
 class ContainingNode(Node):
 
-    pass
+    __slots__ = ()
 
 
 class Choice(Node):
 
+    __slots__ = ()
+
     _NODE_TYPE = "Choice"
 
     def __repr__(self):
@@ -296,10 +300,12 @@ class Choice(Node):
 
 class Case(Node):
 
+    __slots__ = ()
+
     _NODE_TYPE = "Case"
 
     def __repr__(self):
-        node = self.__dict__["_node"]
+        node = self._node
         return "Voodoo%s{%s/...%s}" % (
             self._NODE_TYPE,
             node.real_data_path,
@@ -313,6 +319,8 @@ class LeafList(Node):
     Represents a Leaf List
     """
 
+    __slots__ = ()
+
     _NODE_TYPE = "LeafList"
 
     def __dir__(self):
@@ -351,8 +359,24 @@ class LeafList(Node):
     def __len__(self):
         context = self._context
         node = self._node
-        results = context.dal.gets(node.real_data_path)
-        return len(list(results))
+        return context.dal.gets_len(node.real_data_path)
+
+    def __getitem__(self, arg):
+        """
+        Get an item from the leaf-list by index, or a list of items by a slice.
+
+        Example:
+            node[0]                         - returns the first value
+            node[-1]                        - returns the last value
+            node[2:5]                       - returns a list of values
+        """
+        if isinstance(arg, slice):
+            context = self._context
+            node = self._node
+            return list(context.dal.gets_slice(node.real_data_path, arg))
+        if isinstance(arg, int):
+            return self.get_index(arg)
+        return super().__getitem__(arg)
 
     def __delitem__(self, arg):
         context = self._context
@@ -371,17 +395,17 @@ class LeafList(Node):
 
         Example:
             node.get_index(0)               - returns the value for the leaf-list at the index requested.
+            node.get_index(-1)              - returns the last value in the leaf-list.
         """
         context = self._context
         node = self._node
 
-        results = list(context.dal.gets(node.real_data_path))
         try:
-            result = results[index]
+            return context.dal.gets_nth(node.real_data_path, index)
         except IndexError:
-            raise Errors.LeafListDoesNotContainIndexError(len(results), index, node.real_data_path)
-
-        return result
+            raise Errors.LeafListDoesNotContainIndexError(
+                context.dal.gets_len(node.real_data_path), index, node.real_data_path
+            )
 
 
 class List(ContainingNode):
@@ -410,6 +434,8 @@ class List(ContainingNode):
 
     """
 
+    __slots__ = ()
+
     _NODE_TYPE = "List"
     _SORTED_LIST = False
 
@@ -442,6 +468,12 @@ class List(ContainingNode):
         return ListElement(context, new_node, self)
 
     def items(self):
+        """
+        Return a generator of (key value, ListElement) tuples for a single-key list.
+
+        The key values are fetched from the datastore with one query for the whole list, and
+        the list element XPATH is derived from the XPATH of the key leaf.
+        """
         node = self._node
         context = self._context
 
@@ -450,14 +482,10 @@ class List(ContainingNode):
         if len(keys) > 1:
             raise Errors.CannotOperateOnCompositeKeyListError(node.real_data_path)
 
-        for list_element_xpath in context.dal.gets_unsorted(
-            node.real_data_path, node.real_schema_path, ignore_empty_lists=True
-        ):
-
+        for (key_xpath, key_value, _) in context.dal.get_xpath_values(f"{node.real_data_path}/{keys[0]}"):
+            list_element_xpath = key_xpath[: key_xpath.rindex("/")]
             new_node = Common.YangNode(node.libyang_node, node.real_schema_path, list_element_xpath, node.module)
-            yield context.dal.get_raw_xpath_single_val(f"{list_element_xpath}/{keys[0]}"), ListElement(
-                context, new_node, node
-            )
+            yield key_value, ListElement(context, new_node, node)
 
     def __getattr__(self, attr):
         node = self._node
@@ -475,7 +503,7 @@ class List(ContainingNode):
         raise Errors.ListItemsMustBeAccesssedByAnElementError(node.real_data_path, attr)
 
     def __len__(self):
-        context = self.__dict__["_context"]
+        context = self._context
         return context.dal.gets_len(self._node.real_data_path)
 
     def elements(self, sorted_by_xpath=False):
@@ -523,7 +551,8 @@ class List(ContainingNode):
 
         Returns a ListElement Node.
 
-        Alternatively access data by node[value] or node[value1, value2]
+        Alternatively access data by node[value] or node[value1, value2], a python slice (e.g. node[0:10])
+        returns a list of ListElements by position.
         """
         context = self._context
         node = self._node
@@ -546,16 +575,17 @@ class List(ContainingNode):
 
         Example:
             node.get_index(0)               - returns the first list element assuming the list is big enough
+            node.get_index(-1)              - returns the last list element
         """
         context = self._context
         node = self._node
 
-        results = list(context.dal.gets_unsorted(node.real_data_path, node.real_schema_path, ignore_empty_lists=True))
-
         try:
-            result = results[index]
+            result = context.dal.gets_unsorted_nth(node.real_data_path, node.real_schema_path, index)
         except IndexError:
-            raise Errors.ListDoesNotContainIndexError(len(results), index, node.real_data_path)
+            raise Errors.ListDoesNotContainIndexError(
+                context.dal.gets_len(node.real_data_path), index, node.real_data_path
+            )
 
         # Return Object
         new_node = Common.YangNode(node.libyang_node, node.real_schema_path, result, node.module)
@@ -577,6 +607,17 @@ class List(ContainingNode):
     def __getitem__(self, *args):
         context = self._context
         node = self._node
+        if len(args) == 1 and isinstance(args[0], slice):
+            # Integers are list keys, only slices are positional
+            return [
+                ListElement(
+                    context,
+                    Common.YangNode(node.libyang_node, node.real_schema_path, result, node.module),
+                    self,
+                )
+                for result in context.dal.gets_unsorted_slice(node.real_data_path, node.real_schema_path, args[0])
+            ]
+
         (keys, values) = Common.Utils.get_key_val_tuples(context, node, list(args))
         predicates = Common.Utils.encode_xpath_predicates("", keys, values)
         if not context.dal.has_item(node.real_data_path + predicates):
@@ -629,27 +670,26 @@ class SortedList(List):
     the order things are defiend.
     """
 
+    __slots__ = ()
+
     _NODE_TYPE = "SortedList"
     _SORTED_LIST = True
 
 
 class ListIterator(Node):
 
+    __slots__ = ("_xpath_sorted", "_iterator")
+
     _NODE_TYPE = "ListIterator"
 
     def __init__(self, context, node, parent_self, xpath_sorted=False):
-        self.__dict__["_context"] = context
-        self.__dict__["_node"] = node
-        self.__dict__["_parent"] = parent_self
-        self.__dict__["_xpath_sorted"] = xpath_sorted
+        super().__init__(context, node, parent_self)
+        object.__setattr__(self, "_xpath_sorted", xpath_sorted)
         if xpath_sorted:
-            self.__dict__["_iterator"] = context.dal.gets_sorted(
-                node.real_data_path, node.real_schema_path, ignore_empty_lists=True
-            )
+            iterator = context.dal.gets_sorted(node.real_data_path, node.real_schema_path, ignore_empty_lists=True)
         else:
-            self.__dict__["_iterator"] = context.dal.gets_unsorted(
-                node.real_data_path, node.real_schema_path, ignore_empty_lists=True
-            )
+            iterator = context.dal.gets_unsorted(node.real_data_path, node.real_schema_path, ignore_empty_lists=True)
+        object.__setattr__(self, "_iterator", iterator)
 
     def __next__(self):
         context = self._context
@@ -662,24 +702,24 @@ class ListIterator(Node):
 
     def __repr__(self):
         base_repr = self._base_repr()
-        if self.__dict__["_xpath_sorted"]:
+        if self._xpath_sorted:
             return f"{base_repr} Sorted By XPATH"
         return f"{base_repr} Sorted By User (datastore)"
 
 
 class LeafListIterator(Node):
 
+    __slots__ = ("_xpath_sorted", "_iterator")
+
     _NODE_TYPE = "ListIterator"
 
     def __init__(self, context, node, parent_self, xpath_sorted=False):
-        self.__dict__["_context"] = context
-        self.__dict__["_node"] = node
-        self.__dict__["_parent"] = parent_self
-        self.__dict__["_xpath_sorted"] = xpath_sorted
-        self.__dict__["_iterator"] = context.dal.gets(node.real_data_path)
+        super().__init__(context, node, parent_self)
+        object.__setattr__(self, "_xpath_sorted", xpath_sorted)
+        object.__setattr__(self, "_iterator", context.dal.gets(node.real_data_path))
 
     def __next__(self):
-        return next(self.__dict__["_iterator"])
+        return next(self._iterator)
 
 
 class ListElement(Node):
@@ -689,6 +729,8 @@ class ListElement(Node):
     The child nodes are accessible from this node.
     """
 
+    __slots__ = ()
+
     _NODE_TYPE = "ListElement"
 
     def __contains__(self, item):
@@ -713,6 +755,8 @@ class Container(ContainingNode):
     elements.
     """
 
+    __slots__ = ()
+
     _NODE_TYPE = "Container"
 
     def _dict(self) -> dict:
@@ -736,6 +780,8 @@ class PresenceContainer(Container):
     (either created implicitly because of children or explicitly).
     """
 
+    __slots__ = ()
+
     _NODE_TYPE = "PresenceContainer"
 
     def exists(self):
@@ -772,10 +818,12 @@ class PresenceContainer(Container):
 
 class Root(ContainingNode):
 
+    __slots__ = ()
+
     _NODE_TYPE = "Root"
 
     def __repr__(self):
-        context = self.__dict__["_context"]
+        context = self._context
         return "VoodooTopNode{} YANG Module: " + context.module
 
 
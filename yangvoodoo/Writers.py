@@ -0,0 +1,154 @@
+import queue
+import threading
+from typing import Callable, Iterator
+
+
+class ChunkedWriter:
+
+    """
+    A file-like object for Expander.process(writer=...) which gathers the many small writes made by the
+    callbacks into chunks of at least chunk_size characters before handing them to sink.
+
+    Example usage:
+
+        with open("form.html", "w") as fh:
+            writer = ChunkedWriter(fh.write)
+            expander.process(payload, 2, writer=writer)
+            writer.close()
+
+    Any object with a write(str) method (a file object, a socket file, etc) can be given to the Expander
+    directly, ChunkedWriter avoids a system call/network write for every callback.
+    """
+
+    def __init__(self, sink: Callable[[str], None], chunk_size: int = 65536):
+        self.sink = sink
+        self.chunk_size = chunk_size
+        self.buffer = []
+        self.buffered = 0
+
+    def write(self, text: str):
+        self.buffer.append(text)
+        self.buffered += len(text)
+        if self.buffered >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            chunk = "".join(self.buffer)
+            self.buffer = []
+            self.buffered = 0
+            self.sink(chunk)
+
+    def close(self):
+        self.flush()
+
+
+class TornadoWriter(ChunkedWriter):
+
+    """
+    Write the output of an Expander to a tornado RequestHandler, each chunk is written and flushed so the
+    client starts receiving the page before rendering has finished.
+
+    When rendering happens on another thread (e.g. IOLoop.run_in_executor) io_loop must be provided, the
+    chunks are then passed to the IOLoop with add_callback as RequestHandler is not thread-safe. At most
+    max_pending chunks are waiting to be flushed, beyond that rendering waits for the client to catch up.
+
+        loop = tornado.ioloop.IOLoop.current()
+        writer = TornadoWriter(self, io_loop=loop)
+        await loop.run_in_executor(None, functools.partial(instance.process, writer=writer))
+        writer.close()
+
+    chunks_sent counts the chunks handed to the RequestHandler (or the IOLoop), once it is non-zero an
+    error can no longer be reported with an HTTP status.
+    """
+
+    def __init__(self, handler, chunk_size: int = 65536, io_loop=None, max_pending: int = 16):
+        super().__init__(self._send_to_io_loop if io_loop else self._send, chunk_size)
+        self.handler = handler
+        self.io_loop = io_loop
+        self.chunks_sent = 0
+        self.pending = threading.BoundedSemaphore(max_pending)
+        self.errors = []
+
+    def _send(self, chunk: str):
+        self.chunks_sent += 1
+        self.handler.write(chunk)
+        self.handler.flush()
+
+    def _send_to_io_loop(self, chunk: str):
+        self.pending.acquire()
+        if self.errors:
+            self.pending.release()
+            raise RenderingStopped() from self.errors[0]
+        self.chunks_sent += 1
+        self.io_loop.add_callback(self._write_and_flush, chunk)
+
+    async def _write_and_flush(self, chunk: str):
+        try:
+            self.handler.write(chunk)
+            await self.handler.flush()
+        except Exception as err:
+            self.errors.append(err)
+        finally:
+            self.pending.release()
+
+    def close(self):
+        """
+        Write the remaining output, this must be called from the IOLoop's thread once rendering has finished.
+        """
+        self.sink = self._send
+        self.flush()
+
+
+class RenderingStopped(Exception):
+    pass
+
+
+def iter_chunks(render: Callable, chunk_size: int = 65536, max_pending: int = 16) -> Iterator[str]:
+    """
+    Run render(writer) on a thread and yield the output in chunks as it is produced, at most max_pending
+    chunks are held in memory if the consumer is slower than the renderer.
+
+        for chunk in iter_chunks(lambda writer: expander.process(payload, 2, writer=writer)):
+            socket.sendall(chunk.encode())
+
+    Exceptions raised by render are re-raised by the generator, if the consumer stops iterating early
+    rendering is abandoned at the next chunk.
+    """
+    chunks = queue.Queue(max_pending)
+    finished = object()
+    stopped = threading.Event()
+    errors = []
+
+    def sink(chunk):
+        if stopped.is_set():
+            raise RenderingStopped()
+        chunks.put(chunk)
+
+    def run():
+        try:
+            writer = ChunkedWriter(sink, chunk_size)
+            render(writer)
+            writer.close()
+        except BaseException as err:
+            errors.append(err)
+        finally:
+            chunks.put(finished)
+
+    thread = threading.Thread(target=run, name="iter_chunks", daemon=True)
+    thread.start()
+    try:
+        while True:
+            chunk = chunks.get()
+            if chunk is finished:
+                break
+            yield chunk
+        if errors:
+            raise errors[0]
+    finally:
+        stopped.set()
+        while thread.is_alive():
+            try:
+                chunks.get(timeout=0.1)
+            except queue.Empty:
+                pass
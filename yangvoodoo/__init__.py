@@ -7,7 +7,7 @@ import os
 import yangvoodoo.VoodooNode as VoodooNode
 import yangvoodoo.Errors as Errors
 from yangvoodoo.stublydal import StubLyDataAbstractionLayer
-from yangvoodoo.Common import PlainObject, Types, Utils, YangNode
+from yangvoodoo.Common import DATA_CACHE_SIZE, PlainObject, Types, Utils, YangNode
 
 
 class DataAccess(StubLyDataAbstractionLayer):
@@ -28,6 +28,18 @@ class DataAccess(StubLyDataAbstractionLayer):
     # CHANGE VERSION NUMBER HERE
     __version__ = "0.0.16"
 
+    # The errors a bad row can cause in apply_batch
+    BATCH_ERRORS = (
+        libyang.util.LibyangError,
+        Errors.NonExistingNode,
+        Errors.PathIsNotALeaf,
+        Errors.ValueNotMappedToType,
+        Errors.ValueNotMappedToTypeUnion,
+        Errors.ValueDoesMatchEnumeration,
+        Errors.XpathDecodingError,
+        Errors.UnsupportedBatchOperation,
+    )
+
     def __init__(
         self,
         log=None,
@@ -35,6 +47,7 @@ class DataAccess(StubLyDataAbstractionLayer):
         data_abstraction_layer=None,
         yang_model=None,
         yang_location=None,
+        data_cache_size=DATA_CACHE_SIZE,
     ):
         if not log:
             log = Utils.get_logger("yangvoodoo", 10)
@@ -45,6 +58,7 @@ class DataAccess(StubLyDataAbstractionLayer):
         self.node_returned = False
         self.root_voodoo = None
         self.data_abstraction_layer = self
+        self.data_cache_size = data_cache_size
         if hasattr(data_abstraction_layer, "libyang_data"):
             self.libyang_data = data_abstraction_layer.libyang_data
         if yang_model:
@@ -313,6 +327,11 @@ Children: %s"""
         """
         Connect to the datastore.
 
+        An existing libyang context may be provided with yang_ctx, contexts can be shared between
+        sessions with the ContextPool (e.g. yangvoodoo.ContextPool.DEFAULT_CONTEXT_POOL.get(yang_location, [module])).
+        A shared context should be requested with every module required, add_module() will only load
+        a module into the context if it is not already loaded.
+
         returns: True
         """
         if yang_location and not os.path.exists(f"{yang_location}{os.sep}{module}.yang"):
@@ -325,13 +344,33 @@ Children: %s"""
         self.session = self
         self.connected = True
 
-        self.context = VoodooNode.VoodooContext(self.module, self, self.yang_schema, self.yang_ctx, log=self.log)
+        self.context = VoodooNode.VoodooContext(
+            self.module,
+            self,
+            self.yang_schema,
+            self.yang_ctx,
+            log=self.log,
+            data_cache_size=self.data_cache_size,
+        )
+        self.context.schemaindex.build(Utils.recurse_all_available_yang_models(self.context))
 
         self.log.trace("CONNECT: module %s. yang_location %s", module, yang_location)
         self.log.trace("       : libyangctx %s ", self.yang_ctx)
         self.log.trace("       : context %s", self.context)
         return connect_status
 
+    def cache_stats(self):
+        """
+        Return the usage statistics of the schema and data caches used when navigating
+        the yang schema (see Cache.stats()).
+        """
+        if not self.connected:
+            raise Errors.NotConnect()
+        return {
+            "schema": self.context.schemacache.stats(),
+            "data": self.context.datacache.stats(),
+        }
+
     def add_module(self, module):
         """
         Add an aditional yang module.
@@ -345,6 +384,7 @@ Children: %s"""
             return
         self.context.other_yang_modules.append(module)
         self.libyang_ctx.load_module(module)
+        self.context.schemaindex.build(Utils.recurse_all_available_yang_models(self.context))
 
     def disconnect(self):
         """
@@ -444,6 +484,144 @@ Children: %s"""
         """
         return super().has_datastore_changed()
 
+    def snapshot(self):
+        """
+        Take a snapshot of the session which can later be passed to revert() or compare().
+
+        Snapshots are cheap to take, the information required to undo each change is recorded
+        only while a snapshot is active. Snapshots should be released with release() once they
+        are no longer required.
+
+        Example:
+            snapshot = session.snapshot()
+            root.simpleleaf = 'speculative'
+            session.compare(snapshot)       - [('set', '/integrationtest:simpleleaf', 'speculative')]
+            session.revert(snapshot)
+        """
+        self.log.trace("SNAPSHOT")
+        if not self.connected:
+            raise Errors.NotConnect()
+        return super().snapshot()
+
+    def revert(self, snapshot):
+        """
+        Revert the session to the state when the snapshot was taken.
+        """
+        self.log.trace("REVERT: %s", snapshot)
+        if not self.connected:
+            raise Errors.NotConnect()
+        return super().revert(snapshot)
+
+    def compare(self, snapshot):
+        """
+        Return the list of (op, xpath, value) changes made since the snapshot was taken.
+        """
+        if not self.connected:
+            raise Errors.NotConnect()
+        return super().compare(snapshot)
+
+    def apply_batch(self, rows, validate=False, raise_exception=True):
+        """
+        Apply a batch of changes to the datastore in the order provided.
+
+        Each row is a tuple of (op, xpath, value) where op is one of
+            set     - set the leaf at xpath to value
+            create  - create the list element (or presence container) at xpath (value is ignored)
+            delete  - delete the data at xpath (value is ignored)
+            add     - add value to the leaf-list at xpath
+            remove  - remove value from the leaf-list at xpath
+
+        The schema path of each parent path is only derived once, and schema nodes are resolved
+        from the schema index once per schema path for the whole batch.
+
+        A bad row does not stop the batch, instead every error is collected and reported together
+        at the end (as a BackendDatastoreError if raise_exception is True). If validate is True the
+        data tree is validated once after all rows have been applied. Only the errors a bad row can
+        cause are collected (see BATCH_ERRORS), anything else is raised straight away.
+
+        returns: a list of (error-string, xpath) tuples, empty if every row was applied.
+        """
+        if not self.connected:
+            raise Errors.NotConnect()
+
+        errors = []
+        schema_paths = {}
+        yang_types = {}
+        for (op, xpath, value) in rows:
+            try:
+                if op == "set":
+                    schema_path = self._get_batch_schema_path(xpath, schema_paths)
+                    self.set(xpath, value, self._get_batch_yang_type(schema_path, xpath, value, yang_types))
+                elif op == "create":
+                    self.create(xpath)
+                elif op == "delete":
+                    self.delete(xpath)
+                elif op == "add":
+                    self.add(xpath, value)
+                elif op == "remove":
+                    self.remove(xpath, value)
+                else:
+                    raise Errors.UnsupportedBatchOperation(op)
+            except self.BATCH_ERRORS as err:
+                errors.append((str(err), xpath))
+
+        if validate:
+            try:
+                self.validate()
+            except libyang.util.LibyangError as err:
+                errors.append((str(err), "/"))
+
+        if errors and raise_exception:
+            raise Errors.BackendDatastoreError(errors)
+        return errors
+
+    def _get_batch_schema_path(self, xpath, schema_paths):
+        """
+        Return the schema path of a leaf, the schema path (and module) of each parent data path
+        is remembered for the rest of the batch.
+        """
+        (parent_data_path, child) = Utils.split_data_path(xpath)
+        if parent_data_path not in schema_paths:
+            schema_paths[parent_data_path] = self._convert_batch_data_path(parent_data_path, self.module)
+        (parent_schema_path, module) = schema_paths[parent_data_path]
+        (child_schema_path, _) = self._convert_batch_data_path(f"/{child}", module)
+        return f"{parent_schema_path}{child_schema_path}"
+
+    @staticmethod
+    def _convert_batch_data_path(data_path, module):
+        """
+        Convert a data path to a schema path where each component keeps the module it belongs to,
+        a component without a prefix belongs to the same module as it's parent (so nodes augmented
+        from another module resolve).
+
+        returns: (schema path, module of the last component)
+        """
+        schema_path = ""
+        for (_, prefix, name, _, _, _) in Utils.XPATH_DECODER_V4.findall(data_path):
+            if prefix:
+                module = prefix[:-1]
+            schema_path += f"/{module}:{name}"
+        return (schema_path, module)
+
+    def _get_batch_yang_type(self, schema_path, xpath, value, yang_types):
+        """
+        Return the value type for a leaf, unless the type is a union it only depends on the
+        schema so it is remembered for the rest of the batch.
+        """
+        if schema_path in yang_types:
+            return yang_types[schema_path]
+
+        entry = self.context.schemaindex.get(schema_path)
+        if entry is None:
+            raise Errors.NonExistingNode(schema_path)
+        if entry.nodetype != Types.LIBYANG_NODETYPE["LEAF"]:
+            raise Errors.PathIsNotALeaf(xpath)
+
+        yang_type = entry.type_descriptor.get_yang_type(value, xpath)
+        if entry.type_descriptor.yang_type is not None:
+            yang_types[schema_path] = yang_type
+        return yang_type
+
     @staticmethod
     def _welcome():
         if os.path.exists(".colour") and "TERM" in os.environ and "xterm" in os.environ["TERM"]:
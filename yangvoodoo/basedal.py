@@ -157,6 +157,51 @@ class BaseDataAbstractionLayer:
         """
         raise NotImplementedError("gets_len not implemented")
 
+    def gets_nth(self, xpath, index):
+        """
+        From a given XPATH leaf-list return the value at the index (negative indexes are supported).
+        If the index is out of range raise IndexError.
+
+        xpath:       /integrationtest:morecomplex/integrationtest:leaflists/integrationtest:simple
+        """
+        raise NotImplementedError("gets_nth not implemented")
+
+    def gets_slice(self, xpath, index):
+        """
+        From a given XPATH leaf-list return a generator of values selected by a python slice.
+
+        xpath:       /integrationtest:morecomplex/integrationtest:leaflists/integrationtest:simple
+        """
+        raise NotImplementedError("gets_slice not implemented")
+
+    def gets_unsorted_nth(self, xpath, schema_path, index):
+        """
+        From a given XPATH list return the XPATH of the list element at the index (negative indexes
+        are supported). If the index is out of range raise IndexError.
+
+        xpath:       /integrationtest:web/bands[name='Idlewild']/gigs
+        schema_path: /integrationtest:web/integrationtest:bands/integrationtest:gigs
+        """
+        raise NotImplementedError("gets_unsorted_nth not implemented")
+
+    def gets_unsorted_slice(self, xpath, schema_path, index):
+        """
+        From a given XPATH list return a generator of list element XPATHs selected by a python slice.
+
+        xpath:       /integrationtest:web/bands[name='Idlewild']/gigs
+        schema_path: /integrationtest:web/integrationtest:bands/integrationtest:gigs
+        """
+        raise NotImplementedError("gets_unsorted_slice not implemented")
+
+    def subtree_hash(self, xpath):
+        """
+        Return a digest of the content of every data node matching the XPATH and their descendants,
+        equal digests indicate identical subtrees.
+
+        xpath:       /integrationtest:web/bands[name='Idlewild']
+        """
+        raise NotImplementedError("subtree_hash not implemented")
+
     def add(self, xpath, value, valtype=10):
         """
         To create a leaf-list item in /morecomplex/leaflists/simple
@@ -190,6 +235,15 @@ class BaseDataAbstractionLayer:
         """
         raise NotImplementedError("has_item not implemented")
 
+    def exists(self, xpath):
+        """
+        Check to see if any data node matches the XPATH, this is the primitive used by has_item()
+        and container(), implementations should avoid fetching the data to answer the question.
+
+        xpath:          /integrationtest:simplelist[simplekey='b']
+        """
+        raise NotImplementedError("exists not implemented")
+
     def get(self, xpath, default_value=None):
         raise NotImplementedError("get not implemented")
 
@@ -205,6 +259,40 @@ class BaseDataAbstractionLayer:
     def has_datastore_changed(self):
         raise NotImplementedError("has_datastore_changed not implemented")
 
+    def record_changes(self, enabled=True):
+        """
+        Start (or stop) keeping the changes made through this data abstraction layer for changes_since().
+        """
+        raise NotImplementedError("record_changes not implemented")
+
+    def checkpoint(self):
+        """
+        Return a checkpoint within the journal of changes made through this data abstraction layer.
+        """
+        raise NotImplementedError("checkpoint not implemented")
+
+    def changes_since(self, checkpoint=0, coalesce=False):
+        """
+        Return a list of (op, xpath, value) changes made since the checkpoint.
+        """
+        raise NotImplementedError("changes_since not implemented")
+
+    def snapshot(self):
+        """
+        Return a handle representing the current state of the data which can be passed to
+        revert() or compare().
+        """
+        raise NotImplementedError("snapshot not implemented")
+
+    def release(self, snapshot):
+        raise NotImplementedError("release not implemented")
+
+    def revert(self, snapshot):
+        raise NotImplementedError("revert not implemented")
+
+    def compare(self, snapshot):
+        raise NotImplementedError("compare not implemented")
+
     def dump_xpaths(self, start_xpath=None):
         raise NotImplementedError("dump_xpaths not implemented")
 
@@ -232,6 +320,14 @@ class BaseDataAbstractionLayer:
     def advanced_merges(self, payload, format=1, trusted=True):
         raise NotImplementedError("advanced merges not implemented")
 
+    def get_xpath_values(self, xpath):
+        """
+        Return a generator of (xpath, value, nodetype) tuples for every data node matching the XPATH.
+
+        xpath:       /integrationtest:web/bands[name='Idlewild']/gigs
+        """
+        raise NotImplementedError("get_xpath_values not implemented")
+
     def get_raw_xpath(self, xpath, with_val=False):
         raise NotImplementedError("get_raw_xpath not implemented")
 
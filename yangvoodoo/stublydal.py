@@ -1,7 +1,12 @@
-from typing import Generator, Tuple
-from yangvoodoo.Errors import InvalidValueError, NotConnect, PathIsNotALeaf
+import hashlib
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from typing import Generator, Iterator, Tuple
+from yangvoodoo.Errors import InvalidSnapshotError, InvalidValueError, NotConnect, PathIsNotALeaf, XpathDecodingError
 from yangvoodoo.basedal import BaseDataAbstractionLayer
+from yangvoodoo.Cache import PathCache
 from yangvoodoo.Common import PlainObject, Types, Utils, YangNode
+from yangvoodoo.Journal import ChangeJournal, Snapshot
 
 import libyang
 
@@ -21,6 +26,9 @@ class StubLyDataAbstractionLayer(BaseDataAbstractionLayer):
     DAL_ID = "StubLy"
     DAL_IN_MEMORY = False
 
+    CONTAINING_NODETYPES = (Types.LIBYANG_NODETYPE["CONTAINER"], Types.LIBYANG_NODETYPE["LIST"])
+    UNDO_RESTORE = "restore"
+
     def connect(self, module, yang_location, tag="client", yang_ctx=None):
         if yang_ctx:
             self.libyang_ctx = yang_ctx
@@ -33,12 +41,228 @@ class StubLyDataAbstractionLayer(BaseDataAbstractionLayer):
         self.connected = True
         if not hasattr(self, "libyang_data"):
             self.libyang_data = libyang.DataTree(self.libyang_ctx)
+        self._sorted_cache = PathCache()
+        self._sort_key_converters = {}
+        self._subtree_hashes = PathCache()
+        self.journal = ChangeJournal()
+        self._recording_changes = False
+        self._snapshots = []
+        self._undo = []
 
     def disconnect(self):
         self.libyang_data = None
         self.libyang_ctx = None
         self.connected = False
 
+    def commit(self):
+        """
+        The data is held entirely within libyang, so committing only marks the session as clean
+        by clearing the change journal.
+
+        returns: True
+        """
+        if not self.connected:
+            raise NotConnect()
+        self.journal.clear()
+        return True
+
+    def record_changes(self, enabled: bool = True):
+        """
+        Start (or stop) keeping the changes made through this data abstraction layer so they can
+        be returned by changes_since(). Changes are otherwise only kept while a snapshot is active,
+        so the change journal does not grow without bound in a long running session.
+        """
+        if not self.connected:
+            raise NotConnect()
+        if enabled and not self._recording_changes:
+            self.journal.start_recording()
+        elif not enabled and self._recording_changes:
+            self.journal.stop_recording()
+        self._recording_changes = enabled
+
+    def is_session_dirty(self):
+        """
+        Returns True if changes have been made since connecting or the last commit.
+        """
+        if not self.connected:
+            raise NotConnect()
+        return len(self.journal) > 0
+
+    def snapshot(self) -> Snapshot:
+        """
+        Take a snapshot of the data which can later be passed to revert() or compare().
+
+        While any snapshot is active the information required to undo each change is recorded,
+        so taking a snapshot and reverting are proportional to the changes made rather than
+        the size of the data tree. Changes which replace or merge a payload record a full dump.
+        """
+        if not self.connected:
+            raise NotConnect()
+        self.journal.start_recording()
+        snapshot = Snapshot(len(self._undo), self.journal.checkpoint())
+        self._snapshots.append(snapshot)
+        return snapshot
+
+    def release(self, snapshot: Snapshot):
+        """
+        Release a snapshot which is no longer required, once no snapshots are active undo
+        information is no longer recorded.
+        """
+        if not self.connected:
+            raise NotConnect()
+        if snapshot in self._snapshots:
+            self._snapshots.remove(snapshot)
+            self.journal.stop_recording()
+        if not self._snapshots:
+            self._undo = []
+
+    def revert(self, snapshot: Snapshot):
+        """
+        Revert the data to the state when the snapshot was taken, the snapshot remains active
+        but any snapshots taken after it are released.
+
+        The changes made since the snapshot are removed from the change journal, so compare() returns
+        no changes (unless the changes were committed in the meantime, the undo is then recorded as
+        changes since the commit). Deleted list elements and leaf-list items are restored at the end
+        of their list, so the order of an 'ordered-by user' list may differ.
+        """
+        if not self.connected:
+            raise NotConnect()
+        if snapshot not in self._snapshots:
+            raise InvalidSnapshotError(snapshot)
+
+        undo = self._undo[snapshot.position :]
+        del self._undo[snapshot.position :]
+        active_snapshots = self._snapshots[: self._snapshots.index(snapshot) + 1]
+        for _ in self._snapshots[len(active_snapshots) :]:
+            self.journal.stop_recording()
+        # Undoing changes is itself a change, don't record how to undo the undo.
+        self._snapshots = []
+        try:
+            for (op, xpath, value) in reversed(undo):
+                self._apply_undo(op, xpath, value)
+        finally:
+            self._snapshots = active_snapshots
+        self.journal.rewind(snapshot.checkpoint)
+
+    def compare(self, snapshot: Snapshot):
+        """
+        Return the coalesced list of (op, xpath, value) changes made since the snapshot was taken
+        (limited to changes since the last commit).
+        """
+        if not self.connected:
+            raise NotConnect()
+        if snapshot not in self._snapshots:
+            raise InvalidSnapshotError(snapshot)
+        return self.journal.changes_since(snapshot.checkpoint, coalesce=True)
+
+    def _get_undo(self, op, xpath, value=None, created=None):
+        """
+        Called before a change is made while a snapshot is active, returning how to undo the change
+        (or None if there is nothing to undo). The undo is only kept once the change has succeeded,
+        see _record_change().
+
+        created is the top-most data node the change will create, see _get_created_xpath().
+        """
+        if op in (ChangeJournal.SET, ChangeJournal.CREATE):
+            if created is not None:
+                return (ChangeJournal.DELETE, created, None)
+            if op == ChangeJournal.SET:
+                return (op, xpath, next(self.libyang_data.get_xpath(xpath)).value)
+            return None
+        if op == ChangeJournal.DELETE:
+            nodes = [
+                (node.xpath, node.value, node.get_schema().nodetype())
+                for data_node in self.libyang_data.get_xpath(xpath)
+                for node in self.libyang_data.dump_datanodes(start_node=data_node)
+            ]
+            return (self.UNDO_RESTORE, xpath, nodes) if nodes else None
+        item_xpath = f"{xpath}{Utils.encode_xpath_predicate('.', value)}"
+        if op == ChangeJournal.ADD:
+            if created is None:
+                return None
+            if created == item_xpath:
+                return (ChangeJournal.REMOVE, xpath, value)
+            return (ChangeJournal.DELETE, created, None)
+        if op == ChangeJournal.REMOVE:
+            return (ChangeJournal.ADD, xpath, value) if self.exists(item_xpath) else None
+        return (ChangeJournal.LOAD, None, self.libyang_data.dumps(Types.FORMAT["JSON"]) or "{}")
+
+    def _record_change(self, undo, op, xpath, value=None, created=None):
+        """
+        Called once a change has succeeded to keep the undo (if any) and record the change in the
+        change journal.
+        """
+        if undo is not None:
+            self._undo.append(undo)
+        self.journal.record(op, xpath, value, created)
+
+    def _get_created_xpath(self, xpath):
+        """
+        Return the XPATH of the top-most data node which a change to the XPATH will create (i.e. the
+        XPATH itself or the first of it's ancestors which does not exist), or None if the data node
+        already exists.
+        """
+        created = None
+        while xpath and not self.exists(xpath):
+            created = xpath
+            (xpath, _) = Utils.split_data_path(xpath)
+        return created
+
+    def _apply_undo(self, op, xpath, value):
+        if op == ChangeJournal.SET:
+            self.set(xpath, value)
+        elif op == ChangeJournal.DELETE:
+            self.delete(xpath)
+        elif op == ChangeJournal.ADD:
+            self.add(xpath, value)
+        elif op == ChangeJournal.REMOVE:
+            self.remove(xpath, value)
+        elif op == self.UNDO_RESTORE:
+            self._restore_data_nodes(xpath, value)
+        else:
+            self.loads(value, Types.FORMAT["JSON"], trusted=True)
+
+    def _restore_data_nodes(self, xpath, nodes):
+        """
+        Recreate the deleted data nodes at (or below) the xpath from their (xpath, value, nodetype) in
+        depth first order, a data node's ancestors are created along with it when they no longer exist.
+        """
+        self._mark_changed(xpath)
+        for (node_xpath, value, nodetype) in nodes:
+            if nodetype == Types.LIBYANG_NODETYPE["LIST"]:
+                self.libyang_data.set_xpath(node_xpath, "")
+                self.journal.record(ChangeJournal.CREATE, node_xpath)
+            elif nodetype == Types.LIBYANG_NODETYPE["CONTAINER"]:
+                self.libyang_data.set_xpath(node_xpath, None)
+                self.journal.record(ChangeJournal.CREATE, node_xpath)
+            else:
+                self.libyang_data.set_xpath(node_xpath, value)
+                self.journal.record(ChangeJournal.SET, node_xpath, value)
+
+    def checkpoint(self) -> int:
+        """
+        Return a checkpoint within the change journal which can be passed to changes_since()
+        """
+        if not self.connected:
+            raise NotConnect()
+        return self.journal.checkpoint()
+
+    def changes_since(self, checkpoint: int = 0, coalesce: bool = False):
+        """
+        Return a list of (op, xpath, value) changes made since the checkpoint (or since connecting
+        or the last commit), if coalesce is set superseded changes are discarded. The changes must
+        have been recorded, see record_changes().
+
+        The changes can be replayed against another session with DataAccess.apply_batch(), with
+        the exception of merged/loaded data where the op is the name of the method to call with the
+        value (xpath is None) - the payload for 'merges', 'advanced_merges' and 'loads', the filename
+        for 'merge', 'advanced_merge' and 'load'.
+        """
+        if not self.connected:
+            raise NotConnect()
+        return self.journal.changes_since(checkpoint, coalesce)
+
     def validate(self, raise_exception=True):
         """
         Validate the pending changes against the data in the backend datatstore without actually
@@ -70,8 +294,7 @@ class StubLyDataAbstractionLayer(BaseDataAbstractionLayer):
         if not self.connected:
             raise NotConnect()
         # self.log.trace("CONTAINER: %s", xpath)
-        results = list(self.libyang_data.get_xpath(xpath))
-        return bool(len(results))
+        return self.exists(xpath)
 
     def create_container(self, xpath):
         """
@@ -82,7 +305,11 @@ class StubLyDataAbstractionLayer(BaseDataAbstractionLayer):
         if not self.connected:
             raise NotConnect()
         # self.log.trace("CREATE_CONTAINER: %s", xpath)
+        created = self._get_created_xpath(xpath) if self.journal.recording else None
+        undo = self._get_undo(ChangeJournal.CREATE, xpath, created=created) if self._snapshots else None
+        self._mark_changed(xpath)
         self.libyang_data.set_xpath(xpath, None)
+        self._record_change(undo, ChangeJournal.CREATE, xpath, created=created)
 
     def get_attribute(self, xpath: str, attribute_name: str) -> str:
         """
@@ -164,7 +391,11 @@ class StubLyDataAbstractionLayer(BaseDataAbstractionLayer):
         if not self.connected:
             raise NotConnect()
         # self.log.trace("CREATE: %s (keys: %s) (values: %s)", xpath, keys, values)
+        created = self._get_created_xpath(xpath) if self.journal.recording else None
+        undo = self._get_undo(ChangeJournal.CREATE, xpath, created=created) if self._snapshots else None
+        self._mark_changed(xpath)
         self.libyang_data.set_xpath(xpath, "")
+        self._record_change(undo, ChangeJournal.CREATE, xpath, created=created)
 
     def uncreate(self, xpath):
         """
@@ -175,7 +406,10 @@ class StubLyDataAbstractionLayer(BaseDataAbstractionLayer):
         if not self.connected:
             raise NotConnect()
         # self.log.trace("UNCREATE: %s", xpath)
+        undo = self._get_undo(ChangeJournal.DELETE, xpath) if self._snapshots else None
+        self._mark_changed(xpath)
         self.libyang_data.delete_xpath(xpath)
+        self._record_change(undo, ChangeJournal.DELETE, xpath)
 
     def set(self, xpath, value, valtype=18, nodetype=4):
         """
@@ -191,9 +425,13 @@ class StubLyDataAbstractionLayer(BaseDataAbstractionLayer):
             raise NotConnect()
         # self.log.trace("SET: StubLy Datastore- %s => %s", xpath, value)
         self._libyang_errors.clear()
+        created = self._get_created_xpath(xpath) if self.journal.recording else None
+        undo = self._get_undo(ChangeJournal.SET, xpath, created=created) if self._snapshots else None
+        self._mark_changed(xpath)
         self.libyang_data.set_xpath(xpath, value)
         if self._libyang_errors:
             raise InvalidValueError(value, xpath, "; ".join(self._libyang_errors))
+        self._record_change(undo, ChangeJournal.SET, xpath, value, created)
 
     def libyang_get_xpath(self, xpath):
         """
@@ -241,6 +479,84 @@ class StubLyDataAbstractionLayer(BaseDataAbstractionLayer):
         # self.log.trace("COUNT: %s", xpath)
         return self.libyang_data.count_xpath(xpath)
 
+    def gets_nth(self, xpath, index):
+        """
+        For the given XPATH (of a leaflist) return the value at the index (in the order the values
+        were entered). Negative indexes are supported.
+
+        Only the values up to the index are read from the datastore.
+
+        returns: value
+        raises: IndexError if the leaf-list does not contain the index
+        """
+        if not self.connected:
+            raise NotConnect()
+        # self.log.trace("GETS_NTH: %s %s", xpath, index)
+        return self._nth(self.gets(xpath), xpath, index)
+
+    def gets_slice(self, xpath, index: slice):
+        """
+        For the given XPATH (of a leaflist) return the values selected by a python slice object.
+
+        returns: generator of Values
+        """
+        if not self.connected:
+            raise NotConnect()
+        # self.log.trace("GETS_SLICE: %s %s", xpath, index)
+        return self._slice(self.gets(xpath), xpath, index)
+
+    def gets_unsorted_nth(self, xpath, schema_path, index):
+        """
+        For the given XPATH (of a list) return the XPATH of the list element at the index (in the
+        order the list elements were entered). Negative indexes are supported.
+
+        returns: XPATH
+        raises: IndexError if the list does not contain the index
+        """
+        if not self.connected:
+            raise NotConnect()
+        # self.log.trace("GETS_UNSORTED_NTH: %s %s", xpath, index)
+        return self._nth(self.gets_unsorted(xpath, schema_path, ignore_empty_lists=True), xpath, index)
+
+    def gets_unsorted_slice(self, xpath, schema_path, index: slice):
+        """
+        For the given XPATH (of a list) return the XPATHs of the list elements selected by a python
+        slice object.
+
+        returns: generator of XPATHS
+        """
+        if not self.connected:
+            raise NotConnect()
+        # self.log.trace("GETS_UNSORTED_SLICE: %s %s", xpath, index)
+        return self._slice(self.gets_unsorted(xpath, schema_path, ignore_empty_lists=True), xpath, index)
+
+    def _nth(self, iterator: Iterator, xpath: str, index: int):
+        if index < 0:
+            index += self.gets_len(xpath)
+            if index < 0:
+                raise IndexError(index)
+        try:
+            return next(islice(iterator, index, None))
+        except StopIteration:
+            raise IndexError(index)
+
+    def _slice(self, iterator: Iterator, xpath: str, index: slice) -> Iterator:
+        step = 1 if index.step is None else index.step
+        if step == 0:
+            raise ValueError("slice step cannot be zero")
+
+        if step > 0 and (index.start is None or index.start >= 0) and (index.stop is None or index.stop >= 0):
+            # No need to know the length of the list
+            return islice(iterator, index.start, index.stop, step)
+
+        (start, stop, step) = index.indices(self.gets_len(xpath))
+        if step > 0:
+            return islice(iterator, start, stop, step)
+
+        # Negative steps walk backwards, we can only walk forwards so take the required
+        # window and reverse it.
+        return iter(list(islice(iterator, stop + 1, start + 1))[::-1][::-step])
+
     def add(self, xpath, value, valtype=10):
         """
         To create a leaf-list item in /morecomplex/leaflists/simple
@@ -254,7 +570,13 @@ class StubLyDataAbstractionLayer(BaseDataAbstractionLayer):
         if not self.connected:
             raise NotConnect()
         # self.log.trace("ADD: %s => %s (valtype: %s)", xpath, value, valtype)
+        created = None
+        if self.journal.recording:
+            created = self._get_created_xpath(f"{xpath}{Utils.encode_xpath_predicate('.', value)}")
+        undo = self._get_undo(ChangeJournal.ADD, xpath, value, created) if self._snapshots else None
+        self._mark_changed(xpath)
         self.libyang_data.set_xpath(xpath, value)
+        self._record_change(undo, ChangeJournal.ADD, xpath, value, created)
 
     def remove(self, xpath, value):
         """
@@ -266,7 +588,10 @@ class StubLyDataAbstractionLayer(BaseDataAbstractionLayer):
         if not self.connected:
             raise NotConnect()
         # self.log.trace("REMOVE: %s %s", xpath, value)
+        undo = self._get_undo(ChangeJournal.REMOVE, xpath, value) if self._snapshots else None
+        self._mark_changed(xpath)
         self.libyang_data.delete_xpath(f"{xpath}{Utils.encode_xpath_predicate('.', value)}")
+        self._record_change(undo, ChangeJournal.REMOVE, xpath, value)
 
     def set_data_by_xpath(self, context, data_path, value):
         """
@@ -282,9 +607,81 @@ class StubLyDataAbstractionLayer(BaseDataAbstractionLayer):
         node_schema = Utils.get_nodeschema_from_data_path(context, data_path)
         if node_schema.nodetype() != Types.LIBYANG_NODETYPE["LEAF"]:
             raise PathIsNotALeaf("set_raw_data only operates on leaves")
-        val_type = Utils.get_yang_type(node_schema.type(), value, node_schema.real_schema_path)
+        val_type = Utils.get_type_descriptor(context, node_schema).get_yang_type(value, node_schema.real_schema_path)
         self.set(data_path, value, val_type)
 
+    def get_xpath_values(self, xpath: str) -> Generator[Tuple[str, str, int], None, None]:
+        """
+        Stream every data node matching the XPATH from a single traversal of the libyang data tree.
+
+        xpath:       /integrationtest:web/bands[name='Idlewild']/gigs
+
+        returns a generator of (xpath, value, nodetype) tuples, see Types.LIBYANG_NODETYPE for nodetype
+        """
+        if not self.connected:
+            raise NotConnect()
+        # self.log.trace("GET_XPATH_VALUES: %s", xpath)
+        for data_node in self.libyang_data.get_xpath(xpath):
+            yield data_node.xpath, data_node.value, data_node.get_schema().nodetype()
+
+    def subtree_hash(self, xpath: str) -> str:
+        """
+        Return a digest of the content of every data node matching the XPATH (and all of their
+        descendants). Two subtrees with the same digest hold the same data.
+
+        The digest of each container/list element is built from the digests of it's children in a
+        single traversal of the subtree, the digests of every container/list element visited are
+        cached until the data at that path (or an ancestor or descendant) is changed through this
+        data abstraction layer - see invalidate_caches().
+
+        xpath:       /integrationtest:web/bands[name='Idlewild']
+
+        returns a hex digest
+        """
+        if not self.connected:
+            raise NotConnect()
+        cached = self._subtree_hashes.get(xpath)
+        if cached:
+            return cached
+
+        digest = hashlib.sha1()
+        for data_node in self.libyang_data.get_xpath(xpath):
+            digest.update(self._hash_data_node(data_node).encode())
+
+        result = digest.hexdigest()
+        self._subtree_hashes.add_entry(xpath, result)
+        return result
+
+    def _hash_data_node(self, data_node) -> str:
+        """
+        Return the digest of a data node, the descendants are visited in a single (depth first)
+        traversal with a stack of the containers/list elements which have not yet been finished.
+        """
+        stack = []
+        result = None
+        for node in self.libyang_data.dump_datanodes(start_node=data_node):
+            node_xpath = node.xpath
+            while stack and not node_xpath.startswith(f"{stack[-1][0]}/"):
+                result = self._finish_subtree_hash(stack)
+            line = f"{node_xpath}\0{node.value}\0".encode()
+            if node.get_schema().nodetype() in self.CONTAINING_NODETYPES:
+                stack.append((node_xpath, hashlib.sha1(line)))
+            elif stack:
+                stack[-1][1].update(line)
+            else:
+                return hashlib.sha1(line).hexdigest()
+        while stack:
+            result = self._finish_subtree_hash(stack)
+        return result
+
+    def _finish_subtree_hash(self, stack) -> str:
+        (xpath, digest) = stack.pop()
+        result = digest.hexdigest()
+        self._subtree_hashes.add_entry(xpath, result)
+        if stack:
+            stack[-1][1].update(result.encode())
+        return result
+
     def get_raw_xpath(self, xpath: str, with_val: bool = False) -> Generator[Tuple[str, str], None, None]:
         """
         Get raw xpath
@@ -296,12 +693,11 @@ class StubLyDataAbstractionLayer(BaseDataAbstractionLayer):
         if not self.connected:
             raise NotConnect()
         # self.log.trace("GETS_RAW_XPATH: %s", xpath)
-        for xpath in self.libyang_data.gets_xpath(xpath):
-            if with_val:
-                val = next(self.libyang_data.get_xpath(xpath))
-                yield xpath, val.value
-            else:
-                yield xpath
+        if not with_val:
+            yield from self.libyang_data.gets_xpath(xpath)
+            return
+        for (this_xpath, value, _) in self.get_xpath_values(xpath):
+            yield this_xpath, value
 
     def get_raw_xpath_only_values(self, xpath: str) -> Generator[str, None, None]:
         """
@@ -311,17 +707,14 @@ class StubLyDataAbstractionLayer(BaseDataAbstractionLayer):
 
         returns a generator
         """
-        if not self.connected:
-            raise NotConnect()
         # self.log.trace("GETS_RAW_XPATH: %s", xpath)
-        for xpath in self.libyang_data.gets_xpath(xpath):
-            val = next(self.libyang_data.get_xpath(xpath))
-            val.value
+        for (_, value, _) in self.get_xpath_values(xpath):
+            yield value
 
     def get_raw_xpath_single_val(self, xpath):
         # self.log.trace("GET_RAW_XPATH_SINGLE_VAL: %s", xpath)
-        for result in self.get_raw_xpath(xpath, True):
-            return result[1]
+        for (_, value, _) in self.get_xpath_values(xpath):
+            return value
         return None
 
     def gets_sorted(self, xpath, spath, ignore_empty_lists=False):
@@ -329,13 +722,99 @@ class StubLyDataAbstractionLayer(BaseDataAbstractionLayer):
         For the given XPATH (of a list) return an sorted list of XPATHS representing every
         list element within the list.
 
+        The list elements are ordered by the values of the list keys, converted to the type
+        defined in the yang schema (i.e. integers sort numerically, decimal64 as decimals and
+        everything else as strings). The sorted order is cached until data affecting the list
+        is changed, so repeated iterations of an unchanged list do not re-sort.
+
         returns: generator of sorted XPATHS
         """
+        if not self.connected:
+            raise NotConnect()
+
+        cached = self._sorted_cache.get(xpath)
+        if cached is None:
+            sort_key = self._get_list_sort_key(spath)
+            cached = sorted(self.libyang_data.gets_xpath(xpath), key=sort_key)
+            self._sorted_cache.add_entry(xpath, cached)
+
+        yield from cached
+
+    def _get_list_sort_key(self, spath):
+        """
+        Return a function providing a sort key for the list element XPATHs of a list.
+        """
+        converters = self._sort_key_converters.get(spath)
+        if converters is None:
+            converters = self._get_list_key_converters(spath)
+            self._sort_key_converters[spath] = converters
+
+        def sort_key(list_element_xpath):
+            try:
+                (_, keys, values) = Utils.decode_xpath_predicate(list_element_xpath)
+            except XpathDecodingError:
+                return ((1, list_element_xpath),)
+            return tuple(self._convert_key_value(converters.get(key, str), value) for (key, value) in zip(keys, values))
+
+        return sort_key
+
+    def _get_list_key_converters(self, spath):
+        """
+        Return a dictionary of key name to a function converting the string value of the key
+        from an XPATH predicate to a python type which sorts naturally.
+        """
+        converters = {}
+        if not spath:
+            return converters
+        try:
+            list_schema = next(self.libyang_ctx.find_path(spath))
+        except (libyang.util.LibyangError, StopIteration):
+            return converters
+
+        for key in list_schema.keys():
+            leaf_type = key.type()
+            if leaf_type.base() == Types.LIBYANG_LEAF_TYPES_LEAFREF:
+                leaf_type = leaf_type.leafref_type()
+            base_type = leaf_type.base()
+            if base_type in Types.INT_CONVERSION:
+                converters[key.name()] = int
+            elif base_type == Types.DATA_ABSTRACTION_MAPPING["DECIMAL64"]:
+                converters[key.name()] = Decimal
+        return converters
+
+    @staticmethod
+    def _convert_key_value(converter, value):
+        # Values which cannot be converted sort after the converted values (and never
+        # get compared with them).
+        try:
+            return (0, converter(value))
+        except (ValueError, InvalidOperation):
+            return (1, value)
+
+    def invalidate_caches(self, xpath=None):
+        """
+        The sorted lists and subtree hashes are cached until the data is changed through this
+        data abstraction layer, code which changes libyang_data directly (e.g. with set_xpath)
+        must call this method afterwards - with the XPATH that was changed, or None if the
+        change may affect the entire data tree.
+        """
+        self._mark_changed(xpath)
+
+    def _mark_changed(self, xpath=None):
+        """
+        Called by every method which changes data, xpath is the path being changed or None
+        if the change may affect the entire data tree.
+
+        Any cached sorted list or subtree hash which is an ancestor, or descendant, of the
+        changed path is discarded.
+        """
+        if xpath is None:
+            self._sorted_cache.empty()
+            self._subtree_hashes.empty()
+            return
 
-        result = list(self.gets_unsorted(xpath, spath, ignore_empty_lists))
-        result.sort()
-        for xpath in result:
-            yield xpath
+        self._sorted_cache.invalidate(xpath)
+        self._subtree_hashes.invalidate(xpath)
 
     def gets_unsorted(self, xpath, schema_path, ignore_empty_lists=False):
         """
@@ -367,8 +846,20 @@ class StubLyDataAbstractionLayer(BaseDataAbstractionLayer):
         if not self.connected:
             raise NotConnect()
         # self.log.trace("HAS_ITEM: %s", xpath)
-        x = self.libyang_data.get_xpath(xpath)
-        return len(list(x)) != 0
+        return self.exists(xpath)
+
+    def exists(self, xpath):
+        """
+        Evaluate if any data node matches the XPATH.
+
+        Only the first match is taken from libyang, so we never count the matches or instantiate
+        python DataNode objects for the rest of them just to test if the result is empty.
+
+        returns: True or False
+        """
+        if not self.connected:
+            raise NotConnect()
+        return next(self.libyang_data.get_xpath(xpath), None) is not None
 
     def get(self, xpath, default_value=None):
         """
@@ -409,7 +900,10 @@ class StubLyDataAbstractionLayer(BaseDataAbstractionLayer):
         if not self.connected:
             raise NotConnect()
         # self.log.trace("DELETE: %s", xpath)
+        undo = self._get_undo(ChangeJournal.DELETE, xpath) if self._snapshots else None
+        self._mark_changed(xpath)
         self.libyang_data.set_xpath(xpath, None)
+        self._record_change(undo, ChangeJournal.DELETE, xpath)
 
     def dump_xpaths(self, start_xpath: str = None) -> dict:
         """
@@ -456,7 +950,10 @@ class StubLyDataAbstractionLayer(BaseDataAbstractionLayer):
         if not self.connected:
             raise NotConnect()
         # self.log.trace("LOAD: %s (format: %s)", filename, format)
+        undo = self._get_undo(ChangeJournal.LOAD, None) if self._snapshots else None
+        self._mark_changed()
         self.libyang_data.load(filename, format, trusted)
+        self._record_change(undo, ChangeJournal.LOAD_FILE, None, filename)
 
     def subdumps(self, xpath: str, format: int = 1):
         """
@@ -491,7 +988,10 @@ class StubLyDataAbstractionLayer(BaseDataAbstractionLayer):
         if not self.connected:
             raise NotConnect()
         # self.log.trace("LOADS: (format: %s)", format)
+        undo = self._get_undo(ChangeJournal.LOAD, None) if self._snapshots else None
+        self._mark_changed()
         self.libyang_data.loads(payload, format, trusted)
+        self._record_change(undo, ChangeJournal.LOAD, None, payload)
 
     def merge(self, filename, format=1, trusted=True):
         """
@@ -504,8 +1004,11 @@ class StubLyDataAbstractionLayer(BaseDataAbstractionLayer):
         if not self.connected:
             raise NotConnect()
         # self.log.trace("MERGE: (format: %s)", format)
+        undo = self._get_undo(ChangeJournal.LOAD, None) if self._snapshots else None
+        self._mark_changed()
         with open(filename) as fh:
             self.libyang_data.merges(fh.read(), format, trusted)
+        self._record_change(undo, ChangeJournal.MERGE_FILE, None, filename)
 
     def merges(self, payload, format=1, trusted=True):
         """
@@ -518,7 +1021,10 @@ class StubLyDataAbstractionLayer(BaseDataAbstractionLayer):
         if not self.connected:
             raise NotConnect()
         # self.log.trace("MERGES: (format: %s)", format)
+        undo = self._get_undo(ChangeJournal.LOAD, None) if self._snapshots else None
+        self._mark_changed()
         self.libyang_data.merges(payload, format, trusted)
+        self._record_change(undo, ChangeJournal.MERGE, None, payload)
 
     def advanced_merges(self, payload, format=1, trusted=True):
         """
@@ -532,10 +1038,16 @@ class StubLyDataAbstractionLayer(BaseDataAbstractionLayer):
         if not self.connected:
             raise NotConnect()
         # self.log.trace("ADVANCED-MERGES: (format: %s)", format)
+        undo = self._get_undo(ChangeJournal.LOAD, None) if self._snapshots else None
+        self._mark_changed()
         self.libyang_data.advanced_merges(payload, format, trusted)
+        self._record_change(undo, ChangeJournal.ADVANCED_MERGE, None, payload)
 
     def advanced_merge(self, filename, format=1, trusted=True):
         if not self.connected:
             raise NotConnect()
         # self.log.trace("ADVANCED-MERGE: (format: %s)", format)
+        undo = self._get_undo(ChangeJournal.LOAD, None) if self._snapshots else None
+        self._mark_changed()
         self.libyang_data.advanced_merge(filename, format, trusted)
+        self._record_change(undo, ChangeJournal.ADVANCED_MERGE_FILE, None, filename)